@@ -1,7 +1,8 @@
 #!/usr/bin/env python3
-from typing import Generator, List, Optional, Union, Dict, NewType
+from typing import Generator, List, Optional, Tuple, Union, Dict, NewType
 from lexer import *
 from abc import ABC, abstractmethod
+import sys
 
 # Just to have better typing annotations
 ComparisonOperatorType = NewType("ComparisonOperatorType", str)
@@ -11,7 +12,9 @@ MathOperationType = NewType("MathOperationType", str)
 class ASTNode(ABC):
     """
     Abstract class for nodes forming the AST of the Parseed code.
+    Nodes have no __dict__, each one declares its attributes in __slots__ to keep large ASTs small.
     """
+    __slots__ = ()
 
     @abstractmethod
     def to_str(self, depth: int = 0):
@@ -30,23 +33,24 @@ class FloatNumberNode(ASTNode):
     """
     Represent a floating-point number.
     """
+    __slots__ = ("_value",)
 
     def __init__(self, value_token: Token):
         """
         :param value_token: Token of the float number.
         :type value_token: Token
         """
-        self._value_token: Token = value_token
+        self._value: str = value_token.value
 
     def to_str(self, depth: int = 0) -> str:
-        return "\t" * depth + "FloatNumberNode(" + str(self._value_token.value) + ")\n"
+        return "\t" * depth + "FloatNumberNode(" + str(self._value) + ")\n"
 
     @property
     def value(self) -> float:
         """
         Value of this node as a float.
         """
-        return float(self._value_token.value)
+        return float(self._value)
     
     def __str__(self) -> str:
         return self.to_str()
@@ -56,23 +60,24 @@ class IntNumberNode(ASTNode):
     """
     Represent an integer number.
     """
+    __slots__ = ("_value",)
 
     def __init__(self, value_token: Token):
         """
         :param value_token: Token of the integer number.
         :type value_token: Token
         """
-        self._value_token: Token = value_token
+        self._value: str = value_token.value
 
     def to_str(self, depth: int = 0) -> str:
-        return "\t" * depth + "IntNumberNode(" + str(self._value_token.value) + ")\n"
+        return "\t" * depth + "IntNumberNode(" + str(self._value) + ")\n"
 
     @property
     def value(self) -> int:
         """
         Value of this node as an int.
         """
-        return int(self._value_token.value)
+        return int(self._value)
     
     def __str__(self) -> str:
         return self.to_str()
@@ -83,18 +88,20 @@ class CharNode(ASTNode):
     Represent a single character.
     """
 
+    __slots__ = ("_value",)
+
     def __init__(self, value_token: Token):
-        self._value_token: Token = value_token
+        self._value: str = value_token.value
     
     def to_str(self, depth: int = 0) -> str:
-        return "\t" * depth + "CharNode(" + str(self._value_token.value) + ")\n"
+        return "\t" * depth + "CharNode(" + str(self._value) + ")\n"
 
     @property
     def value(self) -> str:
         """
         Value of this node as a string.
         """
-        return str(self._value_token.value)
+        return str(self._value)
     
     def __str__(self) -> str:
         return self.to_str()
@@ -105,18 +112,20 @@ class StringNode(ASTNode):
     Represent a string.
     """
 
+    __slots__ = ("_value",)
+
     def __init__(self, value_token: Token):
-        self._value_token: Token = value_token
+        self._value: str = value_token.value
     
     def to_str(self, depth: int = 0) -> str:
-        return "\t" * depth + "StringNode(" + str(self._value_token.value) + ")\n"
+        return "\t" * depth + "StringNode(" + str(self._value) + ")\n"
 
     @property
     def value(self) -> str:
         """
         Value of this node as a string.
         """
-        return str(self._value_token.value)
+        return str(self._value)
     
     def __str__(self) -> str:
         return self.to_str()
@@ -139,8 +148,23 @@ class MathOperatorNode(ASTNode):
     LEFT_SHIFT: MathOperationType = MathOperationType("LEFT_SHIFT")
     RIGHT_SHIFT: MathOperationType = MathOperationType("RIGHT_SHIFT")
 
+    _TOKENS_TYPES: Dict[str, MathOperationType] = {
+        TT_PLUS: ADD,
+        TT_MINUS: SUBTRACT,
+        TT_DIV: DIVIDE,
+        TT_MULT: MULTIPLY,
+        TT_BIN_AND: AND,
+        TT_BIN_OR: OR,
+        TT_BIN_XOR: XOR,
+        TT_BIN_NOT: NOT,
+        TT_BIN_LSHIFT: LEFT_SHIFT,
+        TT_BIN_RSHIFT: RIGHT_SHIFT
+    }
+
+    __slots__ = ("_type",)
+
     def __init__(self, op_token):
-        self._math_op_token: Token = op_token
+        self._type: MathOperationType = MathOperatorNode._TOKENS_TYPES[op_token.type]
 
     def to_str(self, depth: int = 0):
         return ("\t" * depth) + "MathOperationNode(" + self.type + ")\n"
@@ -161,19 +185,7 @@ class MathOperatorNode(ASTNode):
         - MathOperatorNode.LEFT_SHIFT
         - MathOperatorNode.RIGHT_SHIFT
         """
-        math_op_dict: Dict[str, MathOperationType] = {
-            TT_PLUS: MathOperatorNode.ADD,
-            TT_MINUS: MathOperatorNode.SUBTRACT,
-            TT_DIV: MathOperatorNode.DIVIDE,
-            TT_MULT: MathOperatorNode.MULTIPLY,
-            TT_BIN_AND: MathOperatorNode.AND,
-            TT_BIN_OR: MathOperatorNode.OR,
-            TT_BIN_XOR: MathOperatorNode.XOR,
-            TT_BIN_NOT: MathOperatorNode.NOT,
-            TT_BIN_LSHIFT: MathOperatorNode.LEFT_SHIFT,
-            TT_BIN_RSHIFT: MathOperatorNode.RIGHT_SHIFT
-        }
-        return math_op_dict[self._math_op_token.type]
+        return self._type
 
     def __eq__(self, o) -> bool:
         return self.type == o
@@ -186,6 +198,8 @@ class BinOpNode(ASTNode):
     """
     Represent a binary operation between a two nodes (value or expression).
     """
+    __slots__ = ("_left_node", "_math_op", "_right_node")
+
     def __init__(self, left_node: ASTNode, math_op: MathOperatorNode, right_node: ASTNode):
         """
         :param left_node: Left node of the operation.
@@ -236,6 +250,8 @@ class UnaryOpNode(ASTNode):
     """
     Represent an unary operation between an mathematical operator and a node (value or expression).
     """
+    __slots__ = ("_math_op", "_node")
+
     def __init__(self, math_op: MathOperatorNode, node: ASTNode):
         """
         :param math_op: Mathematical operator of the operation.
@@ -276,12 +292,15 @@ class IdentifierAccessNode(ASTNode):
     """
     This class contains the name of an identifier accessed.
     """
+    __slots__ = ("_name",)
+
     def __init__(self, identifier_name: str):
         """
         :param identifier_name: Identifier as a string.
         :type identifier_name: str
         """
-        self._name: str = identifier_name
+        # the same names are used by many nodes, so they share the same string
+        self._name: str = sys.intern(identifier_name)
 
     def to_str(self, depth: int = 0) -> str:
         return ("\t" * depth) + "IdentifierAccessNode(" + str(self._name) + ")\n"
@@ -328,12 +347,25 @@ class ComparisonOperatorNode(ASTNode):
     AND: ComparisonOperatorType = ComparisonOperatorType("AND")
     OR: ComparisonOperatorType = ComparisonOperatorType("OR")
 
+    _TOKENS_TYPES: Dict[str, ComparisonOperatorType] = {
+        TT_COMP_EQ: EQUAL,
+        TT_COMP_NE: NOT_EQUAL,
+        TT_COMP_GT: GREATER_THAN,
+        TT_COMP_LT: LESS_THAN,
+        TT_COMP_GEQ: GREATER_OR_EQUAL,
+        TT_COMP_LEQ: LESS_OR_EQUAL,
+        TT_COMP_AND: AND,
+        TT_COMP_OR: OR
+    }
+
+    __slots__ = ("_type",)
+
     def __init__(self, comp_op_token: Token):
         """
         :param comp_op_token: Token of the comparison operator.
         :type comp_op_token: Token
         """
-        self._comp_op_token: Token = comp_op_token
+        self._type: ComparisonOperatorType = ComparisonOperatorNode._TOKENS_TYPES[comp_op_token.type]
 
     def to_str(self, depth: int = 0) -> str:
         return "\t" * depth + "ComparisonOperatorNode(" + str(self.type) + ")\n"
@@ -352,17 +384,7 @@ class ComparisonOperatorNode(ASTNode):
         - ComparisonOperatorNode.AND
         - ComparisonOperatorNode.OR
         """
-        comp_dict: Dict[str, ComparisonOperatorType] = {
-            TT_COMP_EQ: ComparisonOperatorNode.EQUAL,
-            TT_COMP_NE: ComparisonOperatorNode.NOT_EQUAL,
-            TT_COMP_GT: ComparisonOperatorNode.GREATER_THAN,
-            TT_COMP_LT: ComparisonOperatorNode.LESS_THAN,
-            TT_COMP_GEQ: ComparisonOperatorNode.GREATER_OR_EQUAL,
-            TT_COMP_LEQ: ComparisonOperatorNode.LESS_OR_EQUAL,
-            TT_COMP_AND: ComparisonOperatorNode.AND,
-            TT_COMP_OR: ComparisonOperatorNode.OR
-        }
-        return comp_dict[self._comp_op_token.type]
+        return self._type
 
     def __eq__(self, o) -> bool:
         return self.type == o
@@ -375,6 +397,8 @@ class ComparisonNode(ASTNode):
     """
     Represent a comparison between two AST nodes.
     """
+    __slots__ = ("_left_node", "_comparison_op", "_right_node")
+
     def __init__(self, left_node: ASTNode, comparison_op: ComparisonOperatorNode, right_node: ASTNode):
         """
         :param left_node: Left part of the comparison.
@@ -423,6 +447,8 @@ class TernaryDataTypeNode(ASTNode):
     """
     This class represents a ternary operator for data-types.
     """
+    __slots__ = ("_comparison", "_if_true", "_if_false")
+
     def __init__(self, comparison_node: ComparisonNode, if_true, if_false):
         """
         :param comparison_node: Comparison of the ternary operator.
@@ -483,6 +509,8 @@ class TernaryEndianNode(ASTNode):
     """
     This class represents a ternary operator for endianness.
     """
+    __slots__ = ("_comparison", "_if_true", "_if_false")
+
     def __init__(self, comparison_node: ComparisonNode, if_true: Endian, if_false: Endian):
         """
         :param comparison_node: Comparison of the ternary operator.
@@ -532,11 +560,30 @@ class TernaryEndianNode(ASTNode):
         return self.to_str()
 
 
+# Size and sign of the basic data-types with a size (the sign is None for floating-point numbers)
+BASIC_TYPES_INFOS: Dict[str, Tuple[int, Optional[bool]]] = {
+    "uint8": (1, False), "int8": (1, True),
+    "uint16": (2, False), "int16": (2, True),
+    "uint24": (3, False), "int24": (3, True),
+    "uint32": (4, False), "int32": (4, True),
+    "uint40": (5, False), "int40": (5, True),
+    "uint48": (6, False), "int48": (6, True),
+    "uint64": (8, False), "int64": (8, True),
+    "uint128": (16, False), "int128": (16, True),
+    "float": (4, None), "double": (8, None),
+}
+
+
 class StructMemberInfoNode(ASTNode):
     """
     Represents the type of a member.
     This class contains the type, the endianness, if it is a list and it length (if it has one).
     """
+    __slots__ = ("_type", "_endian", "_is_list", "_list_length_node", "_delimiter", "_size", "_signed")
+
+    # nodes shared by the members with the same basic data-type and endianness, see get_basic_type
+    _basic_types: Dict[Tuple[str, Endian], "StructMemberInfoNode"] = {}
+
     def __init__(self, type_token: Union[Token, IdentifierAccessNode, TernaryDataTypeNode], endian: Union[Endian, TernaryEndianNode] = Endian.BIG, is_list: bool = False, list_length_node: Union[None, UnaryOpNode, BinOpNode, ComparisonNode] = None, delimiter: Union[CharNode, StringNode, IdentifierAccessNode, IntNumberNode] = StringNode(Token(TT_STRING, r"\0"))):
         r"""
         :param type_token: Token or ternary operator for the type of the member.
@@ -555,70 +602,30 @@ class StructMemberInfoNode(ASTNode):
         self._is_list: bool = is_list
         self._list_length_node: Union[None, UnaryOpNode, BinOpNode, ComparisonNode] = list_length_node
         self._delimiter: Union[CharNode, StringNode, IdentifierAccessNode, IntNumberNode, None] = delimiter
+        self._size: Optional[int] = None
+        self._signed: Optional[bool] = None
 
-        if isinstance(self._type, Token) and self._type.value in DATA_TYPES and self._type.value not in ["string", "bytes"]:
-            self._calculate_infos()
-
-    def _calculate_infos(self):
-        """
-        Calculate the size and if the type is signed.
-        """
-        name = self._type.value
-        if name == "uint8":
-            self._size = 1
-            self._signed = False
-        elif name == "int8":
-            self._size = 1
-            self._signed = True
-        elif name == "uint16":
-            self._size = 2
-            self._signed = False
-        elif name == "int16":
-            self._size = 2
-            self._signed = True
-        elif name == "uint24":
-            self._size = 3
-            self._signed = False
-        elif name == "int24":
-            self._size = 3
-            self._signed = True
-        elif name == "uint32":
-            self._size = 4
-            self._signed = False
-        elif name == "int32":
-            self._size = 4
-            self._signed = True
-        elif name == "uint40":
-            self._size = 5
-            self._signed = False
-        elif name == "int40":
-            self._size = 5
-            self._signed = True
-        elif name == "uint48":
-            self._size = 6
-            self._signed = False
-        elif name == "int48":
-            self._size = 6
-            self._signed = True
-        elif name == "uint64":
-            self._size = 8
-            self._signed = False
-        elif name == "int64":
-            self._size = 8
-            self._signed = True
-        elif name == "uint128":
-            self._size = 16
-            self._signed = False
-        elif name == "int128":
-            self._size = 16
-            self._signed = True 
-        elif name == "float":
-            self._size = 4
-        elif name == "double":
-            self._size = 8
-        elif name == "byte":
-            self._size = 1
-            self._signed = False
+        if isinstance(self._type, Token) and self._type.value in BASIC_TYPES_INFOS:
+            self._size, self._signed = BASIC_TYPES_INFOS[self._type.value]
+
+    @classmethod
+    def get_basic_type(cls, type_name: str, endian: Endian):
+        """
+        Return the node of a basic data-type with a size (not a string nor a bytes) that is not a list.
+        These nodes are never modified after being created, so the same node is returned for the same data-type and endianness.
+
+        :param type_name: Name of the data-type.
+        :type type_name: str
+        :param endian: Endianness of the member.
+        :type endian: Endian
+        :rtype: StructMemberInfoNode
+        """
+        node: Optional[StructMemberInfoNode] = cls._basic_types.get((type_name, endian))
+        if node is None:
+            # the token has no position, so the node does not keep the text of the first file it was found in
+            node = cls(Token(TT_DATA_TYPE, type_name), endian)
+            cls._basic_types[(type_name, endian)] = node
+        return node
 
     def to_str(self, depth: int = 0) -> str:
         type_str: str = ""
@@ -701,7 +708,7 @@ class StructMemberInfoNode(ASTNode):
         Raise an AttributeError if the type is an identifier or a ternary data-type.
         """
 
-        if getattr(self, "_size", None) is None:
+        if self._size is None:
             raise AttributeError("This member has no size.")
         return self._size
 
@@ -712,7 +719,7 @@ class StructMemberInfoNode(ASTNode):
         Raise an AttributeError if the type is an identifier or a ternary data-type.
         """
 
-        if getattr(self, "_signed", None) is None:
+        if self._signed is None:
             raise AttributeError("This member has no sign.")
         return self._signed
     
@@ -755,6 +762,8 @@ class StructMemberDeclareNode(ASTNode):
     Represent a member of a struct.
     It contains the name and the type of the member.
     """
+    __slots__ = ("_infos", "_name_token")
+
     def __init__(self, infos: StructMemberInfoNode, name_token: Token):
         """
         :param infos: Type of the member.
@@ -793,6 +802,8 @@ class MatchNode(ASTNode):
     """
     Represent a match expression inside structs.
     """
+    __slots__ = ("_condition", "_cases", "_member_name")
+
     def __init__(self, condition: ASTNode, cases: Dict[ASTNode, Union[StructMemberInfoNode, List[StructMemberDeclareNode]]], member_name: str = None):
         """
         :param condition: The condition that one case must match.
@@ -852,6 +863,8 @@ class StructDefNode(ASTNode):
     """
     Represent a struct with its name, endianness and members.
     """
+    __slots__ = ("_name_token", "_members", "_endian")
+
     def __init__(self, name_token: Token, members: List[Union[StructMemberDeclareNode, MatchNode]], endian: Union[TernaryEndianNode, Endian] = Endian.BIG):
         """
         :param name_token: Token representing the name of the struct.
@@ -901,6 +914,8 @@ class BitfieldMemberNode(ASTNode):
     """
     Represent a member of a bitfield.
     """
+    __slots__ = ("_name_token", "_bits_count_node")
+
     def __init__(self, name_token: Token, bits_count_node: Optional[ASTNode] = None):
         """
         :param name_token: Token representing the name of the member.
@@ -942,6 +957,8 @@ class BitfieldDefNode(ASTNode):
     """
     Represent a bitfield with its members and its size (in bytes).
     """
+    __slots__ = ("_name_token", "_bitfield_bytes_count_token", "_bitfield_members")
+
     def __init__(self, name_token: Token, members: List[BitfieldMemberNode], bitfield_bytes_count_token: Optional[ASTNode] = None):
         """
         :param name_token: Token representing the name of the bitfield.
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+from errors import ParseedBaseError
+from transpiler import ParseedOutputGenerator, Writer
+from cache import TranspileCache, get_cache_key, open_if_changed
+from lexer import Lexer
+from parser import Parser
+from concurrent.futures import ProcessPoolExecutor
+from glob import glob, has_magic
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Type
+import shutil
+
+
+def expand_files(patterns: List[str]) -> List[str]:
+    """
+    Return the files matching a list of paths or glob patterns, in the order they were given and without duplicates.
+    A path or a pattern matching no file is kept as is, so the error is reported when transpiling it.
+
+    :param patterns: Paths or glob patterns ('**' matches any number of directories).
+    :type patterns: List[str]
+    """
+    files: List[str] = []
+    for pattern in patterns:
+        matches: List[str] = (sorted(glob(pattern, recursive=True)) if has_magic(pattern) else []) or [pattern]
+        files += [match for match in matches if match not in files]
+    return files
+
+
+def get_output_path(file_path: str, generator_class: Type[ParseedOutputGenerator], options: Dict[str, str], output_dir: Optional[str] = None) -> str:
+    """
+    Return the path of the file generated from a Parseed file:
+    the name of the Parseed file with the generator's extension, in the output directory or next to the Parseed file.
+
+    :param file_path: Path of the Parseed file.
+    :type file_path: str
+    :param generator_class: Generator used.
+    :type generator_class: Type[ParseedOutputGenerator]
+    :param options: Options given to the generator.
+    :type options: Dict[str, str]
+    :param output_dir: Directory where the generated file is written, defaults to None.
+    :type output_dir: Optional[str]
+    """
+    path: Path = Path(file_path).with_suffix(generator_class.get_file_extension(options))
+    if output_dir is not None:
+        path = Path(output_dir) / path.name
+    return str(path)
+
+
+def transpile_file(file_path: str, output_path: str, generator_class: Type[ParseedOutputGenerator], options: Dict[str, str],
+                   cache_dir: Optional[str] = None) -> Optional[str]:
+    """
+    Lex, parse and generate the code from a Parseed file, and write it to the output file.
+    The code is streamed to the output file, so it is never fully kept in memory.
+    If a cache directory is given and the code was already generated from the same file, the cached code is copied instead.
+    Return None if the file was transpiled, or the error as a string, whatever exception was raised.
+    This function is run in the worker processes, so everything it takes and returns must be picklable.
+
+    :param file_path: Path of the Parseed file.
+    :type file_path: str
+    :param output_path: Path of the file to write the generated code to.
+    :type output_path: str
+    :param generator_class: Generator to use.
+    :type generator_class: Type[ParseedOutputGenerator]
+    :param options: Options given to the generator.
+    :type options: Dict[str, str]
+    :param cache_dir: Directory of the cache, the cache is not used if None, defaults to None.
+    :type cache_dir: Optional[str]
+    """
+    try:
+        with open(file_path, "r") as f:
+            text: str = f.read()
+        cache: Optional[TranspileCache] = TranspileCache(cache_dir) if cache_dir is not None else None
+        key: str = get_cache_key(text, generator_class, options) if cache is not None else ""
+        cached_path: Optional[Path] = cache.get_path(key) if cache is not None else None
+        if cached_path is not None:
+            with open(cached_path, "r") as cached, open_if_changed(output_path) as f:
+                shutil.copyfileobj(cached, f)
+        else:
+            # the checks are done before opening the output, which is only written once the code is fully generated
+            generator: ParseedOutputGenerator = generator_class(Parser(Lexer(text, file_path).run()).run(), options)
+            with open_if_changed(output_path) as f:
+                writer: Writer = Writer(f)
+                generator.generate(writer)
+                writer.flush()
+            if cache is not None:
+                cache.put_file(key, output_path)
+    except (OSError, ParseedBaseError) as e:
+        return str(e)
+    except Exception as e:  # a file that is not valid UTF-8, a member a generator cannot handle... only fails this file
+        return f"{type(e).__name__}: {e}"
+    return None
+
+
+def transpile_files(files: List[str], generator_class: Type[ParseedOutputGenerator], options: Dict[str, str],
+                    output_dir: Optional[str] = None, jobs: Optional[int] = None, cache_dir: Optional[str] = None) -> List[Tuple[str, str, Optional[str]]]:
+    """
+    Transpile multiple Parseed files across a pool of processes, each one to its own output file.
+    Return, for each file in the given order, its path, the path of its output and None or the error as a string.
+    An error in a file does not stop the other files from being transpiled.
+
+    :param files: Paths of the Parseed files.
+    :type files: List[str]
+    :param generator_class: Generator to use.
+    :type generator_class: Type[ParseedOutputGenerator]
+    :param options: Options given to the generator.
+    :type options: Dict[str, str]
+    :param output_dir: Directory where the generated files are written, next to the Parseed files if None, defaults to None.
+    :type output_dir: Optional[str]
+    :param jobs: Number of processes, the number of CPUs if None, the files are transpiled in this process if 1, defaults to None.
+    :type jobs: Optional[int]
+    :param cache_dir: Directory of the cache, the cache is not used if None, defaults to None.
+    :type cache_dir: Optional[str]
+    """
+    outputs: List[str] = [get_output_path(file_path, generator_class, options, output_dir) for file_path in files]
+    results: List[Optional[str]] = [None] * len(files)
+    pending: List[int] = []
+    for index, output_path in enumerate(outputs):
+        # two Parseed files with the same name in different directories would overwrite the same output
+        if output_path in outputs[:index]:
+            results[index] = f"Output file {output_path} is already generated from {files[outputs.index(output_path)]}"
+        else:
+            pending.append(index)
+
+    if output_dir is not None:
+        Path(output_dir).mkdir(parents=True, exist_ok=True)
+
+    if jobs == 1 or len(pending) <= 1:
+        for index in pending:
+            results[index] = transpile_file(files[index], outputs[index], generator_class, options, cache_dir)
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures = {index: executor.submit(transpile_file, files[index], outputs[index], generator_class, options, cache_dir) for index in pending}
+            for index, future in futures.items():
+                results[index] = future.result()
+
+    return list(zip(files, outputs, results))
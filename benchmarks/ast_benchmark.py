@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Measure the memory taken by the AST of a large generated schema, and how long it takes to lex and parse it.
+With '--revision', the AST of a git revision (like the nodes before they were slotted) is measured too, on the same schema.
+Run from the root of the repository: python benchmarks/ast_benchmark.py [-s STRUCTS] [-m MEMBERS] [--revision REVISION...]
+"""
+from time import perf_counter
+import argparse, gc, json, os, sys, tracemalloc
+
+from revision import get_root, run_at_revision
+sys.path.insert(0, get_root())
+from lexer import Lexer
+from parser import Parser
+
+
+def generate_schema(structs_count: int, members_count: int) -> str:
+    """
+    Return a schema with structs of members of all kinds (basic types, lists, strings, nested structs, ternaries and matches).
+    """
+    res = ""
+    for i in range(structs_count):
+        res += f"LE struct s{i} {{\n"
+        for j in range(0, members_count, 8):
+            res += f"\tuint8 a{j},\n"
+            res += f"\tBE uint32 b{j},\n"
+            res += f"\tuint16[a{j} * 2] c{j},\n"
+            res += f"\tstring(\"\\0\") d{j},\n"
+            res += f"\t{f's{i - 1}' if i > 0 else 'uint64'} e{j},\n"
+            res += f"\t(a{j} == 1 ? uint8 : uint16) f{j},\n"
+            res += f"\tfloat[b{j} > 2] g{j},\n"
+            res += f"\tmatch (a{j}) {{ 1: uint8, 2: BE int32, }} h{j},\n"
+        res += "}\n"
+    return res
+
+
+def measure(text: str) -> dict:
+    """
+    Lex and parse a schema, and return the number of members, the time taken and the memory still used by the AST.
+    """
+    gc.collect()
+    tracemalloc.start()
+    start = perf_counter()
+    ast = Parser(Lexer(text, "<benchmark>").run()).run()
+    elapsed = perf_counter() - start
+    gc.collect()
+    # only the memory still used by the AST, the tokens and the parser are freed at this point
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return {"structs": len(ast), "members": sum(len(struct.members) for struct in ast), "time": elapsed, "memory": memory}
+
+
+def main():
+    argparser = argparse.ArgumentParser(description="Benchmark of the memory taken by the AST.")
+    argparser.add_argument("-s", "--structs", help="Number of structs in the schema.", type=int, default=50)
+    argparser.add_argument("-m", "--members", help="Number of members in each struct.", type=int, default=800)
+    argparser.add_argument("--revision", help="Also measure the AST of a git revision (a commit, a tag...) to compare it with the working tree, \
+                           can be used multiple times.", dest="revisions", action="append", default=[], metavar="REVISION")
+    argparser.add_argument("--json-results", help=argparse.SUPPRESS, action="store_true")  # used by run_at_revision
+    arguments = argparser.parse_args()
+
+    text = generate_schema(arguments.structs, arguments.members)
+    result = measure(text)
+    if arguments.json_results:
+        print(json.dumps(result))
+        return
+
+    print(f"{len(text) / 1e6:.2f} MB, {result['structs']} structs, {result['members']} members")
+    results = [(revision, run_at_revision(revision, __file__, ["-s", str(arguments.structs), "-m", str(arguments.members)]))
+               for revision in arguments.revisions] + [("working tree", result)]
+    for name, other in results:
+        # the ratio is against the memory of the first revision given
+        print(f"{name:<14} {other['time'] * 1000:>6.0f} ms (with tracemalloc), {other['memory'] / 1e6:.2f} MB, "
+              f"{other['memory'] / other['members']:.0f} bytes per member, {other['memory'] / results[0][1]['memory']:.2f}x the memory")
+
+if __name__ == "__main__":
+    main()
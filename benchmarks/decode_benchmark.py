@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Measure how fast the parsers generated by Python_Class decode large synthetic binaries.
+For each schema, a binary file of random records following the schema is generated, then decoded by the generated parser
+of its root struct (the first struct not contained by another one), from a buffer or from a stream.
+Records are every struct instance in the file, nested ones included.
+Allocations per record are the memory blocks (and bytes) still allocated per record once every root struct is decoded.
+Run from the root of the repository: python benchmarks/decode_benchmark.py [SCHEMA...] [-s SIZE] [-n RUNS] [-O NAME[=VALUE]] [--stream]
+"""
+from ast import literal_eval
+from glob import glob
+from random import Random
+from struct import pack
+from time import perf_counter
+from types import GeneratorType
+from typing import Any, Dict, List, Optional, Tuple
+import argparse, gc, io, os, sys, tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ast_nodes import *
+from lexer import Lexer
+from parser import Parser
+from transpiler import Writer
+from generators.python_class import Python_Class
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def evaluate(node: Any, values: Dict[str, Any]) -> Any:
+    """
+    Return the value of an expression or a comparison, with the values of the members already generated.
+    """
+    if isinstance(node, (IntNumberNode, FloatNumberNode)):
+        return node.value
+    elif isinstance(node, (CharNode, StringNode)):
+        return node.value.encode()
+    elif isinstance(node, IdentifierAccessNode):
+        value: Any = values
+        for name in node.name.split("."):
+            value = value[name]
+        return value
+    elif isinstance(node, UnaryOpNode):
+        value = evaluate(node.value, values)
+        return {MathOperatorNode.ADD: value, MathOperatorNode.SUBTRACT: -value, MathOperatorNode.NOT: ~value}[node.op.type]
+    elif isinstance(node, BinOpNode):
+        left: Any = evaluate(node.left_node, values)
+        right: Any = evaluate(node.right_node, values)
+        return {
+            MathOperatorNode.ADD: lambda: left + right,
+            MathOperatorNode.SUBTRACT: lambda: left - right,
+            MathOperatorNode.MULTIPLY: lambda: left * right,
+            MathOperatorNode.DIVIDE: lambda: left // right,  # like the generated parsers
+            MathOperatorNode.AND: lambda: left & right,
+            MathOperatorNode.OR: lambda: left | right,
+            MathOperatorNode.XOR: lambda: left ^ right,
+            MathOperatorNode.LEFT_SHIFT: lambda: left << right,
+            MathOperatorNode.RIGHT_SHIFT: lambda: left >> right,
+        }[node.op.type]()
+    elif isinstance(node, ComparisonNode):
+        left = evaluate(node.left_node, values)
+        right = evaluate(node.right_node, values)
+        return {
+            ComparisonOperatorNode.EQUAL: lambda: left == right,
+            ComparisonOperatorNode.NOT_EQUAL: lambda: left != right,
+            ComparisonOperatorNode.GREATER_THAN: lambda: left > right,
+            ComparisonOperatorNode.GREATER_OR_EQUAL: lambda: left >= right,
+            ComparisonOperatorNode.LESS_THAN: lambda: left < right,
+            ComparisonOperatorNode.LESS_OR_EQUAL: lambda: left <= right,
+            ComparisonOperatorNode.AND: lambda: left and right,
+            ComparisonOperatorNode.OR: lambda: left or right,
+        }[node.comparison_op.type]()
+    raise ValueError(f"cannot evaluate {type(node).__name__}")
+
+
+class BinarySynthesizer:
+    """
+    Generate random binary data following the structs of a schema.
+    Members used in expressions (list lengths, conditions, matches) get small values or the constants they are compared to,
+    so lists stay short and every branch of the ternary operators and matches is taken.
+    """
+    def __init__(self, generator: Python_Class, seed: int = 0, max_length: int = 64):
+        """
+        :param generator: Generator of the schema, gives the structs and the delimiters.
+        :type generator: Python_Class
+        :param seed: Seed of the random values, defaults to 0.
+        :type seed: int
+        :param max_length: Maximum value of the members used in expressions and length of strings, defaults to 64.
+        :type max_length: int
+        """
+        self.generator: Python_Class = generator
+        self.random: Random = Random(seed)
+        self.max_length: int = max_length
+        self.records: int = 0
+        # for each struct, the names of its members used in expressions and the constants of its conditions
+        self.referenced: Dict[str, List[str]] = {}
+        self.constants: Dict[str, List[int]] = {}
+        for struct in generator.structs:
+            self.referenced[struct.name] = generator.get_referenced_names(struct)
+            self.constants[struct.name] = sorted(set(self.get_constants(struct.members)))
+
+    def get_constants(self, nodes: Any) -> List[int]:
+        """
+        Return the integers in the comparisons and match cases of some nodes.
+        """
+        res: List[int] = []
+        if isinstance(nodes, (list, tuple)):
+            for node in nodes:
+                res += self.get_constants(node)
+        elif isinstance(nodes, IntNumberNode):
+            res.append(nodes.value)
+        elif isinstance(nodes, ComparisonNode):
+            res += self.get_constants([nodes.left_node, nodes.right_node])
+        elif isinstance(nodes, MatchNode):
+            res += self.get_constants(list(nodes.cases.keys()) + list(nodes.cases.values()))
+        elif isinstance(nodes, StructMemberDeclareNode):
+            res += self.get_constants(nodes.infos)
+        elif isinstance(nodes, StructMemberInfoNode):
+            if isinstance(nodes.type, TernaryDataTypeNode):
+                res += self.get_constants([nodes.type.comparison, nodes.type.if_true, nodes.type.if_false])
+            if isinstance(nodes.endian, TernaryEndianNode):
+                res += self.get_constants(nodes.endian.comparison)
+        return res
+
+    def generate(self, root: StructDefNode, size: int) -> bytes:
+        """
+        Return root structs one after the other, until the data is at least 'size' bytes long.
+        A list with no length is read until the end of the data, so if the root struct has one, it is filled up to 'size' instead.
+        """
+        out: bytearray = bytearray()
+        while len(out) < size:
+            self.add_struct(out, root, size, 0)
+        return bytes(out)
+
+    def add_struct(self, out: bytearray, struct: StructDefNode, size: int, depth: int) -> Dict[str, Any]:
+        if depth > 100:
+            raise ValueError(f"struct {struct.name} is nested too deeply")
+        self.records += 1
+        values: Dict[str, Any] = {}
+        for member in struct.members:
+            if isinstance(member, MatchNode):
+                condition: Any = evaluate(member.condition, values)
+                for case, case_member in member.cases.items():
+                    if evaluate(case, values) == condition:
+                        if member.member_name is not None:
+                            values[member.member_name] = self.add_member(out, struct, member.member_name, case_member, size, depth, values)
+                        else:
+                            for case_declaration in case_member:
+                                values[case_declaration.name] = self.add_member(out, struct, case_declaration.name, case_declaration.infos,
+                                                                                size, depth, values)
+                        break
+            else:
+                values[member.name] = self.add_member(out, struct, member.name, member.infos, size, depth, values)
+        return values
+
+    def add_member(self, out: bytearray, struct: StructDefNode, name: str, infos: StructMemberInfoNode, size: int, depth: int,
+                   values: Optional[Dict[str, Any]] = None) -> Any:
+        values = values if values is not None else {}
+        if isinstance(infos.type, TernaryDataTypeNode):
+            infos = infos.type.if_true if evaluate(infos.type.comparison, values) else infos.type.if_false
+        endian: Any = infos.endian
+        while isinstance(endian, TernaryEndianNode):
+            endian = endian.if_true if evaluate(endian.comparison, values) else endian.if_false
+
+        if not infos.is_list:
+            return self.add_value(out, struct, name, infos, endian, size, depth, values)
+        elif infos.list_length is None:  # read until the end of the data
+            res: List[Any] = []
+            while len(out) < size:
+                res.append(self.add_value(out, struct, name, infos, endian, size, depth, values))
+            return res
+        elif isinstance(infos.list_length, ComparisonNode):
+            # the members of the comparison are read before the list, so it is repeated either never or forever
+            if evaluate(infos.list_length, values):
+                raise ValueError(f"list {struct.name}.{name} is repeated forever")
+            return []
+        return [self.add_value(out, struct, name, infos, endian, size, depth, values) for _ in range(max(0, evaluate(infos.list_length, values)))]
+
+    def add_value(self, out: bytearray, struct: StructDefNode, name: str, infos: StructMemberInfoNode, endian: Endian, size: int, depth: int,
+                  values: Dict[str, Any]) -> Any:
+        if self.generator.is_member_type_struct(infos.type):
+            return self.add_struct(out, self.generator.get_struct_by_name(infos.type), size, depth + 1)
+        elif self.generator.get_bitfield_by_name(infos.type) is not None:
+            raise ValueError(f"bitfield member {struct.name}.{name} is not supported")
+        elif infos.is_string() or infos.is_bytes():
+            if isinstance(infos.delimiter, IdentifierAccessNode):
+                delimiter: bytes = evaluate(infos.delimiter, values)
+            else:
+                delimiter = literal_eval(self.generator.delimiter_as_str(infos))
+            # the value cannot contain a character of the delimiter
+            characters: bytes = bytes([c for c in b"abcdefghijklmnopqrstuvwxyz0123456789" if c not in delimiter])
+            length: int = self.random.randint(0, self.max_length) if len(delimiter) > 0 else 0
+            value: bytes = bytes(self.random.choices(characters, k=length))
+            out += value + delimiter
+            return value.decode() if infos.is_string() else value
+
+        byteorder: str = "little" if endian == Endian.LITTLE else "big"
+        if infos.is_float() or infos.is_double():
+            out += pack(("<" if byteorder == "little" else ">") + ("f" if infos.is_float() else "d"), self.random.random())
+            return None
+        if name in self.referenced[struct.name]:
+            candidates: List[int] = self.constants[struct.name] + [self.random.randint(0, self.max_length)]
+            value: int = self.random.choice(candidates) & ((1 << (infos.size * 8 - 1)) - 1)  # positive even if signed
+        else:
+            value = self.random.getrandbits(infos.size * 8)
+            if infos.signed:
+                value -= 1 << (infos.size * 8 - 1)
+        out += value.to_bytes(infos.size, byteorder, signed=infos.signed)
+        return value
+
+
+def get_root(generator: Python_Class) -> StructDefNode:
+    """
+    Return the first struct not contained by another struct.
+    """
+    contained: List[str] = [dependency.name for struct in generator.structs for dependency in generator.get_struct_dependencies(struct.name)]
+    return next((struct for struct in generator.structs if struct.name not in contained), generator.structs[0])
+
+
+def decode(cls: Any, data: bytes, stream: bool, keep: bool) -> List[Any]:
+    """
+    Decode every root struct of the data, and return them if 'keep' is True.
+    """
+    res: List[Any] = []
+    if stream:
+        reader: io.BufferedReader = io.BufferedReader(io.BytesIO(data))
+        while len(reader.peek(1)) > 0:
+            record: Any = cls.from_stream(reader)
+            # a list with no length is decoded from a stream only when it is iterated
+            for name in getattr(cls, "__slots__", ()):
+                if isinstance(getattr(record, name, None), GeneratorType):
+                    setattr(record, name, list(getattr(record, name)))
+            if keep:
+                res.append(record)
+    else:
+        cursor: int = 0
+        while cursor < len(data):
+            record = cls(data, cursor)
+            cursor = record.cursor
+            if keep:
+                res.append(record)
+    return res
+
+
+def benchmark(file_path: str, arguments: argparse.Namespace) -> Tuple[str, str]:
+    """
+    Return the name of the root struct of a schema and the results of the decoding of its synthetic binary as a line of text.
+    """
+    with open(file_path, "r") as f:
+        generator: Python_Class = Python_Class(Parser(Lexer(f.read(), file_path).run()).run(), arguments.generator_options)
+    root: StructDefNode = get_root(generator)
+    writer: Writer = Writer()
+    generator.generate(writer)
+    module: Dict[str, Any] = {}
+    exec(compile(writer.generate_code(), file_path, "exec"), module)
+    cls: Any = module[root.name]
+
+    synthesizer: BinarySynthesizer = BinarySynthesizer(generator, arguments.seed, arguments.max_length)
+    data: bytes = synthesizer.generate(root, int(arguments.size * 1e6))
+    records: int = synthesizer.records
+
+    best: Optional[float] = None
+    for _ in range(arguments.runs):
+        gc.collect()
+        start: float = perf_counter()
+        decode(cls, data, arguments.stream, False)
+        elapsed: float = perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    # memory still allocated once every root struct is decoded and kept
+    gc.collect()
+    blocks: int = sys.getallocatedblocks()
+    tracemalloc.start()
+    decoded: List[Any] = decode(cls, data, arguments.stream, True)
+    gc.collect()
+    memory: int = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    blocks = sys.getallocatedblocks() - blocks
+    del decoded
+
+    return root.name, f"{len(data) / 1e6:>8.2f} {records:>9} {best * 1000:>10.1f} {len(data) / best / 1e6:>8.2f} {records / best / 1e3:>10.1f} " \
+                      f"{blocks / records:>14.1f} {memory / records:>13.1f}"
+
+
+def main():
+    argparser = argparse.ArgumentParser(description="Benchmark of the decoding of synthetic binaries by the parsers generated by Python_Class.")
+    argparser.add_argument("files", help="Schemas to benchmark, the examples by default.", nargs="*", metavar="file")
+    argparser.add_argument("-s", "--size", help="Size of each binary in MB.", type=float, default=2)
+    argparser.add_argument("-n", "--runs", help="Number of runs, the fastest one is kept.", type=int, default=3)
+    argparser.add_argument("-O", "--option", help="Option given to Python_Class, can be used multiple times.", dest="options",
+                           action="append", default=[], metavar="NAME[=VALUE]")
+    argparser.add_argument("--stream", help="Decode from a stream instead of a buffer.", action="store_true")
+    argparser.add_argument("--seed", help="Seed of the random data.", type=int, default=0)
+    argparser.add_argument("--max-length", help="Maximum value of the members used in expressions, and length of strings.", dest="max_length",
+                           type=int, default=64)
+    arguments = argparser.parse_args()
+    arguments.generator_options = {name: value for name, _, value in [option.partition("=") for option in arguments.options]}
+
+    files: List[str] = arguments.files or sorted(glob(os.path.join(ROOT_DIR, "examples", "*.prsd")))
+    print(f"{'schema':<10} {'root':<16} {'MB':>8} {'records':>9} {'time (ms)':>10} {'MB/s':>8} {'k records/s':>10} "
+          f"{'blocks/record':>14} {'bytes/record':>13}")
+    for file_path in files:
+        name: str = os.path.splitext(os.path.basename(file_path))[0]
+        try:
+            root, line = benchmark(file_path, arguments)
+        except Exception as e:  # a schema that cannot be synthesized or decoded does not stop the others
+            print(f"{name:<10} error: {type(e).__name__}: {e}")
+            continue
+        print(f"{name:<10} {root:<16} {line}")
+
+
+if __name__ == "__main__":
+    main()
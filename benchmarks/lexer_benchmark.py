@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Measure how fast the lexer tokenizes a large schema, made of the examples repeated multiple times.
+With '--revision', the lexer of a git revision (like the per-character lexer before the single regex one) is measured too,
+on the same schema, to compare them.
+Run from the root of the repository: python benchmarks/lexer_benchmark.py [-r REPEAT] [-n RUNS] [--revision REVISION...]
+"""
+from glob import glob
+from time import perf_counter
+import argparse, json, os, sys
+
+from revision import REPOSITORY, get_root, run_at_revision
+sys.path.insert(0, get_root())
+from lexer import Lexer
+
+
+def measure(repeat: int, runs: int) -> dict:
+    """
+    Lex the examples repeated 'repeat' times multiple times, and return the size of the schema and the fastest time.
+    """
+    text = ""
+    for file_path in sorted(glob(os.path.join(REPOSITORY, "examples", "*.prsd"))):
+        with open(file_path, "r") as f:
+            text += f.read() + "\n"
+    text *= repeat
+
+    best = None
+    for _ in range(runs):
+        start = perf_counter()
+        tokens = Lexer(text, "<benchmark>").run()
+        elapsed = perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return {"bytes": len(text), "lines": len(text.splitlines()), "tokens": len(tokens), "time": best}
+
+
+def main():
+    argparser = argparse.ArgumentParser(description="Benchmark of the lexer.")
+    argparser.add_argument("-r", "--repeat", help="Number of times the examples are repeated in the schema.", type=int, default=200)
+    argparser.add_argument("-n", "--runs", help="Number of runs, the fastest one is kept.", type=int, default=5)
+    argparser.add_argument("--revision", help="Also measure the lexer of a git revision (a commit, a tag...) to compare it with the working tree, \
+                           can be used multiple times.", dest="revisions", action="append", default=[], metavar="REVISION")
+    argparser.add_argument("--json-results", help=argparse.SUPPRESS, action="store_true")  # used by run_at_revision
+    arguments = argparser.parse_args()
+
+    result = measure(arguments.repeat, arguments.runs)
+    if arguments.json_results:
+        print(json.dumps(result))
+        return
+
+    print(f"{result['bytes'] / 1e6:.2f} MB, {result['lines']} lines, {result['tokens']} tokens")
+    results = [(revision, run_at_revision(revision, __file__, ["-r", str(arguments.repeat), "-n", str(arguments.runs)]))
+               for revision in arguments.revisions] + [("working tree", result)]
+    for name, other in results:
+        if other["tokens"] != result["tokens"]:
+            print(f"warning: {other['tokens']} tokens with {name}")
+    for name, other in results:
+        # the speedup is against the first revision given
+        print(f"{name:<14} {other['time'] * 1000:>8.1f} ms, {other['tokens'] / other['time'] / 1e6:.2f} M tokens/s, "
+              f"{other['bytes'] / other['time'] / 1e6:.2f} MB/s, speedup: {results[0][1]['time'] / other['time']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Run a benchmark on the code of a git revision, to compare the working tree with the code before an optimization.
+The files of the revision are exported to a temporary directory, and the benchmark script of the working tree is run on them,
+so both are measured with the same inputs.
+"""
+from typing import Any, Dict, List
+import io, json, os, subprocess, sys, tarfile, tempfile
+
+REPOSITORY: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+"""
+Environment variable giving the directory of the code benchmarked to the script run on a revision.
+"""
+ROOT_VARIABLE: str = "PARSEED_BENCHMARK_ROOT"
+
+
+def get_root() -> str:
+    """
+    Return the directory of the code to benchmark: the files of a revision when run by run_at_revision, the repository otherwise.
+    """
+    return os.environ.get(ROOT_VARIABLE, REPOSITORY)
+
+
+def run_at_revision(revision: str, script: str, args: List[str]) -> Dict[str, Any]:
+    """
+    Run a benchmark script on the code of a git revision and return its results.
+    The script is given the '--json-results' argument, and must then print its results as JSON.
+
+    :param revision: Git revision (commit, tag, branch...) of the code.
+    :type revision: str
+    :param script: Path of the benchmark script.
+    :type script: str
+    :param args: Arguments given to the script.
+    :type args: List[str]
+    """
+    archive: bytes = subprocess.run(["git", "-C", REPOSITORY, "archive", revision], check=True, capture_output=True).stdout
+    with tempfile.TemporaryDirectory() as root:
+        with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+            # only regular files and directories are extracted, with the 'data' filter if it is available
+            tar.extractall(root, **({"filter": "data"} if hasattr(tarfile, "data_filter") else {}))
+        result = subprocess.run([sys.executable, script, *args, "--json-results"], env={**os.environ, ROOT_VARIABLE: root},
+                                check=True, capture_output=True, text=True)
+    return json.loads(result.stdout)
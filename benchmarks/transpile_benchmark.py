@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Measure how the lexer, the parser, the checks done by the generator and Python_Class.generate scale with the size of the schema.
+Schemas of growing size are generated, with chains of nested structs, lists with expressions, strings, ternary data-types
+and endians, matches and bitfields. Each phase is timed separately, the fastest of multiple runs is kept.
+Run from the root of the repository: python benchmarks/transpile_benchmark.py [-s SIZES...] [-d DEPTH] [-n RUNS] [-j JSON_FILE]
+"""
+from math import log
+import argparse, gc, json, os, sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from lexer import Lexer
+from parser import Parser
+from profiler import Profiler, count_nodes
+from transpiler import Writer
+from generators.python_class import Python_Class
+
+PHASES = ["lexer", "parser", "checks", "generate"]
+
+
+def generate_schema(structs_count: int, depth: int) -> str:
+    """
+    Return a schema of structs nested in chains of 'depth' structs, and a bitfield every 10 structs.
+    Bitfields are only declared, as Python_Class does not read bitfield members yet.
+    """
+    res = ""
+    for i in range(structs_count):
+        if i % 10 == 0:
+            res += f"bitfield flags{i} (2) {{ a (3), b (5), c, }}\n"
+        # the last struct of a chain is not nested, so there is no recursion
+        child = f"s{i + 1}" if (i + 1) % depth != 0 and i + 1 < structs_count else "uint64"
+        res += f"LE struct s{i} {{\n"
+        res += "\tuint8 kind,\n"
+        res += "\tBE uint32 length,\n"
+        res += "\tuint16[kind * 2 + 1] values,\n"
+        res += "\tstring(\"\\0\") name,\n"
+        res += "\t(kind == 1 ? uint8 : uint16) small,\n"
+        res += "\t(length > 2 ? LE : BE) uint32 value,\n"
+        res += f"\tmatch (kind) {{ 1: uint8, 2: BE int32, 3: string(\"\\0\"), }} variant,\n"
+        res += f"\t{child} child,\n"
+        res += f"\t{child}[length & 3] children,\n"
+        res += "}\n"
+    return res
+
+
+def measure(text: str, runs: int) -> dict:
+    """
+    Run each phase on a schema multiple times and return the fastest time of each phase with the counters of the schema.
+    """
+    best = {}
+    counters = {}
+    for _ in range(runs):
+        gc.collect()
+        profiler = Profiler()
+        with profiler.phase("lexer"):
+            tokens = Lexer(text, "<benchmark>").run()
+        with profiler.phase("parser"):
+            ast = Parser(tokens).run()
+        with profiler.phase("checks"):
+            generator = Python_Class(ast)
+        with profiler.phase("generate"):
+            writer = Writer()
+            generator.generate(writer)
+            code = writer.generate_code()
+        for phase in profiler.phases:
+            best[phase.name] = min(best.get(phase.name, phase.duration), phase.duration)
+        counters = {"bytes": len(text), "tokens": len(tokens), "nodes": count_nodes(ast), "structs": len(generator.structs),
+                    "bitfields": len(generator.bitfields), "output_bytes": len(code)}
+    return {**counters, "times": best}
+
+
+def main():
+    argparser = argparse.ArgumentParser(description="Benchmark of the lexer, the parser, the checks and Python_Class on schemas of growing size.")
+    argparser.add_argument("-s", "--sizes", help="Numbers of structs of the schemas.", type=int, nargs="+", default=[250, 500, 1000, 2000, 4000])
+    argparser.add_argument("-d", "--depth", help="Number of structs nested in each other.", type=int, default=20)
+    argparser.add_argument("-n", "--runs", help="Number of runs per schema, the fastest one is kept for each phase.", type=int, default=3)
+    argparser.add_argument("-j", "--json", help="Write the results to a JSON file, to plot the scaling curves.", dest="json_file", default=None)
+    arguments = argparser.parse_args()
+
+    results = []
+    print(f"{'structs':>8} {'tokens':>9} {'nodes':>9} " + " ".join([f"{phase + ' (ms)':>15}" for phase in PHASES]))
+    for size in arguments.sizes:
+        result = measure(generate_schema(size, arguments.depth), arguments.runs)
+        results.append(result)
+        print(f"{result['structs']:>8} {result['tokens']:>9} {result['nodes']:>9} " +
+              " ".join([f"{result['times'][phase] * 1000:>15.1f}" for phase in PHASES]))
+
+    # throughput of the largest schema
+    result = results[-1]
+    times = result["times"]
+    print()
+    print(f"lexer:    {result['tokens'] / times['lexer'] / 1e6:.2f} M tokens/s, {result['bytes'] / times['lexer'] / 1e6:.2f} MB/s")
+    print(f"parser:   {result['tokens'] / times['parser'] / 1e6:.2f} M tokens/s, {result['nodes'] / times['parser'] / 1e6:.2f} M nodes/s")
+    print(f"checks:   {result['structs'] / times['checks'] / 1e3:.1f} k structs/s")
+    print(f"generate: {result['structs'] / times['generate'] / 1e3:.1f} k structs/s, {result['output_bytes'] / times['generate'] / 1e6:.2f} MB/s")
+
+    # exponent of the time against the number of structs between two consecutive sizes, 1.0 is linear
+    if len(results) > 1:
+        print()
+        print(f"{'scaling':>8} " + " ".join([f"{phase:>15}" for phase in PHASES]))
+        for previous, result in zip(results, results[1:]):
+            ratio = log(result["structs"] / previous["structs"])
+            print(f"{result['structs']:>8} " + " ".join([f"{log(result['times'][phase] / previous['times'][phase]) / ratio:>15.2f}" for phase in PHASES]))
+
+    if arguments.json_file is not None:
+        with open(arguments.json_file, "w") as f:
+            json.dump({"depth": arguments.depth, "runs": arguments.runs, "results": results}, f, indent=1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+from transpiler import ParseedOutputGenerator
+from hashlib import sha256
+from inspect import getsourcefile
+from pathlib import Path
+from contextlib import contextmanager
+from filecmp import cmp
+from functools import lru_cache
+from importlib import import_module
+from typing import Dict, Iterator, List, Optional, TextIO, Type
+import os, shutil
+
+"""
+Directory of the cache used by the CLI when '--cache-dir' is not given, set with the PARSEED_CACHE_DIR environment variable.
+None if it is not set: the generated code is only cached when asked for, as nothing is written outside of the output otherwise.
+"""
+DEFAULT_CACHE_DIR: Optional[str] = os.environ.get("PARSEED_CACHE_DIR")
+
+"""
+Modules used to generate code whatever the generator, their sources are part of the cache keys.
+"""
+CORE_MODULES: List[str] = ["lexer", "parser", "ast_nodes", "transpiler", "errors", "utils"]
+
+
+@lru_cache(maxsize=None)
+def get_source_digest(path: str, mtime_ns: int, size: int) -> bytes:
+    """
+    Return the hash of a source file, its modification time and size are only given to read it again once it changed.
+
+    :param path: Path of the source file.
+    :type path: str
+    :param mtime_ns: Modification time of the file, in nanoseconds.
+    :type mtime_ns: int
+    :param size: Size of the file.
+    :type size: int
+    """
+    return sha256(Path(path).read_bytes()).digest()
+
+
+def get_cache_key(text: str, generator_class: Type[ParseedOutputGenerator], options: Dict[str, str]) -> str:
+    """
+    Return the key of the code generated from a Parseed source.
+    The key depends on the source, the options, the generator's class and VERSION, and the source files of the generator
+    and of the CORE_MODULES (lexer, parser, AST nodes...), so editing any of them invalidates the code generated before,
+    even if VERSION was not changed.
+
+    :param text: Parseed source.
+    :type text: str
+    :param generator_class: Generator used.
+    :type generator_class: Type[ParseedOutputGenerator]
+    :param options: Options given to the generator.
+    :type options: Dict[str, str]
+    """
+    key = sha256()
+    key.update(f"{generator_class.__module__}.{generator_class.__qualname__}\0{generator_class.VERSION}\0".encode())
+    for name in sorted(options.keys()):
+        key.update(f"{name}={options[name]}\0".encode())
+    for module in [generator_class.__module__] + CORE_MODULES:
+        source_file: Optional[str] = getsourcefile(import_module(module))
+        if source_file is not None:
+            stat: os.stat_result = os.stat(source_file)
+            key.update(get_source_digest(source_file, stat.st_mtime_ns, stat.st_size))
+    key.update(b"\0" + text.encode())
+    return key.hexdigest()
+
+
+class TranspileCache:
+    """
+    Cache of generated code in a directory, each code is in a file named after its key.
+    """
+    def __init__(self, directory: str):
+        """
+        :param directory: Directory of the cache, created when the first code is added.
+        :type directory: str
+        """
+        self.directory: Path = Path(directory)
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Return the code generated with this key, None if it is not in the cache.
+
+        :param key: Key returned by get_cache_key.
+        :type key: str
+        """
+        try:
+            return (self.directory / key[:2] / key).read_text()
+        except OSError:
+            return None
+
+    def get_path(self, key: str) -> Optional[Path]:
+        """
+        Return the path of the file containing the code generated with this key, None if it is not in the cache.
+        Used to copy the code without reading it all in memory.
+
+        :param key: Key returned by get_cache_key.
+        :type key: str
+        """
+        path: Path = self.directory / key[:2] / key
+        return path if path.is_file() else None
+
+    def put(self, key: str, code: str):
+        """
+        Add the code generated with a key.
+        Errors are ignored, as the cache is only used to avoid generating the code again.
+
+        :param key: Key returned by get_cache_key.
+        :type key: str
+        :param code: Generated code.
+        :type code: str
+        """
+        path: Path = self.directory / key[:2] / key
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # written to a temporary file first, so a concurrent run never reads a partial code
+            tmp_path: Path = path.with_name(f"{key}.{os.getpid()}.tmp")
+            tmp_path.write_text(code)
+            os.replace(tmp_path, path)
+        except OSError:
+            pass
+
+    def put_file(self, key: str, file_path: str):
+        """
+        Add the code generated with a key from the file it was written to.
+        Errors are ignored, as the cache is only used to avoid generating the code again.
+
+        :param key: Key returned by get_cache_key.
+        :type key: str
+        :param file_path: Path of the file containing the generated code.
+        :type file_path: str
+        """
+        path: Path = self.directory / key[:2] / key
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path: Path = path.with_name(f"{key}.{os.getpid()}.tmp")
+            shutil.copyfile(file_path, tmp_path)
+            os.replace(tmp_path, path)
+        except OSError:
+            pass
+
+
+def write_if_changed(path: str, code: str):
+    """
+    Write the generated code to a file, unless the file already contains this code (so its modification time is kept).
+
+    :param path: Path of the file.
+    :type path: str
+    :param code: Generated code.
+    :type code: str
+    """
+    try:
+        with open(path, "r") as f:
+            if f.read() == code:
+                return
+    except (OSError, UnicodeDecodeError):
+        pass
+    with open(path, "w") as f:
+        f.write(code)
+
+
+@contextmanager
+def open_if_changed(path: str) -> Iterator[TextIO]:
+    """
+    Open a stream to write the generated code to a file without keeping it in memory.
+    The code is written to a temporary file, which replaces the file once the stream is closed,
+    unless the file already contains this code (so its modification time is kept).
+    If an exception is raised while writing, the file is left unchanged.
+
+    :param path: Path of the file.
+    :type path: str
+    """
+    tmp_path: str = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "w") as f:
+            yield f
+        if os.path.isfile(path) and cmp(tmp_path, path, shallow=False):
+            os.remove(tmp_path)
+        else:
+            os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
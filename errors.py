@@ -189,14 +189,15 @@ class RecursiveStructError(ParseedMultipleUnderlinedError):
     Should be raised when a struct includes itself (by a member or sub-member of any depth).
     """
 
-    def __init__(self, structs):
+    def __init__(self, cycles):
         """
-        :param structs: List of structs where the recursion occurs.
-        :type structs: List[StructDefNode]
+        :param cycles: Every recursion found, as the path of structs from a struct back to itself.
+        :type cycles: List[List[StructDefNode]]
         """
-        pos_start: List[Position] = [s._name_token.pos_start for s in structs]
-        pos_end: List[Position] = [s._name_token.pos_end for s in structs]
-        super().__init__(pos_start, pos_end, "Recursive nested structs error", " -> ".join([s.name for s in structs]))
+        # the last struct of a path is its first one, it is only underlined once
+        pos_start: List[Position] = [s._name_token.pos_start for cycle in cycles for s in cycle[:-1]]
+        pos_end: List[Position] = [s._name_token.pos_end for cycle in cycles for s in cycle[:-1]]
+        super().__init__(pos_start, pos_end, "Recursive nested structs error", ", ".join([" -> ".join([s.name for s in cycle]) for cycle in cycles]))
 
 
 class DuplicateMemberError(ParseedMultipleUnderlinedError):
@@ -231,6 +232,23 @@ class DuplicateStructOrBitfieldError(ParseedMultipleUnderlinedError):
         super().__init__(pos_start, pos_end, "Duplicate struct or bitfield error", nodes[0].name)
 
 
+class UnsupportedFeatureError(ParseedSimpleUnderlinedError):
+    """
+    Should be raised by a generator when it cannot generate the code of something valid in the language.
+    """
+
+    def __init__(self, pos_start: Position, pos_end: Position, details: str):
+        """
+        :param pos_start: Start position of the error.
+        :type pos_start: Position
+        :param pos_end: End position of the error.
+        :type pos_end: Position
+        :param details: Details about the error.
+        :type details: str
+        """
+        super().__init__(pos_start, pos_end, "Unsupported feature error", details)
+
+
 class InvalidStateError(Exception):
     """
     This error is used in the parser to indicate some intern invalid state,
@@ -0,0 +1,890 @@
+#!/usr/bin/env python3
+from transpiler import *
+from ast_nodes import *
+from ast import literal_eval
+from keyword import iskeyword
+from math import ceil
+from typing import Tuple
+
+
+class C_Struct(ParseedOutputGenerator):
+    """
+    Generate C structs and the functions parsing them from a buffer.
+    Every struct 'Name' gets a function 'int Name_parse(parseed_ctx *ctx, Name *out)' returning 0 on success,
+    or -1 with the reason in 'ctx->error' and its offset in 'ctx->cursor'.
+    Lists are allocated from the context (released by 'parseed_free'), strings and bytes point into the buffer.
+    A member whose type depends on the data (ternary operator or match) has one field per possible type,
+    and a '<name>__case' field with the index of the type read (-1 if no case of a match was read).
+    Bitfield members are not supported yet.
+    """
+
+    PYGMENT_HIGHLIGHTER = "C"
+    FILE_EXTENSION = ".c"
+
+    OPTIONS = {
+        "ctypes": "Generate a Python module embedding the C code, compiled with the system C compiler when imported and called with ctypes."
+    }
+
+    C_TYPES = {
+        "uint8": "uint8_t", "int8": "int8_t",
+        "uint16": "uint16_t", "int16": "int16_t",
+        "uint24": "uint32_t", "int24": "int32_t",
+        "uint32": "uint32_t", "int32": "int32_t",
+        "uint40": "uint64_t", "int40": "int64_t",
+        "uint48": "uint64_t", "int48": "int64_t",
+        "uint64": "uint64_t", "int64": "int64_t",
+        "uint128": "parseed_int128", "int128": "parseed_int128",
+        "float": "float", "double": "double",
+        "string": "parseed_bytes", "bytes": "parseed_bytes",
+    }
+
+    CTYPES_TYPES = {
+        "uint8": "ctypes.c_uint8", "int8": "ctypes.c_int8",
+        "uint16": "ctypes.c_uint16", "int16": "ctypes.c_int16",
+        "uint24": "ctypes.c_uint32", "int24": "ctypes.c_int32",
+        "uint32": "ctypes.c_uint32", "int32": "ctypes.c_int32",
+        "uint40": "ctypes.c_uint64", "int40": "ctypes.c_int64",
+        "uint48": "ctypes.c_uint64", "int48": "ctypes.c_int64",
+        "uint64": "ctypes.c_uint64", "int64": "ctypes.c_int64",
+        "uint128": "_Int128", "int128": "_Int128",
+        "float": "ctypes.c_float", "double": "ctypes.c_double",
+        "string": "_Bytes", "bytes": "_Bytes",
+    }
+
+    C_KEYWORDS = [
+        "auto", "break", "case", "char", "const", "continue", "default", "do", "double", "else", "enum", "extern",
+        "float", "for", "goto", "if", "inline", "int", "long", "register", "restrict", "return", "short", "signed",
+        "sizeof", "static", "struct", "switch", "typedef", "union", "unsigned", "void", "volatile", "while",
+        "ctx", "out",
+    ]
+
+    def generate(self, writer: Writer):
+        # set when generating the code of a struct, its members are used to resolve identifiers in expressions
+        self.struct: Optional[StructDefNode] = None
+        self.locals_count: int = 0
+        self.check_bitfield_members()
+
+        if "ctypes" not in self.options:
+            self.add_c_code(writer)
+            return
+
+        c_writer: Writer = Writer()
+        self.add_c_code(c_writer)
+
+        cb = writer.add_block()
+        cb.add_line("#!/usr/bin/env python3")
+        cb.add_line("import ctypes, hashlib, os, subprocess, tempfile")
+        cb.add_empty_line()
+        cb.add_line("SOURCE = r\"\"\"")
+        for line in c_writer.generate_code().splitlines():
+            cb.add_line(line)
+        cb.add_line("\"\"\"")
+        cb.add_empty_line()
+        self.add_ctypes_helpers(cb)
+
+        cb = writer.add_block()
+        for struct in self.structs:
+            cb.add_line(f"class {struct.name}(ctypes.Structure):")
+            cb = cb.add_block()
+            cb.add_line("@classmethod")
+            cb.add_line("def parse(cls, buf, cursor=0):")
+            cb = cb.add_block()
+            cb.add_line(f"return _parse(cls, _lib.{struct.name}_parse, buf, cursor)")
+            cb = cb.end_block()
+            cb = cb.end_block()
+            cb.add_empty_line()
+
+        cb = writer.add_block()
+        # embedded structs must be complete before being used in _fields_
+        for struct in self.get_structs_in_dependency_order():
+            self.struct = struct
+            cb.add_line(f"{struct.name}._fields_ = [")
+            cb = cb.add_block()
+            for _, _, ctypes_field, ctypes_type in self.get_fields(struct):
+                cb.add_line(f"(\"{ctypes_field}\", {ctypes_type}),")
+            cb = cb.end_block()
+            cb.add_line("]")
+            cb.add_line(f"_lib.{struct.name}_parse.argtypes = [ctypes.POINTER(_Context), ctypes.POINTER({struct.name})]")
+            cb.add_line(f"_lib.{struct.name}_parse.restype = ctypes.c_int")
+            for name, getter in self.get_properties(struct):
+                if not iskeyword(name):
+                    cb.add_line(f"{struct.name}.{name} = property(lambda self: {getter})")
+                else:
+                    cb.add_line(f"setattr({struct.name}, \"{name}\", property(lambda self: {getter}))")
+            cb.add_empty_line()
+
+    @classmethod
+    def get_file_extension(cls, options: Dict[str, str]) -> str:
+        return ".py" if "ctypes" in options else cls.FILE_EXTENSION  # the C code is embedded in a Python module
+
+    def check_bitfield_members(self):
+        """
+        Raise an UnsupportedFeatureError if the type of a member, or one of its possible types, is a bitfield.
+        """
+        for struct in self.structs:
+            for member in struct.members:
+                if isinstance(member, MatchNode):
+                    if member.member_name is not None:
+                        variants: List[StructMemberInfoNode] = list(member.cases.values())
+                    else:
+                        variants: List[StructMemberInfoNode] = [member_match.infos for members in member.cases.values() for member_match in members]
+                elif isinstance(member.infos.type, TernaryDataTypeNode):
+                    variants: List[StructMemberInfoNode] = [member.infos.type.if_true, member.infos.type.if_false]
+                else:
+                    variants: List[StructMemberInfoNode] = [member.infos]
+                for infos in variants:
+                    if self.get_bitfield_by_name(infos.type) is not None:
+                        raise UnsupportedFeatureError(infos._type.pos_start, infos._type.pos_end,
+                                                      f"bitfields are not supported by C_Struct, \"{infos.type}\" in struct {struct.name}")
+
+    def add_c_code(self, writer: Writer):
+        """
+        Add the C code: the helpers reading from the buffer, the structs and their parse functions.
+        """
+        cb = writer.add_block()
+        cb.add_line("#include <stdint.h>")
+        cb.add_line("#include <stdlib.h>")
+        cb.add_line("#include <string.h>")
+        cb.add_empty_line()
+        self.add_c_helpers(cb)
+
+        cb = writer.add_block()
+        for struct in self.structs:
+            cb.add_line(f"typedef struct {struct.name} {struct.name};")
+        cb.add_empty_line()
+        for struct in self.get_structs_in_dependency_order():
+            self.struct = struct
+            cb.add_line(f"struct {struct.name} {{")
+            cb = cb.add_block()
+            for c_type, field, _, _ in self.get_fields(struct):
+                cb.add_line(f"{c_type}{field};" if c_type.endswith("*") else f"{c_type} {field};")
+            if len(struct.members) == 0:
+                cb.add_line("uint8_t empty_;")  # C does not allow empty structs
+            cb = cb.end_block()
+            cb.add_line("};")
+            cb.add_empty_line()
+        for struct in self.structs:
+            cb.add_line(f"int {struct.name}_parse(parseed_ctx *ctx, {struct.name} *out);")
+
+        for struct in self.structs:
+            self.struct = struct
+            cb = writer.add_block()
+            cb.add_line(f"int {struct.name}_parse(parseed_ctx *ctx, {struct.name} *out) {{")
+            cb = cb.add_block()
+            cb.add_line("memset(out, 0, sizeof(*out));")
+            match_index: int = 0
+            for member in struct.members:
+                if isinstance(member, MatchNode):
+                    self.add_match_read(cb, member, match_index)
+                    match_index += member.member_name is None
+                elif isinstance(member.infos.type, TernaryDataTypeNode):
+                    tdtn: TernaryDataTypeNode = member.infos.type
+                    field: str = self.c_name(member.name)
+                    cb.add_line(f"if ({self.comparison_as_c(tdtn.comparison)}) {{")
+                    cb = cb.add_block()
+                    cb.add_line(f"out->{field}__case = 0;")
+                    self.add_member_read(cb, f"out->{field}__0", tdtn.if_true, member.infos.endian, True)
+                    cb = cb.end_block()
+                    cb.add_line("} else {")
+                    cb = cb.add_block()
+                    cb.add_line(f"out->{field}__case = 1;")
+                    self.add_member_read(cb, f"out->{field}__1", tdtn.if_false, member.infos.endian, True)
+                    cb = cb.end_block()
+                    cb.add_line("}")
+                else:
+                    self.add_member_read(cb, f"out->{self.c_name(member.name)}", member.infos, member.infos.endian)
+            cb.add_line("return 0;")
+            cb = cb.end_block()
+            cb.add_line("}")
+
+    def add_c_helpers(self, cb: CodeBlock):
+        """
+        Add the types and functions shared by all parse functions.
+        """
+        cb.add_line("typedef struct parseed_ctx {")
+        cb = cb.add_block()
+        cb.add_line("const uint8_t *buf;")
+        cb.add_line("size_t len;")
+        cb.add_line("size_t cursor;")
+        cb.add_line("const char *error;")
+        cb.add_line("void **allocations;")
+        cb.add_line("size_t allocations_count;")
+        cb.add_line("size_t allocations_capacity;")
+        cb = cb.end_block()
+        cb.add_line("} parseed_ctx;")
+        cb.add_empty_line()
+        cb.add_line("typedef struct parseed_bytes {")
+        cb = cb.add_block()
+        cb.add_line("const uint8_t *data;")
+        cb.add_line("size_t length;")
+        cb = cb.end_block()
+        cb.add_line("} parseed_bytes;")
+        cb.add_empty_line()
+        cb.add_line("typedef struct parseed_int128 {")
+        cb = cb.add_block()
+        cb.add_line("uint8_t bytes[16]; /* big-endian */")
+        cb = cb.end_block()
+        cb.add_line("} parseed_int128;")
+        cb.add_empty_line()
+
+        cb.add_line("void parseed_init(parseed_ctx *ctx, const uint8_t *buf, size_t len, size_t cursor) {")
+        cb = cb.add_block()
+        cb.add_line("memset(ctx, 0, sizeof(*ctx));")
+        cb.add_line("ctx->buf = buf;")
+        cb.add_line("ctx->len = len;")
+        cb.add_line("ctx->cursor = cursor > len ? len : cursor;")
+        cb = cb.end_block()
+        cb.add_line("}")
+        cb.add_empty_line()
+
+        cb.add_line("void parseed_free(parseed_ctx *ctx) {")
+        cb = cb.add_block()
+        cb.add_line("for (size_t i = 0; i < ctx->allocations_count; i++) {")
+        cb = cb.add_block()
+        cb.add_line("free(ctx->allocations[i]);")
+        cb = cb.end_block()
+        cb.add_line("}")
+        cb.add_line("free(ctx->allocations);")
+        cb.add_line("ctx->allocations = NULL;")
+        cb.add_line("ctx->allocations_count = ctx->allocations_capacity = 0;")
+        cb = cb.end_block()
+        cb.add_line("}")
+        cb.add_empty_line()
+
+        # every allocation is kept in the context, so everything is freed at once by parseed_free
+        cb.add_line("static inline void *parseed_alloc(parseed_ctx *ctx, size_t size) {")
+        cb = cb.add_block()
+        cb.add_line("if (ctx->allocations_count == ctx->allocations_capacity) {")
+        cb = cb.add_block()
+        cb.add_line("size_t capacity = ctx->allocations_capacity == 0 ? 16 : ctx->allocations_capacity * 2;")
+        cb.add_line("void **allocations = realloc(ctx->allocations, capacity * sizeof(void *));")
+        cb.add_line("if (allocations == NULL) {")
+        cb = cb.add_block()
+        cb.add_line("ctx->error = \"out of memory\";")
+        cb.add_line("return NULL;")
+        cb = cb.end_block()
+        cb.add_line("}")
+        cb.add_line("ctx->allocations = allocations;")
+        cb.add_line("ctx->allocations_capacity = capacity;")
+        cb = cb.end_block()
+        cb.add_line("}")
+        cb.add_line("void *res = calloc(1, size == 0 ? 1 : size);")
+        cb.add_line("if (res == NULL) {")
+        cb = cb.add_block()
+        cb.add_line("ctx->error = \"out of memory\";")
+        cb.add_line("return NULL;")
+        cb = cb.end_block()
+        cb.add_line("}")
+        cb.add_line("ctx->allocations[ctx->allocations_count++] = res;")
+        cb.add_line("return res;")
+        cb = cb.end_block()
+        cb.add_line("}")
+        cb.add_empty_line()
+
+        # lists without a known length double their capacity when full
+        cb.add_line("static inline void *parseed_grow(parseed_ctx *ctx, void *items, size_t *capacity, size_t item_size) {")
+        cb = cb.add_block()
+        cb.add_line("size_t new_capacity = *capacity == 0 ? 8 : *capacity * 2;")
+        cb.add_line("void *res = parseed_alloc(ctx, new_capacity * item_size);")
+        cb.add_line("if (res != NULL && *capacity > 0) {")
+        cb = cb.add_block()
+        cb.add_line("memcpy(res, items, *capacity * item_size);")
+        cb = cb.end_block()
+        cb.add_line("}")
+        cb.add_line("*capacity = new_capacity;")
+        cb.add_line("return res;")
+        cb = cb.end_block()
+        cb.add_line("}")
+        cb.add_empty_line()
+
+        cb.add_line("static inline int parseed_need(parseed_ctx *ctx, size_t size) {")
+        cb = cb.add_block()
+        cb.add_line("if (ctx->len - ctx->cursor < size) {")
+        cb = cb.add_block()
+        cb.add_line("ctx->error = \"unexpected end of buffer\";")
+        cb.add_line("return -1;")
+        cb = cb.end_block()
+        cb.add_line("}")
+        cb.add_line("return 0;")
+        cb = cb.end_block()
+        cb.add_line("}")
+        cb.add_empty_line()
+
+        cb.add_line("static inline int parseed_read_int(parseed_ctx *ctx, size_t size, int little, int is_signed, uint64_t *value) {")
+        cb = cb.add_block()
+        cb.add_line("if (parseed_need(ctx, size) != 0) {")
+        cb = cb.add_block()
+        cb.add_line("return -1;")
+        cb = cb.end_block()
+        cb.add_line("}")
+        cb.add_line("const uint8_t *data = ctx->buf + ctx->cursor;")
+        cb.add_line("uint64_t res = 0;")
+        cb.add_line("for (size_t i = 0; i < size; i++) {")
+        cb = cb.add_block()
+        cb.add_line("res |= (uint64_t)data[little ? i : size - 1 - i] << (8 * i);")
+        cb = cb.end_block()
+        cb.add_line("}")
+        cb.add_line("if (is_signed && size < 8 && (res >> (8 * size - 1)) & 1) {")
+        cb = cb.add_block()
+        cb.add_line("res |= ~(uint64_t)0 << (8 * size);")
+        cb = cb.end_block()
+        cb.add_line("}")
+        cb.add_line("ctx->cursor += size;")
+        cb.add_line("*value = res;")
+        cb.add_line("return 0;")
+        cb = cb.end_block()
+        cb.add_line("}")
+        cb.add_empty_line()
+
+        cb.add_line("static inline int parseed_read_int128(parseed_ctx *ctx, int little, parseed_int128 *value) {")
+        cb = cb.add_block()
+        cb.add_line("if (parseed_need(ctx, 16) != 0) {")
+        cb = cb.add_block()
+        cb.add_line("return -1;")
+        cb = cb.end_block()
+        cb.add_line("}")
+        cb.add_line("for (size_t i = 0; i < 16; i++) {")
+        cb = cb.add_block()
+        cb.add_line("value->bytes[i] = ctx->buf[ctx->cursor + (little ? 15 - i : i)];")
+        cb = cb.end_block()
+        cb.add_line("}")
+        cb.add_line("ctx->cursor += 16;")
+        cb.add_line("return 0;")
+        cb = cb.end_block()
+        cb.add_line("}")
+        cb.add_empty_line()
+
+        cb.add_line("static inline int parseed_read_float(parseed_ctx *ctx, int little, float *value) {")
+        cb = cb.add_block()
+        cb.add_line("uint64_t bits;")
+        cb.add_line("if (parseed_read_int(ctx, 4, little, 0, &bits) != 0) {")
+        cb = cb.add_block()
+        cb.add_line("return -1;")
+        cb = cb.end_block()
+        cb.add_line("}")
+        cb.add_line("uint32_t bits32 = (uint32_t)bits;")
+        cb.add_line("memcpy(value, &bits32, 4);")
+        cb.add_line("return 0;")
+        cb = cb.end_block()
+        cb.add_line("}")
+        cb.add_empty_line()
+
+        cb.add_line("static inline int parseed_read_double(parseed_ctx *ctx, int little, double *value) {")
+        cb = cb.add_block()
+        cb.add_line("uint64_t bits;")
+        cb.add_line("if (parseed_read_int(ctx, 8, little, 0, &bits) != 0) {")
+        cb = cb.add_block()
+        cb.add_line("return -1;")
+        cb = cb.end_block()
+        cb.add_line("}")
+        cb.add_line("memcpy(value, &bits, 8);")
+        cb.add_line("return 0;")
+        cb = cb.end_block()
+        cb.add_line("}")
+        cb.add_empty_line()
+
+        cb.add_line("static inline int parseed_read_until(parseed_ctx *ctx, const uint8_t *delimiter, size_t length, parseed_bytes *value) {")
+        cb = cb.add_block()
+        cb.add_line("const uint8_t *start = ctx->buf + ctx->cursor;")
+        cb.add_line("size_t remaining = ctx->len - ctx->cursor;")
+        cb.add_line("for (size_t i = 0; length <= remaining && i <= remaining - length; i++) {")
+        cb = cb.add_block()
+        cb.add_line("if (length == 0 || (start[i] == delimiter[0] && memcmp(start + i, delimiter, length) == 0)) {")
+        cb = cb.add_block()
+        cb.add_line("value->data = start;")
+        cb.add_line("value->length = i;")
+        cb.add_line("ctx->cursor += i + length;")
+        cb.add_line("return 0;")
+        cb = cb.end_block()
+        cb.add_line("}")
+        cb.add_line("const uint8_t *next = length > 0 ? memchr(start + i + 1, delimiter[0], remaining - i - 1) : NULL;")
+        cb.add_line("if (next == NULL) {")
+        cb = cb.add_block()
+        cb.add_line("break;")
+        cb = cb.end_block()
+        cb.add_line("}")
+        cb.add_line("i = (size_t)(next - start) - 1;")
+        cb = cb.end_block()
+        cb.add_line("}")
+        cb.add_line("ctx->error = \"delimiter not found\";")
+        cb.add_line("return -1;")
+        cb = cb.end_block()
+        cb.add_line("}")
+        cb.add_empty_line()
+
+        cb.add_line("#define PARSEED_TRY(call) do { if ((call) != 0) return -1; } while (0)")
+        cb.add_line("#define PARSEED_READ_INT(target, type, size, little, is_signed) do { uint64_t value_; \\")
+        cb.add_line("    PARSEED_TRY(parseed_read_int(ctx, size, little, is_signed, &value_)); (target) = (type)value_; } while (0)")
+
+    def add_ctypes_helpers(self, cb: CodeBlock):
+        """
+        Add the Python code compiling the C code into a shared library (cached by the hash of the code) and loading it,
+        and the helpers converting the parsed values.
+        The compiler is the one in the CC environment variable ('cc' by default), and the library is kept
+        in the directory given by the PARSEED_BUILD_DIR environment variable (a directory in the temporary directory by default).
+        """
+        cb.add_line("def _load():")
+        cb = cb.add_block()
+        cb.add_line("directory = os.environ.get(\"PARSEED_BUILD_DIR\", os.path.join(tempfile.gettempdir(), \"parseed\"))")
+        cb.add_line("path = os.path.join(directory, \"parseed_\" + hashlib.sha256(SOURCE.encode()).hexdigest()[:16] + \".so\")")
+        cb.add_line("if not os.path.exists(path):")
+        cb = cb.add_block()
+        cb.add_line("os.makedirs(directory, exist_ok=True)")
+        cb.add_line("tmp_path = f\"{path}.{os.getpid()}\"")  # other processes can compile the same code at the same time
+        cb.add_line("with open(tmp_path + \".c\", \"w\") as f:")
+        cb = cb.add_block()
+        cb.add_line("f.write(SOURCE)")
+        cb = cb.end_block()
+        cb.add_line("try:")
+        cb = cb.add_block()
+        cb.add_line("subprocess.run([os.environ.get(\"CC\", \"cc\"), \"-O2\", \"-shared\", \"-fPIC\", \"-o\", tmp_path, tmp_path + \".c\"],")
+        cb.add_line("               check=True, capture_output=True, text=True)")
+        cb = cb.end_block()
+        cb.add_line("except subprocess.CalledProcessError as e:")
+        cb = cb.add_block()
+        cb.add_line("raise ImportError(f\"cannot compile the parser: {e.stderr}\")")
+        cb = cb.end_block()
+        cb.add_line("finally:")
+        cb = cb.add_block()
+        cb.add_line("os.remove(tmp_path + \".c\")")
+        cb = cb.end_block()
+        cb.add_line("os.replace(tmp_path, path)")
+        cb = cb.end_block()
+        cb.add_line("return ctypes.CDLL(path)")
+        cb = cb.end_block()
+        cb.add_empty_line()
+        cb.add_line("_lib = _load()")
+        cb.add_empty_line()
+
+        cb.add_line("class _Bytes(ctypes.Structure):")
+        cb = cb.add_block()
+        cb.add_line("_fields_ = [(\"data\", ctypes.POINTER(ctypes.c_uint8)), (\"length\", ctypes.c_size_t)]")
+        cb = cb.end_block()
+        cb.add_empty_line()
+        cb.add_line("class _Int128(ctypes.Structure):")
+        cb = cb.add_block()
+        cb.add_line("_fields_ = [(\"bytes\", ctypes.c_uint8 * 16)]")
+        cb = cb.end_block()
+        cb.add_empty_line()
+        cb.add_line("class _Context(ctypes.Structure):")
+        cb = cb.add_block()
+        cb.add_line("_fields_ = [")
+        cb = cb.add_block()
+        cb.add_line("(\"buf\", ctypes.c_void_p), (\"len\", ctypes.c_size_t), (\"cursor\", ctypes.c_size_t), (\"error\", ctypes.c_char_p),")
+        cb.add_line("(\"allocations\", ctypes.c_void_p), (\"allocations_count\", ctypes.c_size_t), (\"allocations_capacity\", ctypes.c_size_t),")
+        cb = cb.end_block()
+        cb.add_line("]")
+        cb.add_empty_line()
+        cb.add_line("def __del__(self):")  # the lists of the parsed values are freed with their context
+        cb = cb.add_block()
+        cb.add_line("if _lib is not None:")
+        cb = cb.add_block()
+        cb.add_line("_lib.parseed_free(ctypes.byref(self))")
+        cb = cb.end_block()
+        cb = cb.end_block()
+        cb = cb.end_block()
+        cb.add_empty_line()
+        cb.add_line("_lib.parseed_init.argtypes = [ctypes.POINTER(_Context), ctypes.c_void_p, ctypes.c_size_t, ctypes.c_size_t]")
+        cb.add_line("_lib.parseed_init.restype = None")
+        cb.add_line("_lib.parseed_free.argtypes = [ctypes.POINTER(_Context)]")
+        cb.add_line("_lib.parseed_free.restype = None")
+        cb.add_empty_line()
+
+        cb.add_line("def _parse(cls, function, buf, cursor):")
+        cb = cb.add_block()
+        cb.add_line("data = buf")
+        cb.add_line("if not isinstance(buf, bytes):")
+        cb = cb.add_block()
+        cb.add_line("try:")
+        cb = cb.add_block()
+        cb.add_line("data = (ctypes.c_uint8 * len(buf)).from_buffer(buf)")
+        cb = cb.end_block()
+        cb.add_line("except TypeError:")  # read-only buffers cannot be shared with ctypes
+        cb = cb.add_block()
+        cb.add_line("data = bytes(buf)")
+        cb = cb.end_block()
+        cb = cb.end_block()
+        cb.add_line("context = _Context()")
+        cb.add_line("context.data = data")  # strings and bytes point into the buffer, it must live as long as the context
+        cb.add_line("_lib.parseed_init(ctypes.byref(context), data, len(data), cursor)")
+        cb.add_line("res = cls()")
+        cb.add_line("if function(ctypes.byref(context), ctypes.byref(res)) != 0:")
+        cb = cb.add_block()
+        cb.add_line("raise ValueError(f\"{context.error.decode()} at offset {context.cursor}\")")
+        cb = cb.end_block()
+        cb.add_line("res._context = context")
+        cb.add_line("res.cursor = context.cursor")
+        cb.add_line("return res")
+        cb = cb.end_block()
+        cb.add_empty_line()
+
+        cb.add_line("def _bind(owner, item):")  # nested structs keep the context of the struct they come from
+        cb = cb.add_block()
+        cb.add_line("item._context = owner._context")
+        cb.add_line("return item")
+        cb = cb.end_block()
+        cb.add_empty_line()
+        cb.add_line("def _bytes(value):")
+        cb = cb.add_block()
+        cb.add_line("return ctypes.string_at(value.data, value.length)")
+        cb = cb.end_block()
+        cb.add_empty_line()
+        cb.add_line("def _string(value):")
+        cb = cb.add_block()
+        cb.add_line("return ctypes.string_at(value.data, value.length).decode(\"utf-8\")")
+        cb = cb.end_block()
+        cb.add_empty_line()
+        cb.add_line("def _int128(value, signed):")
+        cb = cb.add_block()
+        cb.add_line("return int.from_bytes(bytes(value.bytes), \"big\", signed=signed)")
+        cb = cb.end_block()
+        cb.add_empty_line()
+        cb.add_line("def _absent(name):")
+        cb = cb.add_block()
+        cb.add_line("raise AttributeError(f\"member {name!r} was not parsed\")")
+        cb = cb.end_block()
+
+    def c_name(self, name: str) -> str:
+        """
+        Return the name of a member in C, with a trailing '_' if it is a C keyword.
+        """
+        return name + "_" if name in self.C_KEYWORDS else name
+
+    def get_fields(self, struct: StructDefNode) -> List[Tuple[str, str, str, str]]:
+        """
+        Return the fields of the C struct of a struct, as their C type and name, and their ctypes name and type.
+        """
+        fields: List[Tuple[str, str, str, str]] = []
+        match_index: int = 0
+        for member in struct.members:
+            if isinstance(member, MatchNode):
+                if member.member_name is not None:
+                    field: str = self.c_name(member.member_name)
+                    fields.append(("int32_t", f"{field}__case", f"_{field}__case", "ctypes.c_int32"))
+                    for index, infos in enumerate(member.cases.values()):
+                        fields += self.get_infos_fields(infos, f"{field}__{index}")
+                else:
+                    fields.append(("int32_t", f"match__{match_index}", f"_match__{match_index}", "ctypes.c_int32"))
+                    for index, members in enumerate(member.cases.values()):
+                        for member_match in members:
+                            fields += self.get_infos_fields(member_match.infos, f"{self.c_name(member_match.name)}__{index}")
+                    match_index += 1
+            elif isinstance(member.infos.type, TernaryDataTypeNode):
+                field: str = self.c_name(member.name)
+                fields.append(("uint8_t", f"{field}__case", f"_{field}__case", "ctypes.c_uint8"))
+                fields += self.get_infos_fields(member.infos.type.if_true, f"{field}__0")
+                fields += self.get_infos_fields(member.infos.type.if_false, f"{field}__1")
+            else:
+                fields += self.get_infos_fields(member.infos, self.c_name(member.name), member.name)
+        return fields
+
+    def get_infos_fields(self, infos: StructMemberInfoNode, field: str, name: Optional[str] = None) -> List[Tuple[str, str, str, str]]:
+        """
+        Return the fields of the C struct needed by a member.
+        'name' is the name of the member if it is not a variant (one of the possible types of a ternary operator or a match).
+        A nested struct is embedded unless it is a variant, as it could be the struct itself.
+        Numbers that are not variants keep their name in ctypes, other fields are prefixed with '_'
+        as their value is converted by a property.
+        """
+        c_type: str = self.get_element_c_type(infos)
+        ctypes_type: str = self.get_element_ctypes_type(infos)
+        if infos.is_list:
+            return [(f"{c_type} *", field, f"_{field}", f"ctypes.POINTER({ctypes_type})"),
+                    ("size_t", f"{field}_count", f"_{field}_count", "ctypes.c_size_t")]
+        elif self.is_member_type_struct(infos.type) and name is None:
+            return [(f"{c_type} *", field, f"_{field}", f"ctypes.POINTER({ctypes_type})")]
+        elif name is not None and self.is_number(infos):
+            return [(c_type, field, name, ctypes_type)]
+        return [(c_type, field, f"_{field}", ctypes_type)]
+
+    def get_properties(self, struct: StructDefNode) -> List[Tuple[str, str]]:
+        """
+        Return the properties of the ctypes class of a struct converting its fields to Python values,
+        as their name and the expression of their value.
+        """
+        properties: List[Tuple[str, str]] = []
+        match_index: int = 0
+        for member in struct.members:
+            if isinstance(member, MatchNode):
+                if member.member_name is not None:
+                    field: str = self.c_name(member.member_name)
+                    getter: str = "None"
+                    for index in reversed(range(len(member.cases))):
+                        infos: StructMemberInfoNode = list(member.cases.values())[index]
+                        getter = f"{self.get_value_getter(infos, f'{field}__{index}', True)} if self._{field}__case == {index} else {getter}"
+                    properties.append((member.member_name, getter))
+                else:
+                    names: List[str] = []
+                    for members in member.cases.values():
+                        names += [member_match.name for member_match in members if member_match.name not in names]
+                    for name in names:
+                        getter: str = f"_absent(\"{name}\")"
+                        for index in reversed(range(len(member.cases))):
+                            for member_match in list(member.cases.values())[index]:
+                                if member_match.name == name:
+                                    field: str = f"{self.c_name(name)}__{index}"
+                                    getter = f"{self.get_value_getter(member_match.infos, field, True)} if self._match__{match_index} == {index} else {getter}"
+                        properties.append((name, getter))
+                    match_index += 1
+            elif isinstance(member.infos.type, TernaryDataTypeNode):
+                field: str = self.c_name(member.name)
+                properties.append((member.name, f"{self.get_value_getter(member.infos.type.if_true, f'{field}__0', True)} if self._{field}__case == 0 "
+                                                f"else {self.get_value_getter(member.infos.type.if_false, f'{field}__1', True)}"))
+            elif member.infos.is_list or not self.is_number(member.infos):
+                properties.append((member.name, self.get_value_getter(member.infos, self.c_name(member.name), False)))
+        return properties
+
+    def get_value_getter(self, infos: StructMemberInfoNode, field: str, variant: bool) -> str:
+        """
+        Return the expression converting the ctypes field of a member to its Python value.
+        """
+        if infos.is_list:
+            items: str = f"self._{field}[:self._{field}_count]"
+            if self.is_number(infos):
+                return items
+            return f"[{self.get_item_getter(infos, 'item')} for item in {items}]"
+        elif self.is_member_type_struct(infos.type) and variant:
+            return f"_bind(self, self._{field}.contents)"
+        return self.get_item_getter(infos, f"self._{field}")
+
+    def get_item_getter(self, infos: StructMemberInfoNode, value: str) -> str:
+        """
+        Return the expression converting a single ctypes value (not a list) to its Python value.
+        """
+        if self.is_member_type_struct(infos.type):
+            return f"_bind(self, {value})"
+        elif infos.is_string():
+            return f"_string({value})"
+        elif infos.is_bytes():
+            return f"_bytes({value})"
+        elif infos.type in ("uint128", "int128"):
+            return f"_int128({value}, {infos.signed})"
+        return value
+
+    def is_number(self, infos: StructMemberInfoNode) -> bool:
+        """
+        Return if the type of a member is stored as a C number (128 bits integers are not).
+        """
+        return infos.is_basic_type() and infos.type in self.C_TYPES and infos.type not in ("uint128", "int128", "string", "bytes")
+
+    def get_element_c_type(self, infos: StructMemberInfoNode) -> str:
+        """
+        Return the C type of a single element of a member.
+        """
+        if self.is_member_type_struct(infos.type):
+            return infos.type
+        return self.C_TYPES[infos.type]
+
+    def get_element_ctypes_type(self, infos: StructMemberInfoNode) -> str:
+        """
+        Return the ctypes type of a single element of a member.
+        """
+        if self.is_member_type_struct(infos.type):
+            return infos.type
+        return self.CTYPES_TYPES[infos.type]
+
+    def add_match_read(self, cb: CodeBlock, match: MatchNode, match_index: int):
+        """
+        Add the code reading a match, setting the index of the case read (-1 if none matched).
+        """
+        case_field: str = f"out->{self.c_name(match.member_name)}__case" if match.member_name is not None else f"out->match__{match_index}"
+        for index, (case, value) in enumerate(match.cases.items()):
+            cb.add_line(("if" if index == 0 else "} else if") + f" ({self.expression_as_c(match.condition)} == {self.expression_as_c(case)}) {{")
+            cb = cb.add_block()
+            cb.add_line(f"{case_field} = {index};")
+            if match.member_name is not None:
+                self.add_member_read(cb, f"out->{self.c_name(match.member_name)}__{index}", value, value.endian, True)
+            else:
+                for member_match in value:
+                    self.add_member_read(cb, f"out->{self.c_name(member_match.name)}__{index}", member_match.infos, member_match.infos.endian, True)
+            cb = cb.end_block()
+        if len(match.cases) > 0:
+            cb.add_line("} else {")
+            cb = cb.add_block()
+        cb.add_line(f"{case_field} = -1;")
+        if len(match.cases) > 0:
+            cb = cb.end_block()
+            cb.add_line("}")
+
+    def add_member_read(self, cb: CodeBlock, target: str, infos: StructMemberInfoNode, endian: Union[Endian, TernaryEndianNode], variant: bool = False):
+        """
+        Add the code reading a member into the field 'target'.
+        """
+        if not infos.is_list:
+            self.add_value_read(cb, target, infos, endian, variant)
+            return
+
+        self.locals_count += 1
+        index: int = self.locals_count
+        c_type: str = self.get_element_c_type(infos)
+        cb.add_line("{")
+        cb = cb.add_block()
+        if infos.list_length is not None and not isinstance(infos.list_length, ComparisonNode):
+            cb.add_line(f"size_t count_{index} = (size_t)({self.expression_as_c(infos.list_length)});")
+            element_size: Optional[int] = self.get_struct_size(infos.type) if self.is_member_type_struct(infos.type) else \
+                (infos.size if self.is_number(infos) or infos.type in ("uint128", "int128") else None)
+            if element_size:  # a length read from the data must not make us allocate more than the buffer could contain
+                cb.add_line(f"if (count_{index} > (ctx->len - ctx->cursor) / {element_size}) {{")
+                cb = cb.add_block()
+                cb.add_line("ctx->error = \"unexpected end of buffer\";")
+                cb.add_line("return -1;")
+                cb = cb.end_block()
+                cb.add_line("}")
+            cb.add_line(f"{target} = parseed_alloc(ctx, count_{index} * sizeof({c_type}));")
+            cb.add_line(f"if ({target} == NULL) {{")
+            cb = cb.add_block()
+            cb.add_line("return -1;")
+            cb = cb.end_block()
+            cb.add_line("}")
+            cb.add_line(f"{target}_count = count_{index};")
+            cb.add_line(f"for (size_t i_{index} = 0; i_{index} < count_{index}; i_{index}++) {{")
+            cb = cb.add_block()
+            self.add_value_read(cb, f"{target}[i_{index}]", infos, endian)
+            cb = cb.end_block()
+            cb.add_line("}")
+        else:
+            cb.add_line(f"size_t capacity_{index} = 0;")
+            if infos.list_length is None:  # no length given, read until the end of the buffer
+                cb.add_line("while (ctx->cursor < ctx->len) {")
+            else:  # repeat while the comparison is true
+                cb.add_line(f"while ({self.comparison_as_c(infos.list_length)}) {{")
+            cb = cb.add_block()
+            cb.add_line(f"if ({target}_count == capacity_{index}) {{")
+            cb = cb.add_block()
+            cb.add_line(f"{target} = parseed_grow(ctx, {target}, &capacity_{index}, sizeof({c_type}));")
+            cb.add_line(f"if ({target} == NULL) {{")
+            cb = cb.add_block()
+            cb.add_line("return -1;")
+            cb = cb.end_block()
+            cb.add_line("}")
+            cb = cb.end_block()
+            cb.add_line("}")
+            self.add_value_read(cb, f"{target}[{target}_count]", infos, endian)
+            cb.add_line(f"{target}_count++;")
+            cb = cb.end_block()
+            cb.add_line("}")
+        cb = cb.end_block()
+        cb.add_line("}")
+
+    def add_value_read(self, cb: CodeBlock, target: str, infos: StructMemberInfoNode, endian: Union[Endian, TernaryEndianNode], variant: bool = False):
+        """
+        Add the code reading a single value (not a list) into 'target'.
+        A nested struct that is a variant is allocated, as 'target' is then a pointer.
+        """
+        if self.is_member_type_struct(infos.type):
+            if variant:
+                cb.add_line(f"{target} = parseed_alloc(ctx, sizeof({infos.type}));")
+                cb.add_line(f"PARSEED_TRY({target} == NULL ? -1 : {infos.type}_parse(ctx, {target}));")
+            else:
+                cb.add_line(f"PARSEED_TRY({infos.type}_parse(ctx, &{target}));")
+        elif infos.is_string() or infos.is_bytes():
+            cb.add_line(f"PARSEED_TRY(parseed_read_until(ctx, {self.delimiter_as_c(infos)}, &{target}));")
+        elif infos.type in ("uint128", "int128"):
+            cb.add_line(f"PARSEED_TRY(parseed_read_int128(ctx, {self.little_as_c(endian)}, &{target}));")
+        elif infos.is_float():
+            cb.add_line(f"PARSEED_TRY(parseed_read_float(ctx, {self.little_as_c(endian)}, &{target}));")
+        elif infos.is_double():
+            cb.add_line(f"PARSEED_TRY(parseed_read_double(ctx, {self.little_as_c(endian)}, &{target}));")
+        else:
+            cb.add_line(f"PARSEED_READ_INT({target}, {self.C_TYPES[infos.type]}, {infos.size}, {self.little_as_c(endian)}, {int(infos.signed)});")
+
+    def little_as_c(self, endian: Union[Endian, TernaryEndianNode]) -> str:
+        """
+        Return the C expression that is 1 if the endianness is little, 0 if it is big.
+        """
+        if isinstance(endian, TernaryEndianNode):
+            return f"({self.comparison_as_c(endian.comparison)} ? {self.little_as_c(endian.if_true)} : {self.little_as_c(endian.if_false)})"
+        return "1" if endian == Endian.LITTLE else "0"
+
+    def delimiter_as_c(self, infos: StructMemberInfoNode) -> str:
+        """
+        Return the C expressions of the delimiter of a string or a bytes and of its length, separated by a comma.
+        """
+        if isinstance(infos.delimiter, IdentifierAccessNode):
+            value: str = self.expression_as_c(infos.delimiter)
+            return f"{value}.data, {value}.length"
+        elif isinstance(infos.delimiter, IntNumberNode):
+            delimiter: bytes = infos.delimiter.value.to_bytes(max(1, ceil(infos.delimiter.value.bit_length() / 8)), byteorder="big")
+        else:  # delimiter is either a StringNode or a CharNode
+            delimiter: bytes = literal_eval(f"b\"{infos.delimiter.value}\"")
+        return "(const uint8_t *)\"" + "".join([f"\\x{byte:02x}" for byte in delimiter]) + f"\", {len(delimiter)}"
+
+    def get_member_fields(self, name: str) -> List[Tuple[Optional[str], str, StructMemberInfoNode]]:
+        """
+        Return where the value of a member of the struct being generated can be, as the C condition
+        for the value to be in this field (None if it always is), the C expression of the field and the member's type.
+        """
+        match_index: int = 0
+        res: List[Tuple[Optional[str], str, StructMemberInfoNode]] = []
+        for member in self.struct.members:
+            if isinstance(member, MatchNode):
+                for index, (case, value) in enumerate(member.cases.items()):
+                    if member.member_name == name:
+                        res.append((f"out->{self.c_name(name)}__case == {index}", f"out->{self.c_name(name)}__{index}", value))
+                    elif member.member_name is None:
+                        res += [(f"out->match__{match_index} == {index}", f"out->{self.c_name(name)}__{index}", member_match.infos)
+                                for member_match in value if member_match.name == name]
+                match_index += member.member_name is None
+            elif member.name == name and isinstance(member.infos.type, TernaryDataTypeNode):
+                res.append((f"out->{self.c_name(name)}__case == 0", f"out->{self.c_name(name)}__0", member.infos.type.if_true))
+                res.append((f"out->{self.c_name(name)}__case == 1", f"out->{self.c_name(name)}__1", member.infos.type.if_false))
+            elif member.name == name:
+                res.append((None, f"out->{self.c_name(name)}", member.infos))
+        return res
+
+    def expression_as_c(self, node: ASTNode) -> str:
+        """
+        Return the C expression of an expression, its identifiers are members of the struct being generated.
+        """
+        if isinstance(node, (IntNumberNode, FloatNumberNode)):
+            return str(node.value)
+        elif isinstance(node, CharNode):
+            return f"'{node.value}'"
+        elif isinstance(node, IdentifierAccessNode):
+            names: List[str] = node.name.split(".")
+            fields: List[Tuple[Optional[str], str, StructMemberInfoNode]] = self.get_member_fields(names[0])
+            path: str = ".".join([self.c_name(name) for name in names[1:]])
+            res: str = "0"  # value of a member that was not read
+            for condition, field, infos in reversed(fields):
+                value: str = field
+                if path != "":
+                    # a nested struct is pointed to when it is a variant
+                    value += ("->" if condition is not None else ".") + path
+                res = value if condition is None else f"({condition} ? {value} : {res})"
+            return res
+        elif isinstance(node, UnaryOpNode):
+            return f"({self.math_op_as_c(node.op)}{self.expression_as_c(node.value)})"
+        elif isinstance(node, BinOpNode):
+            return f"({self.expression_as_c(node.left_node)} {self.math_op_as_c(node.op)} {self.expression_as_c(node.right_node)})"
+        elif isinstance(node, ComparisonNode):
+            return self.comparison_as_c(node)
+        return str(node.value)
+
+    def comparison_as_c(self, comp: ComparisonNode) -> str:
+        return f"({self.expression_as_c(comp.left_node)} {self.comparison_op_as_c(comp.comparison_op)} {self.expression_as_c(comp.right_node)})"
+
+    def comparison_op_as_c(self, op: ComparisonOperatorNode) -> str:
+        return {
+            ComparisonOperatorNode.AND: "&&",
+            ComparisonOperatorNode.OR: "||",
+            ComparisonOperatorNode.EQUAL: "==",
+            ComparisonOperatorNode.NOT_EQUAL: "!=",
+            ComparisonOperatorNode.GREATER_OR_EQUAL: ">=",
+            ComparisonOperatorNode.GREATER_THAN: ">",
+            ComparisonOperatorNode.LESS_OR_EQUAL: "<=",
+            ComparisonOperatorNode.LESS_THAN: "<",
+        }[op.type]
+
+    def math_op_as_c(self, op: MathOperatorNode) -> str:
+        return {
+            MathOperatorNode.ADD: "+",
+            MathOperatorNode.SUBTRACT: "-",
+            MathOperatorNode.DIVIDE: "/",
+            MathOperatorNode.MULTIPLY: "*",
+            MathOperatorNode.AND: "&",
+            MathOperatorNode.OR: "|",
+            MathOperatorNode.XOR: "^",
+            MathOperatorNode.NOT: "~",
+            MathOperatorNode.LEFT_SHIFT: "<<",
+            MathOperatorNode.RIGHT_SHIFT: ">>",
+        }[op.type]
@@ -2,179 +2,1046 @@
 from transpiler import *
 from ast_nodes import *
 from math import ceil
+from keyword import iskeyword
+from ast import literal_eval
+
+class MembersRun:
+    """
+    Consecutive fixed-size members read at once with a precompiled struct.Struct.
+    """
+    def __init__(self, name: str, members: List[StructMemberDeclareNode], endian: Union[Endian, str]):
+        self.name: str = name
+        self.members: List[StructMemberDeclareNode] = members
+        self.format: str = "<" if endian == Endian.LITTLE else ">"
+        self.size: int = 0
+        for member in members:
+            count: int = member.infos.list_length.value if member.infos.is_list else 1
+            self.format += (str(count) if count != 1 else "") + Python_Class.STRUCT_FORMATS[member.infos.type]
+            self.size += count * member.infos.size
+
 
 class Python_Class(ParseedOutputGenerator):
 
     PYGMENT_HIGHLIGHTER = "Python"
+    FILE_EXTENSION = ".py"
+
+    # format characters of the struct module for the data-types it can read natively
+    STRUCT_FORMATS = {
+        "uint8": "B", "int8": "b",
+        "uint16": "H", "int16": "h",
+        "uint32": "I", "int32": "i",
+        "uint64": "Q", "int64": "q",
+        "float": "f", "double": "d",
+    }
+    # endianness of one byte members, they can be part of a run of any endianness
+    ANY_ENDIAN = "ANY"
+
+    # NumPy types of the data-types it can represent, without the byte order character
+    NUMPY_TYPES = {
+        "uint8": "u1", "int8": "i1",
+        "uint16": "u2", "int16": "i2",
+        "uint32": "u4", "int32": "i4",
+        "uint64": "u8", "int64": "i8",
+        "float": "f4", "double": "f8",
+    }
+
+    OPTIONS = {
+        "lazy": "Decode each member on its first access instead of in the constructor.",
+        "numpy": "Add NumPy structured dtypes to fixed-layout structs and decode lists with numpy.frombuffer.",
+    }
 
     def generate(self, writer: Writer):
         cb = writer.add_block()
         cb.add_line("#!/usr/bin/env python3")
-        cb.add_line("import struct")
+        cb.add_line("import io, mmap, re, struct, sys")
+        cb.add_line("from array import array")
+        cb.add_line("from operator import itemgetter")
+        if "numpy" in self.options:
+            cb.add_line("import numpy")
         cb.add_empty_line()
+        self.add_helpers(cb)
+
+        # precompiled struct.Struct used to read runs of fixed-size members at once, filled by add_struct
+        self.compiled_runs: Dict[str, str] = {}
+
+        # one root block per struct, so a streaming writer does not keep them all in memory
         for struct in self.structs:
+            cb = writer.add_block()
             self.add_struct(struct, cb)
             cb.add_empty_line()
             self.generate_str(struct, cb.add_block())
+
+        # the structs are only used when parsing, after the module is loaded, so they can be defined after the classes
+        cb = writer.add_block()
+        for name, format_ in self.compiled_runs.items():
+            cb.add_line(f"{name} = struct.Struct(\"{format_}\")")
+
+        if "numpy" in self.options:
             cb.add_empty_line()
-        
+            # dtypes of nested structs must be created before the dtypes using them
+            added: List[str] = []
+            for struct in self.structs:
+                self.add_numpy_dtype(struct, cb, added)
+
         for bitfield in self.bitfields:
             # TODO
             pass
 
+    def get_numpy_dtype(self, struct: StructDefNode) -> Optional[str]:
+        """
+        Return the expression of the NumPy structured dtype of a struct, if its layout is fixed.
+        The layout is fixed if every member has a size and an endianness known before parsing,
+        and a type NumPy can represent (nested structs must have a fixed layout too).
+        """
+        fields: List[str] = []
+        for member in struct.members:
+            if not isinstance(member, StructMemberDeclareNode) or isinstance(member.infos.type, TernaryDataTypeNode):
+                return None
+            if member.infos.is_list and not isinstance(member.infos.list_length, IntNumberNode):
+                return None
+            dtype: Optional[str] = self.get_numpy_element_dtype(member.infos, member.infos.endian)
+            if dtype is None:
+                return None
+            if member.infos.is_list:
+                fields.append(f"(\"{member.name}\", {dtype}, ({member.infos.list_length.value},))")
+            else:
+                fields.append(f"(\"{member.name}\", {dtype})")
+        return "numpy.dtype([" + ", ".join(fields) + "])"
+
+    def get_numpy_element_dtype(self, infos: StructMemberInfoNode, endian: Union[Endian, TernaryEndianNode]) -> Optional[str]:
+        """
+        Return the expression of the NumPy dtype of a single element of a member, None if NumPy cannot represent it.
+        """
+        if self.is_member_type_struct(infos.type):
+            if self.get_numpy_dtype(self.get_struct_by_name(infos.type)) is None:
+                return None
+            return f"{infos.type}.DTYPE"
+        elif not isinstance(endian, Endian) or not infos.is_basic_type() or infos.type not in self.NUMPY_TYPES:
+            return None
+        return "\"" + ("<" if endian == Endian.LITTLE else ">") + self.NUMPY_TYPES[infos.type] + "\""
+
+    def add_numpy_dtype(self, struct: StructDefNode, cb: CodeBlock, added: List[str]):
+        """
+        Add the NumPy dtype of a struct as its DTYPE attribute, after the dtypes of its nested structs.
+        """
+        if struct.name in added:
+            return
+        added.append(struct.name)
+        dtype: Optional[str] = self.get_numpy_dtype(struct)
+        if dtype is None:
+            return
+        for member in struct.members:
+            if self.is_member_type_struct(member.infos.type):
+                self.add_numpy_dtype(self.get_struct_by_name(member.infos.type), cb, added)
+        cb.add_line(f"{struct.name}.DTYPE = {dtype}")
+
+    def add_numpy_array(self, struct: StructDefNode, cb: CodeBlock):
+        """
+        Add the class method decoding consecutive instances of a fixed-layout struct with one numpy.frombuffer call.
+        """
+        if self.get_numpy_dtype(struct) is None:
+            return
+        cb.add_empty_line()
+        cb.add_line("@classmethod")
+        cb.add_line("def array_from_buffer(cls, buf, count=-1, cursor=0):")
+        cb = cb.add_block()
+        cb.add_line("return numpy.frombuffer(buf, cls.DTYPE, count, cursor)")  # the array is a view on the buffer
+        cb = cb.end_block()
+
+    def add_helpers(self, cb: CodeBlock):
+        """
+        Add the functions used by generated classes to search delimiters and to read from binary file objects.
+        """
+        cb.add_line("def _read(stream, size):")
+        cb = cb.add_block()
+        cb.add_line("data = stream.read(size)")
+        cb.add_line("if len(data) != size:")
+        cb = cb.add_block()
+        cb.add_line("raise EOFError(f\"expected {size} bytes, got {len(data)}\")")
+        cb = cb.end_block()
+        cb.add_line("return data")
+        cb = cb.end_block()
+        cb.add_empty_line()
+
+        cb.add_line("def _read_until(stream, delimiter):")
+        cb = cb.add_block()
+        cb.add_line("res = bytearray()")
+        cb.add_line("while True:")
+        cb = cb.add_block()
+        cb.add_line("chunk = stream.peek(1)")  # bytes already buffered, without consuming them
+        cb.add_line("if len(chunk) == 0:")
+        cb = cb.add_block()
+        cb.add_line("raise EOFError(f\"delimiter {delimiter!r} not found\")")
+        cb = cb.end_block()
+        cb.add_line("read = len(res)")
+        cb.add_line("res += chunk")
+        cb.add_line("index = res.find(delimiter, max(0, read - len(delimiter) + 1))")  # the delimiter can start in the previous chunk
+        cb.add_line("if index != -1:")
+        cb = cb.add_block()
+        cb.add_line("stream.read(index + len(delimiter) - read)")
+        cb.add_line("return bytes(res[:index])")
+        cb = cb.end_block()
+        cb.add_line("stream.read(len(chunk))")
+        cb = cb.end_block()
+        cb = cb.end_block()
+        cb.add_empty_line()
+
+        cb.add_line("def _delimiter(value):")
+        cb = cb.add_block()
+        # a delimiter taken from a member is a number or a string, the buffers and the streams are searched with bytes
+        cb.add_line("if isinstance(value, int):")
+        cb = cb.add_block()
+        cb.add_line("return value.to_bytes(max(1, (value.bit_length() + 7) // 8), byteorder=\"big\")")
+        cb = cb.end_block()
+        cb.add_line("if isinstance(value, str):")
+        cb = cb.add_block()
+        cb.add_line("return value.encode(\"utf-8\")")
+        cb = cb.end_block()
+        cb.add_line("return value")
+        cb = cb.end_block()
+        cb.add_empty_line()
+
+        cb.add_line("def _find(buf, delimiter, cursor):")
+        cb = cb.add_block()
+        cb.add_line("try:")
+        cb = cb.add_block()
+        cb.add_line("index = buf.find(delimiter, cursor)")
+        cb = cb.end_block()
+        cb.add_line("except AttributeError:")  # memoryview has no find method, it is searched without being copied
+        cb = cb.add_block()
+        cb.add_line("match = re.compile(re.escape(delimiter)).search(buf, cursor)")
+        cb.add_line("index = -1 if match is None else match.start()")
+        cb = cb.end_block()
+        cb.add_line("if index == -1:")
+        cb = cb.add_block()
+        cb.add_line("raise ValueError(f\"delimiter {delimiter!r} not found after offset {cursor}\")")
+        cb = cb.end_block()
+        cb.add_line("return index")
+        cb = cb.end_block()
+        cb.add_empty_line()
+
+        cb.add_line("def _iter_stream(stream, read_item):")
+        cb = cb.add_block()
+        cb.add_line("while len(stream.peek(1)) > 0:")
+        cb = cb.add_block()
+        cb.add_line("yield read_item(stream)")
+        cb = cb.end_block()
+        cb = cb.end_block()
+        cb.add_empty_line()
+
+        self.add_index_helpers(cb)
+
+    def add_index_helpers(self, cb: CodeBlock):
+        """
+        Add the helpers used to index consecutive records, to access them by their number and to keep their index in a file.
+        An index is an array('Q') of the offsets where records start, saved in little-endian.
+        """
+        cb.add_line("class _Fields:")  # values of the members needed to skip a struct, instead of a full instance
+        cb = cb.add_block()
+        cb.add_line("pass")
+        cb = cb.end_block()
+        cb.add_empty_line()
+
+        cb.add_line("def _build_index(skip, buf, cursor, count):")
+        cb = cb.add_block()
+        cb.add_line("index = array(\"Q\")")
+        cb.add_line("if count is None:")
+        cb = cb.add_block()
+        cb.add_line("end = len(buf)")
+        cb.add_line("while cursor < end:")
+        cb = cb.add_block()
+        cb.add_line("index.append(cursor)")
+        cb.add_line("cursor = skip(buf, cursor)")
+        cb = cb.end_block()
+        cb = cb.end_block()
+        cb.add_line("else:")
+        cb = cb.add_block()
+        cb.add_line("for _ in range(count):")
+        cb = cb.add_block()
+        cb.add_line("index.append(cursor)")
+        cb.add_line("cursor = skip(buf, cursor)")
+        cb = cb.end_block()
+        cb = cb.end_block()
+        cb.add_line("return index")
+        cb = cb.end_block()
+        cb.add_empty_line()
+
+        cb.add_line("class _Records:")
+        cb = cb.add_block()
+        cb.add_line("__slots__ = (\"cls\", \"buf\", \"index\", )")
+        cb.add_empty_line()
+        cb.add_line("def __init__(self, cls, buf, index):")
+        cb = cb.add_block()
+        cb.add_line("self.cls = cls")
+        cb.add_line("self.buf = buf")
+        cb.add_line("self.index = index")
+        cb = cb.end_block()
+        cb.add_empty_line()
+        cb.add_line("def __len__(self):")
+        cb = cb.add_block()
+        cb.add_line("return len(self.index)")
+        cb = cb.end_block()
+        cb.add_empty_line()
+        cb.add_line("def __getitem__(self, key):")
+        cb = cb.add_block()
+        cb.add_line("if isinstance(key, slice):")
+        cb = cb.add_block()
+        cb.add_line("return _Records(self.cls, self.buf, self.index[key])")
+        cb = cb.end_block()
+        cb.add_line("return self.cls(self.buf, self.index[key])")
+        cb = cb.end_block()
+        cb = cb.end_block()
+        cb.add_empty_line()
+
+        cb.add_line("def save_index(index, path):")
+        cb = cb.add_block()
+        cb.add_line("if sys.byteorder == \"big\":")
+        cb = cb.add_block()
+        cb.add_line("index = array(\"Q\", index)")
+        cb.add_line("index.byteswap()")
+        cb = cb.end_block()
+        cb.add_line("with open(path, \"wb\") as f:")
+        cb = cb.add_block()
+        cb.add_line("index.tofile(f)")
+        cb = cb.end_block()
+        cb = cb.end_block()
+        cb.add_empty_line()
+
+        cb.add_line("def load_index(path):")
+        cb = cb.add_block()
+        cb.add_line("index = array(\"Q\")")
+        cb.add_line("with open(path, \"rb\") as f:")
+        cb = cb.add_block()
+        cb.add_line("index.frombytes(f.read())")
+        cb = cb.end_block()
+        cb.add_line("if sys.byteorder == \"big\":")
+        cb = cb.add_block()
+        cb.add_line("index.byteswap()")
+        cb = cb.end_block()
+        cb.add_line("return index")
+        cb = cb.end_block()
+
     def add_struct(self, struct: StructDefNode, cb: CodeBlock):
         cb.add_line(f"class {struct.name}:")
         cb = cb.add_block()
+        size: Optional[int] = self.get_struct_size(struct.name)
+        if size is not None:
+            cb.add_line(f"SIZE = {size}")
+            cb.add_empty_line()
+
+        units: List[Union[MembersRun, StructMemberDeclareNode, MatchNode]] = self.get_read_units(struct)
+        if "lazy" in self.options:
+            self.add_lazy_init(struct, units, cb)
+            if "numpy" in self.options:
+                self.add_numpy_array(struct, cb)
+            self.add_parse_many(struct, units, cb)
+            self.add_index(struct, units, cb)
+            self.add_from_file(cb)
+            self.add_from_stream(struct, units, cb, "_")
+            return
+
+        # no __dict__ per instance, only the attributes that can be set when parsing
+        cb.add_line("__slots__ = (" + "".join([f"\"{name}\", " for name in ["cursor"] + [self.attribute_name(name) for name in self.get_attributes_names(struct)]]) + ")")
+        cb.add_empty_line()
 
         # __init__
-        cb.add_line("def __init__(self, buf):")
+        # the buffer is never sliced to be given to nested structs, instead the absolute cursor is passed along
+        # so every struct parses in place and reports where it stopped in its 'cursor' attribute
+        cb.add_line("def __init__(self, buf, cursor=0):")
+        cb = cb.add_block()
+        for unit in units:
+            self.add_unit_read(cb, unit, "")
+        cb.add_line("self.cursor = cursor")  # end offset of this struct in the buffer
+        cb = cb.end_block()
+
+        if "numpy" in self.options:
+            self.add_numpy_array(struct, cb)
+        self.add_parse_many(struct, units, cb)
+        self.add_index(struct, units, cb)
+        self.add_from_file(cb)
+        self.add_from_stream(struct, units, cb, "")
+
+    def add_index(self, struct: StructDefNode, units: List[Union[MembersRun, StructMemberDeclareNode, MatchNode]], cb: CodeBlock):
+        """
+        Add the class methods skipping a struct without decoding it, to build an index of consecutive records,
+        and to access the records of an index by their number.
+        For each list of structs without a constant length, an 'index_<member>' class method
+        builds the index of this list's elements in a buffer containing this struct.
+        """
+        referenced: List[str] = self.get_referenced_names(struct)
+        size: Optional[int] = self.get_struct_size(struct.name)
+
+        cb.add_empty_line()
+        cb.add_line("@classmethod")
+        cb.add_line("def _skip(cls, buf, cursor=0):")
+        cb = cb.add_block()
+        if size is not None:
+            cb.add_line(f"return cursor + {size}")
+        else:
+            self.add_units_skip(cb, units, referenced)
+            cb.add_line("return cursor")
+        cb = cb.end_block()
+
+        cb.add_empty_line()
+        cb.add_line("@classmethod")
+        cb.add_line("def build_index(cls, buf, cursor=0, count=None):")
+        cb = cb.add_block()
+        cb.add_line("return _build_index(cls._skip, buf, cursor, count)")
+        cb = cb.end_block()
+
+        cb.add_empty_line()
+        cb.add_line("@classmethod")
+        cb.add_line("def from_index(cls, buf, index):")
+        cb = cb.add_block()
+        cb.add_line("return _Records(cls, buf, index)")
+        cb = cb.end_block()
+
+        for position, unit in enumerate(units):
+            if not isinstance(unit, StructMemberDeclareNode) or not unit.infos.is_list or \
+                    not self.is_member_type_struct(unit.infos.type) or isinstance(unit.infos.list_length, IntNumberNode):
+                continue
+            cb.add_empty_line()
+            cb.add_line("@classmethod")
+            cb.add_line(f"def index_{unit.name}(cls, buf, cursor=0):")
+            cb = cb.add_block()
+            self.add_units_skip(cb, units[:position], referenced)
+            if isinstance(unit.infos.list_length, ComparisonNode):
+                cb.add_line("index = array(\"Q\")")
+                cb.add_line(f"while {self.comparison_as_str(unit.infos.list_length)}:")
+                cb = cb.add_block()
+                cb.add_line("index.append(cursor)")
+                cb.add_line(f"cursor = {unit.infos.type}._skip(buf, cursor)")
+                cb = cb.end_block()
+                cb.add_line("return index")
+            else:
+                count: str = "None" if unit.infos.list_length is None else self.expression_as_str(unit.infos.list_length)
+                cb.add_line(f"return _build_index({unit.infos.type}._skip, buf, cursor, {count})")
+            cb = cb.end_block()
+
+    def add_units_skip(self, cb: CodeBlock, units: List[Union[MembersRun, StructMemberDeclareNode, MatchNode]], referenced: List[str]):
+        """
+        Add the code moving 'cursor' after units of members.
+        Only the members used in an expression (a length, a condition or a delimiter) are decoded, in a '_Fields' object.
+        """
+        if any(name in referenced for unit in units for name in self.get_unit_attributes_names(unit)):
+            cb.add_line("self = _Fields()")
+        for unit in units:
+            if any(name in referenced for name in self.get_unit_attributes_names(unit)) or isinstance(unit, MatchNode):
+                self.add_unit_read(cb, unit, "")  # matches are decoded, as their cases can have different sizes
+            elif isinstance(unit, MembersRun):
+                cb.add_line(f"cursor += {unit.size}")
+            elif isinstance(unit.infos.type, TernaryDataTypeNode) and self.get_unit_size(unit) is None:
+                tdtn: TernaryDataTypeNode = unit.infos.type
+                cb.add_line(f"if {self.comparison_as_str(tdtn.comparison)}:")
+                cb = cb.add_block()
+                self.add_member_skip(cb, tdtn.if_true)
+                cb = cb.end_block()
+                cb.add_line("else:")
+                cb = cb.add_block()
+                self.add_member_skip(cb, tdtn.if_false)
+                cb = cb.end_block()
+            else:
+                self.add_member_skip(cb, unit.infos)
+
+    def add_member_skip(self, cb: CodeBlock, infos: StructMemberInfoNode):
+        """
+        Add the code moving 'cursor' after a member, without decoding it.
+        """
+        size: Optional[int] = self.get_infos_size(infos)
+        if size is not None:
+            cb.add_line(f"cursor += {size}")
+            return
+        if not infos.is_list:
+            self.add_value_skip(cb, infos)
+            return
+
+        element_size: Optional[int] = self.get_struct_size(infos.type) if self.is_member_type_struct(infos.type) else \
+            (infos.size if infos.is_basic_type() and not infos.is_string() and not infos.is_bytes() else None)
+        if infos.list_length is not None and not isinstance(infos.list_length, ComparisonNode) and element_size is not None:
+            cb.add_line(f"cursor += ({self.expression_as_str(infos.list_length)}) * {element_size}")
+            return
+
+        if infos.list_length is None:
+            cb.add_line("while cursor < len(buf):")
+        elif isinstance(infos.list_length, ComparisonNode):
+            cb.add_line(f"while {self.comparison_as_str(infos.list_length)}:")
+        else:
+            cb.add_line(f"for _ in range({self.expression_as_str(infos.list_length)}):")
         cb = cb.add_block()
+        if element_size is not None:
+            cb.add_line(f"cursor += {element_size}")
+        else:
+            self.add_value_skip(cb, infos)
+        cb = cb.end_block()
 
-        cb.add_line("self.cursor = 0")  # will be used when a member's type is another struct defined in the source-file
+    def add_value_skip(self, cb: CodeBlock, infos: StructMemberInfoNode):
+        """
+        Add the code moving 'cursor' after a single value (not a list) whose size is not known before parsing.
+        """
+        if self.is_member_type_struct(infos.type):
+            cb.add_line(f"cursor = {infos.type}._skip(buf, cursor)")
+        elif infos.is_string() or infos.is_bytes():
+            cb.add_line(f"cursor = _find(buf, {self.delimiter_as_str(infos)}, cursor) + {self.delimiter_length_as_str(infos)}")
+        # bitfields are not read yet, so they are not skipped either
+
+    def get_referenced_names(self, struct: StructDefNode) -> List[str]:
+        """
+        Return the names of the members of a struct used in its expressions: lengths, conditions and delimiters.
+        """
+        names: List[str] = []
         for member in struct.members:
+            nodes: List[Any] = []
             if isinstance(member, MatchNode):
-                if member.member_name is not None:  # this match-node is used to select the type of a member
-                    cb.add_line(f"self.{member.member_name} = None")
-
-                    for index, case in enumerate(member.cases.keys()):
-                        if index == 0:
-                            cb.add_line(f"if {self.expression_as_str(member.condition)} == {self.expression_as_str(case)}:")
-                        else:
-                            cb.add_line(f"elif {self.expression_as_str(member.condition)} == {self.expression_as_str(case)}:")
-                        cb = cb.add_block()
-                        cb.add_line(f"self.{member.member_name} = {self.member_read_struct(member.cases[case], member.cases[case].endian)}")
-                        cb = cb.end_block()
+                nodes.append(member.condition)
+                for case in member.cases.values():
+                    for infos in ([case] if isinstance(case, StructMemberInfoNode) else [member_match.infos for member_match in case]):
+                        nodes += self.get_infos_expressions(infos)
+            else:
+                nodes += self.get_infos_expressions(member.infos)
+            for node in nodes:
+                names += [name for name in self.get_expression_names(node) if name not in names]
+        return names
+
+    def get_infos_expressions(self, infos: StructMemberInfoNode) -> List[Any]:
+        """
+        Return the expressions used to read a member: its length, its delimiter and the conditions of its ternary operators.
+        """
+        nodes: List[Any] = []
+        if infos.is_list and infos.list_length is not None:
+            nodes.append(infos.list_length)
+        if isinstance(infos.endian, TernaryEndianNode):
+            nodes.append(infos.endian.comparison)
+        if isinstance(infos.type, TernaryDataTypeNode):
+            nodes.append(infos.type.comparison)
+            nodes += self.get_infos_expressions(infos.type.if_true) + self.get_infos_expressions(infos.type.if_false)
+        elif isinstance(infos.delimiter, IdentifierAccessNode) and infos.is_basic_type() and (infos.is_string() or infos.is_bytes()):
+            nodes.append(infos.delimiter)
+        return nodes
+
+    def get_expression_names(self, node: Any) -> List[str]:
+        """
+        Return the names of the members an expression uses (only the first name of 'a.b').
+        """
+        if isinstance(node, IdentifierAccessNode):
+            return [node.name.split(".")[0]]
+        elif isinstance(node, (BinOpNode, ComparisonNode)):
+            return self.get_expression_names(node.left_node) + self.get_expression_names(node.right_node)
+        elif isinstance(node, UnaryOpNode):
+            return self.get_expression_names(node.value)
+        return []
+
+    def add_parse_many(self, struct: StructDefNode, units: List[Union[MembersRun, StructMemberDeclareNode, MatchNode]], cb: CodeBlock):
+        """
+        Add the class method decoding consecutive instances of a fixed-size struct into columns:
+        a dict giving for each member an array.array of its values (or a list if it cannot be stored in an array).
+        It can also be used to decode a list member of this struct's type, like 'Partition_entry[4] partitions'.
+        If the struct is read by only one struct.Struct, it is reused with iter_unpack,
+        otherwise the same instance is parsed again for each record (except in lazy mode).
+        """
+        size: Optional[int] = self.get_struct_size(struct.name)
+        if size is None:
+            return
+        names: List[str] = self.get_attributes_names(struct)
+
+        cb.add_empty_line()
+        cb.add_line("@classmethod")
+        cb.add_line("def parse_many(cls, buf, count=None, cursor=0):")
+        cb = cb.add_block()
+        cb.add_line("if count is None:")  # as many records as the buffer contains
+        cb = cb.add_block()
+        cb.add_line(f"count = (len(buf) - cursor) // {size}" if size > 0 else "count = 0")
+        cb = cb.end_block()
+
+        if len(units) == 1 and isinstance(units[0], MembersRun):
+            run: MembersRun = units[0]
+            cb.add_line(f"data = memoryview(buf)[cursor:cursor + count * {size}]")
+            cb.add_line(f"if len(data) != count * {size}:")
+            cb = cb.add_block()
+            cb.add_line(f"raise struct.error(f\"{struct.name}.parse_many requires {{count * {size}}} bytes after offset {{cursor}}\")")
+            cb = cb.end_block()
+            cb.add_line(f"records = list({run.name}.iter_unpack(data))")
+            cb.add_line("return {")
+            cb = cb.add_block()
+            index: int = 0
+            for member in run.members:
+                if member.infos.is_list:
+                    count: int = member.infos.list_length.value
+                    cb.add_line(f"\"{member.name}\": [list(record[{index}:{index + count}]) for record in records],")
+                    index += count
+                else:
+                    cb.add_line(f"\"{member.name}\": array(\"{self.STRUCT_FORMATS[member.infos.type]}\", map(itemgetter({index}), records)),")
+                    index += 1
+            cb = cb.end_block()
+            cb.add_line("}")
+            cb = cb.end_block()
+            return
+
+        columns: List[str] = []
+        for name in names:
+            member: Optional[StructMemberDeclareNode] = next((m for m in struct.members if isinstance(m, StructMemberDeclareNode) and m.name == name), None)
+            if member is not None and not member.infos.is_list and member.infos.is_basic_type() and member.infos.type in self.STRUCT_FORMATS:
+                columns.append(f"\"{name}\": array(\"{self.STRUCT_FORMATS[member.infos.type]}\")")
+            else:
+                columns.append(f"\"{name}\": []")
+        cb.add_line("columns = {" + ", ".join(columns) + "}")
+        if "lazy" not in self.options:
+            cb.add_line("record = cls.__new__(cls)")
+        cb.add_line("for _ in range(count):")
+        cb = cb.add_block()
+        if "lazy" in self.options:
+            cb.add_line("record = cls(buf, cursor)")  # a lazy instance keeps the members it has decoded
+        else:
+            cb.add_line("record.__init__(buf, cursor)")
+        for name in names:
+            cb.add_line(f"columns[\"{name}\"].append(record.{self.attribute_name(name)})")
+        cb.add_line(f"cursor += {size}")
+        cb = cb.end_block()
+        cb.add_line("return columns")
+        cb = cb.end_block()
+
+    def add_from_file(self, cb: CodeBlock):
+        """
+        Add the class method parsing a struct directly from a memory-mapped file,
+        so only the pages containing the parsed members are read from the disk.
+        """
+        cb.add_empty_line()
+        cb.add_line("@classmethod")
+        cb.add_line("def from_file(cls, path):")
+        cb = cb.add_block()
+        cb.add_line("with open(path, \"rb\") as f:")
+        cb = cb.add_block()
+        cb.add_line("try:")
+        cb = cb.add_block()
+        cb.add_line("buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)")
+        cb = cb.end_block()
+        cb.add_line("except ValueError:")  # empty files cannot be mapped
+        cb = cb.add_block()
+        cb.add_line("return cls(b\"\")")
+        cb = cb.end_block()
+        cb = cb.end_block()
+        if "lazy" in self.options or "numpy" in self.options:
+            # members are read from the mapping when accessed, or NumPy arrays are views on it, it is closed with the instance
+            cb.add_line("return cls(buf)")
+        else:
+            # every member has been copied out of the mapping once parsed
+            cb.add_line("try:")
+            cb = cb.add_block()
+            cb.add_line("return cls(buf)")
+            cb = cb.end_block()
+            cb.add_line("finally:")
+            cb = cb.add_block()
+            cb.add_line("buf.close()")
+            cb = cb.end_block()
+        cb = cb.end_block()
+
+    def add_from_stream(self, struct: StructDefNode, units: List[Union[MembersRun, StructMemberDeclareNode, MatchNode]], cb: CodeBlock, prefix: str):
+        """
+        Add the class methods parsing a struct from a binary file object, reading only the bytes each member needs.
+        A struct with a fixed size is read at once and parsed from these bytes.
+        A list without a length that ends the struct is returned as an iterator reading one element at a time.
+        The 'cursor' attribute is not set on instances parsed from a file object, except for structs with a fixed size.
+        """
+        cb.add_empty_line()
+        cb.add_line("@classmethod")
+        cb.add_line("def from_stream(cls, stream):")
+        cb = cb.add_block()
+        cb.add_line("if not hasattr(stream, \"peek\"):")  # peeking is needed to find delimiters and the end of the stream
+        cb = cb.add_block()
+        cb.add_line("stream = io.BufferedReader(stream)")
+        cb = cb.end_block()
+        cb.add_line("return cls._from_stream(stream)")
+        cb = cb.end_block()
+
+        cb.add_empty_line()
+        cb.add_line("@classmethod")
+        cb.add_line("def _from_stream(cls, stream):")
+        cb = cb.add_block()
+        size: Optional[int] = self.get_struct_size(struct.name)
+        if size is not None:
+            cb.add_line(f"return cls(_read(stream, {size}))")
+            cb = cb.end_block()
+            return
+        cb.add_line("self = cls.__new__(cls)")
+        for index, unit in enumerate(units):
+            self.add_unit_read(cb, unit, prefix, stream=True, iterate=index == len(units) - 1)
+        cb.add_line("return self")
+        cb = cb.end_block()
+
+    def add_lazy_init(self, struct: StructDefNode, units: List[Union[MembersRun, StructMemberDeclareNode, MatchNode]], cb: CodeBlock):
+        """
+        Add the constructor and properties of a struct whose members are decoded on first access.
+        Each unit (a member, a match or a run of fixed-size members) is decoded by its own '_decode_<index>' method,
+        and its offset is the offset of the struct, or the end of the previous variable-length unit, plus a constant.
+        The end of a variable-length unit is only known once it has been decoded, it is then kept in '_end_<index>'.
+        """
+        sizes: List[Optional[int]] = [self.get_unit_size(unit) for unit in units]
+        variable_units: List[int] = [index for index, size in enumerate(sizes) if size is None]
+
+        slots: List[str] = ["_buf", "_offset"] + ["_" + self.attribute_name(name) for name in self.get_attributes_names(struct)] + [f"_end_{index}" for index in variable_units]
+        cb.add_line("__slots__ = (" + "".join([f"\"{name}\", " for name in slots]) + ")")
+        cb.add_empty_line()
+
+        cb.add_line("def __init__(self, buf, cursor=0):")
+        cb = cb.add_block()
+        cb.add_line("self._buf = buf")
+        cb.add_line("self._offset = cursor")
+        cb = cb.end_block()
+
+        for index, unit in enumerate(units):
+            for name in self.get_unit_attributes_names(unit):
+                cb.add_empty_line()
+                cb.add_line("@property")
+                cb.add_line(f"def {self.attribute_name(name)}(self):")
+                cb = cb.add_block()
+                cb.add_line("try:")
+                cb = cb.add_block()
+                cb.add_line(f"return self._{self.attribute_name(name)}")
+                cb = cb.end_block()
+                cb.add_line("except AttributeError:")
+                cb = cb.add_block()
+                cb.add_line(f"self._decode_{index}()")
+                cb = cb.end_block()
+                cb.add_line(f"return self._{self.attribute_name(name)}")  # members of a case that was not matched are never set
+                cb = cb.end_block()
+
+            cb.add_empty_line()
+            cb.add_line(f"def _decode_{index}(self):")
+            cb = cb.add_block()
+            cb.add_line("buf = self._buf")
+            cb.add_line(f"cursor = {self.get_lazy_offset(units, sizes, index)}")
+            self.add_unit_read(cb, unit, "_")
+            if sizes[index] is None:
+                cb.add_line(f"self._end_{index} = cursor")
+            cb = cb.end_block()
+
+            if sizes[index] is None:
+                cb.add_empty_line()
+                cb.add_line(f"def _get_end_{index}(self):")
+                cb = cb.add_block()
+                cb.add_line("try:")
+                cb = cb.add_block()
+                cb.add_line(f"return self._end_{index}")
+                cb = cb.end_block()
+                cb.add_line("except AttributeError:")
+                cb = cb.add_block()
+                cb.add_line(f"self._decode_{index}()")
+                cb.add_line(f"return self._end_{index}")
+                cb = cb.end_block()
+                cb = cb.end_block()
+
+        # end offset of this struct in the buffer
+        cb.add_empty_line()
+        cb.add_line("@property")
+        cb.add_line("def cursor(self):")
+        cb = cb.add_block()
+        cb.add_line(f"return {self.get_lazy_offset(units, sizes, len(units))}")
+        cb = cb.end_block()
+
+    def get_lazy_offset(self, units: List[Union[MembersRun, StructMemberDeclareNode, MatchNode]], sizes: List[Optional[int]], index: int) -> str:
+        """
+        Return the expression of the offset of a unit in lazy mode (the end of the struct if index is the number of units).
+        """
+        offset: int = 0
+        for previous in range(index - 1, -1, -1):
+            if sizes[previous] is None:
+                base: str = f"self._get_end_{previous}()"
+                break
+            offset += sizes[previous]
+        else:
+            base: str = "self._offset"
+        return base if offset == 0 else f"{base} + {offset}"
+
+    def get_read_units(self, struct: StructDefNode) -> List[Union[MembersRun, StructMemberDeclareNode, MatchNode]]:
+        """
+        Split the members of a struct into units that are read at once:
+        runs of fixed-size members read with a struct.Struct, match statements and other members.
+        """
+        units: List[Union[MembersRun, StructMemberDeclareNode, MatchNode]] = []
+        run: List[StructMemberDeclareNode] = []  # consecutive members that can be read with only one struct.Struct
+        run_endian: Optional[Endian] = None
+        for member in struct.members:
+            member_endian: Optional[Endian] = self.get_member_run_endian(member)
+            if member_endian is not None and (run_endian in (None, self.ANY_ENDIAN) or member_endian in (run_endian, self.ANY_ENDIAN)):
+                run.append(member)
+                if run_endian in (None, self.ANY_ENDIAN):
+                    run_endian = member_endian
+                continue
+            if len(run) > 0:
+                units.append(MembersRun(f"_{struct.name}_{len([u for u in units if isinstance(u, MembersRun)])}", run, run_endian))
+            run = [member] if member_endian is not None else []
+            run_endian = member_endian
+            if member_endian is None:
+                units.append(member)
+        if len(run) > 0:
+            units.append(MembersRun(f"_{struct.name}_{len([u for u in units if isinstance(u, MembersRun)])}", run, run_endian))
+        return units
+
+    def add_unit_read(self, cb: CodeBlock, unit: Union[MembersRun, StructMemberDeclareNode, MatchNode], prefix: str, stream: bool = False, iterate: bool = False):
+        """
+        Add the code reading a unit of members from 'buf' at 'cursor' into attributes named '<prefix><member name>'.
+        If 'stream' is True, the unit is read from the binary file object 'stream' instead,
+        and if 'iterate' is also True, a list without a length is read as an iterator.
+        """
+        if isinstance(unit, MembersRun):
+            self.add_members_run_read(cb, unit, prefix, stream)
+        elif isinstance(unit, MatchNode):
+            for index, case in enumerate(unit.cases.keys()):
+                if index == 0:
+                    cb.add_line(f"if {self.expression_as_str(unit.condition)} == {self.expression_as_str(case)}:")
+                else:
+                    cb.add_line(f"elif {self.expression_as_str(unit.condition)} == {self.expression_as_str(case)}:")
+                cb = cb.add_block()
+                if unit.member_name is not None:  # this match-node is used to select the type of a member
+                    self.add_member_read(cb, f"self.{prefix}{self.attribute_name(unit.member_name)}", unit.cases[case], unit.cases[case].endian, stream)
                 else:  # multiple members declared
-                    for index, case in enumerate(member.cases.keys()):
-                        if index == 0:
-                            cb.add_line(f"if {self.expression_as_str(member.condition)} == {self.expression_as_str(case)}:")
-                        else:
-                            cb.add_line(f"elif {self.expression_as_str(member.condition)} == {self.expression_as_str(case)}:")
-                        cb = cb.add_block()
-                        for member_match in member.cases[case]:
-                            if self.is_member_match_type_struct(member_match.infos.type):
-                                cb.add_line(f"self.{member_match.name} = {member_match.name}(buf[self.cursor:])") # pass the buffer to the class representing the type
-                                cb.add_line(f"self.cursor += self.{member_match.name}.cursor") # continue to parse the buffer after the called class has parsed
-                            else:
-                                cb.add_line(f"self.{member_match.name} = {self.member_read_struct(member_match.name, member_match.infos.endian)}")
-                        cb = cb.end_block()
-            else: # simple member
-                if isinstance(member.infos.type, TernaryDataTypeNode):
-                    tdtn: TernaryDataTypeNode = member.infos.type
-                    cb.add_line(f"if {self.comparison_as_str(tdtn.comparison)}:")
-                    cb = cb.add_block()
-                    if isinstance(tdtn.if_true, IdentifierAccessNode):
-                        cb.add_line(f"self.{member.name} = {tdtn.if_true.name}(buf[self.cursor:])") # pass the buffer to the class representing the type
-                        cb.add_line(f"self.cursor += self.{member.name}.cursor") # continue to parse the buffer after the called class has parsed
-                    else:
-                        cb.add_line(f"self.{member.name} = {self.member_read_struct(tdtn.if_true, member.infos.endian)}")
-                    cb = cb.end_block()
-                    cb.add_line(f"else:")
-                    cb = cb.add_block()
-                    if isinstance(tdtn.if_false, IdentifierAccessNode):
-                        cb.add_line(f"self.{member.name} = {tdtn.if_false.name}(buf[self.cursor:])")
-                        cb.add_line(f"self.cursor += self.{member.name}.cursor") # continue to parse the buffer after the called class has parsed
-                    else:
-                        cb.add_line(f"self.{member.name} = {self.member_read_struct(tdtn.if_false, member.infos.endian)}")
-                    cb = cb.end_block()
-                    continue
+                    for member_match in unit.cases[case]:
+                        self.add_member_read(cb, f"self.{prefix}{self.attribute_name(member_match.name)}", member_match.infos, member_match.infos.endian, stream)
+                cb = cb.end_block()
+            if unit.member_name is not None:
+                cb.add_line("else:")
+                cb = cb.add_block()
+                cb.add_line(f"self.{prefix}{self.attribute_name(unit.member_name)} = None")
+                cb = cb.end_block()
+        elif isinstance(unit.infos.type, TernaryDataTypeNode):
+            tdtn: TernaryDataTypeNode = unit.infos.type
+            # the types of a ternary operator don't have an endianness, the member's one is used
+            cb.add_line(f"if {self.comparison_as_str(tdtn.comparison)}:")
+            cb = cb.add_block()
+            self.add_member_read(cb, f"self.{prefix}{self.attribute_name(unit.name)}", tdtn.if_true, unit.infos.endian, stream)
+            cb = cb.end_block()
+            cb.add_line("else:")
+            cb = cb.add_block()
+            self.add_member_read(cb, f"self.{prefix}{self.attribute_name(unit.name)}", tdtn.if_false, unit.infos.endian, stream)
+            cb = cb.end_block()
+        else:  # simple member
+            self.add_member_read(cb, f"self.{prefix}{self.attribute_name(unit.name)}", unit.infos, unit.infos.endian, stream, iterate)
+
+    def get_attributes_names(self, struct: StructDefNode) -> List[str]:
+        """
+        Return the name of every attribute a struct's class can have, including the ones declared in match cases.
+        """
+        names: List[str] = []
+        for member in struct.members:
+            names += [name for name in self.get_unit_attributes_names(member) if name not in names]
+        return names
+
+    def get_unit_attributes_names(self, unit: Union[MembersRun, StructMemberDeclareNode, MatchNode]) -> List[str]:
+        """
+        Return the name of every attribute set when reading a unit.
+        """
+        if isinstance(unit, MembersRun):
+            return [member.name for member in unit.members]
+        elif isinstance(unit, StructMemberDeclareNode):
+            return [unit.name]
+        elif unit.member_name is not None:
+            return [unit.member_name]
+
+        names: List[str] = []
+        for case in unit.cases.values():
+            names += [member_match.name for member_match in case if member_match.name not in names]
+        return names
+
+    def get_unit_size(self, unit: Union[MembersRun, StructMemberDeclareNode, MatchNode]) -> Optional[int]:
+        """
+        Return the size in bytes of a unit if it is known before parsing, None otherwise.
+        """
+        if isinstance(unit, MembersRun):
+            return unit.size
+        return self.get_member_size(unit)
 
+    def get_member_run_endian(self, member: Union[StructMemberDeclareNode, MatchNode]) -> Optional[Endian]:
+        """
+        Return the endianness of a member that can be read with a struct.Struct as part of a run of members.
+        ANY_ENDIAN is returned for one byte members, and None if the member cannot be part of a run
+        (size or endianness not known before parsing, or type not supported by the struct module).
+        """
+        if not isinstance(member, StructMemberDeclareNode) or not isinstance(member.infos.endian, Endian):
+            return None
+        if not member.infos.is_basic_type() or member.infos.type not in self.STRUCT_FORMATS:
+            return None
+        if member.infos.is_list and not isinstance(member.infos.list_length, IntNumberNode):
+            return None
+        if member.infos.size == 1:
+            return self.ANY_ENDIAN
+        return member.infos.endian
+
+    def add_members_run_read(self, cb: CodeBlock, run: MembersRun, prefix: str, stream: bool = False):
+        """
+        Add the code reading consecutive fixed-size members with only one precompiled struct.Struct.
+        """
+        if stream:
+            unpack: str = f"{run.name}.unpack(_read(stream, {run.size}))"
+        else:
+            self.compiled_runs[run.name] = run.format  # a run can also be read when skipping its struct
+            unpack: str = f"{run.name}.unpack_from(buf, cursor)"
+
+        if len(run.members) == 1 and not run.members[0].infos.is_list:
+            cb.add_line(f"self.{prefix}{self.attribute_name(run.members[0].name)} = {unpack}[0]")
+        elif not any(member.infos.is_list for member in run.members):
+            cb.add_line(", ".join([f"self.{prefix}{self.attribute_name(member.name)}" for member in run.members]) + f" = {unpack}")
+        else:
+            cb.add_line(f"values = {unpack}")
+            index: int = 0
+            for member in run.members:
                 if member.infos.is_list:
-                    if member.infos.list_length is None: # no length given
-                        cb.add_line(f"self.{member.name} = []")
-                        # TODO: calculate remaining length of buffer
-                    else:
-                        cb.add_line(f"self.{member.name} = []")
-                        cb.add_line(f"for i in range({self.expression_as_str(member.infos.list_length)}):")
-                        cb = cb.add_block()
-                        if self.is_member_type_struct(member.infos.type):
-                            cb.add_line(f"{member.infos.type}_tmp = {member.infos.type}(buf[self.cursor:])")
-                            cb.add_line(f"self.{member.name}.append({member.infos.type}_tmp)")
-                            cb.add_line(f"self.cursor += {member.infos.type}_tmp.cursor") # continue to parse the buffer after the called class has parsed
-                        else:
-                            cb.add_line(f"self.{member.name}.append(" + self.member_read_struct(member.infos, member.infos.endian) + ")")
-                            cb.add_line(f"self.cursor += {member.infos.size}")
-                        cb = cb.end_block()
+                    count: int = member.infos.list_length.value
+                    cb.add_line(f"self.{prefix}{self.attribute_name(member.name)} = list(values[{index}:{index + count}])")
+                    index += count
                 else:
-                    if member.infos.is_string() or member.infos.is_bytes():
-                        cb.add_line(f"self.{member.name} = b\"\"")
-                        if isinstance(member.infos.delimiter, IdentifierAccessNode):
-                            cb.add_line(f"while buf[self.cursor:self.cursor+{member.infos.delimiter.name})] != {member.infos.delimiter.name}:")
-                            cb = cb.add_block()
-                            cb.add_line(f"self.{member.name} += buf[self.cursor:self.cursor+len(b\"{member.infos.delimiter}\")]")
-                            cb.add_line(f"self.cursor += len(b\"{member.infos.delimiter}\")")
-                            cb = cb.end_block()
-                        elif isinstance(member.infos.delimiter, IntNumberNode):
-                            bytes_length: int = ceil(member.infos.delimiter.value.bit_length() / 8)
-                            cb.add_line(f'while int.from_bytes(buf[self.cursor:self.cursor+{bytes_length}], byteorder="big", signed=False) != {member.infos.delimiter.value}:')
-                            cb = cb.add_block()
-                            cb.add_line(f"self.{member.name} += buf[self.cursor:self.cursor+{bytes_length}]")
-                            cb.add_line(f"self.cursor += {bytes_length}")
-                            cb = cb.end_block()
-                        else: # delimiter is either a StringNode or a CharNode
-                            cb.add_line(f"while buf[self.cursor:self.cursor+len(b\"{member.infos.delimiter.value}\")] != b\"{member.infos.delimiter.value}\":")
-                            cb = cb.add_block()
-                            cb.add_line(f"self.{member.name} += buf[self.cursor:self.cursor+1]")
-                            cb.add_line(f"self.cursor += 1")
-                            cb = cb.end_block()
-                            cb.add_line(f'self.cursor += len(b\"{member.infos.delimiter.value}\")')
-                        if member.infos.is_string():
-                            cb.add_line(f"self.{member.name} = self.{member.name}.decode(\"utf-8\")")
-                    elif self.is_member_type_struct(member.infos.type):
-                        cb.add_line(f"self.{member.name} = {member.infos.type}(buf[self.cursor:])")
-                        cb.add_line(f"self.cursor += self.{member.name}.cursor") # continue to parse the buffer after the called class has parsed
-                    else:
-                        cb.add_line(f"self.{member.name} = {self.member_read_struct(member.infos, member.infos.endian)}")
-                        cb.add_line(f"self.cursor += {member.infos.size}")
+                    cb.add_line(f"self.{prefix}{self.attribute_name(member.name)} = values[{index}]")
+                    index += 1
+        if not stream:
+            cb.add_line(f"cursor += {run.size}")
+
+    def add_member_read(self, cb: CodeBlock, target: str, infos: StructMemberInfoNode, endian: Union[Endian, TernaryEndianNode], stream: bool = False, iterate: bool = False):
+        """
+        Add the code reading a member from 'buf' at 'cursor' into 'target', and moving 'cursor' after it.
+        If 'stream' is True, the member is read from the binary file object 'stream' instead,
+        and if 'iterate' is also True, a list without a length is read as an iterator.
+        """
+        if not infos.is_list:
+            self.add_value_read(cb, target, infos, endian, stream)
+            return
+
+        if stream and iterate and infos.list_length is None:
+            if self.is_member_type_struct(infos.type):
+                cb.add_line(f"{target} = _iter_stream(stream, {infos.type}._from_stream)")
+            else:
+                cb.add_line(f"{target} = _iter_stream(stream, lambda stream: {self.member_read_struct(infos, endian, True)})")
+            return
+
+        if "numpy" in self.options and infos.list_length is not None and not isinstance(infos.list_length, ComparisonNode) and \
+                self.get_numpy_element_dtype(infos, endian) is not None:
+            # all the elements are decoded as a NumPy array
+            dtype: str = self.get_numpy_element_dtype(infos, endian)
+            cb.add_line(f"count = {self.expression_as_str(infos.list_length)}")
+            if stream:
+                cb.add_line(f"{target} = numpy.frombuffer(_read(stream, count * numpy.dtype({dtype}).itemsize), {dtype})")
+            else:
+                cb.add_line(f"{target} = numpy.frombuffer(buf, {dtype}, count, cursor)")
+                cb.add_line(f"cursor += count * numpy.dtype({dtype}).itemsize")
+            return
+
+        if infos.list_length is not None and not isinstance(infos.list_length, ComparisonNode) and \
+                infos.is_basic_type() and infos.type in self.STRUCT_FORMATS and isinstance(endian, Endian):
+            # all the values are read at once
+            fmt: str = ("<" if endian == Endian.LITTLE else ">") + "{count}" + self.STRUCT_FORMATS[infos.type]
+            cb.add_line(f"count = {self.expression_as_str(infos.list_length)}")
+            if stream:
+                cb.add_line(f"{target} = list(struct.unpack(f\"{fmt}\", _read(stream, count * {infos.size})))")
+            else:
+                cb.add_line(f"{target} = list(struct.unpack_from(f\"{fmt}\", buf, cursor))")
+                cb.add_line(f"cursor += count * {infos.size}")
+            return
+
+        cb.add_line(f"{target} = []")
+        if infos.list_length is None:  # no length given, read until the end of the buffer
+            cb.add_line("while len(stream.peek(1)) > 0:" if stream else "while cursor < len(buf):")
+        elif isinstance(infos.list_length, ComparisonNode):  # repeat while the comparison is true
+            cb.add_line(f"while {self.comparison_as_str(infos.list_length)}:")
+        else:
+            cb.add_line(f"for _ in range({self.expression_as_str(infos.list_length)}):")
+        cb = cb.add_block()
+        if self.is_member_type_struct(infos.type):
+            self.add_value_read(cb, "item", infos, endian, stream)
+            cb.add_line(f"{target}.append(item)")
+        else:
+            cb.add_line(f"{target}.append({self.member_read_struct(infos, endian, stream)})")
+            if not stream:
+                cb.add_line(f"cursor += {infos.size}")
         cb = cb.end_block()
 
-    def member_read_struct(self, infos: StructMemberInfoNode, endian: Union[Endian, TernaryEndianNode]) -> str:
+    def add_value_read(self, cb: CodeBlock, target: str, infos: StructMemberInfoNode, endian: Union[Endian, TernaryEndianNode], stream: bool = False):
+        """
+        Add the code reading a single value (not a list) from 'buf' at 'cursor' into 'target', and moving 'cursor' after it.
+        If 'stream' is True, the value is read from the binary file object 'stream' instead.
+        """
+        if stream:
+            if self.is_member_type_struct(infos.type):
+                cb.add_line(f"{target} = {infos.type}._from_stream(stream)")
+            elif infos.is_string():
+                cb.add_line(f"{target} = str(_read_until(stream, {self.delimiter_as_str(infos)}), \"utf-8\")")
+            elif infos.is_bytes():
+                cb.add_line(f"{target} = _read_until(stream, {self.delimiter_as_str(infos)})")
+            else:
+                cb.add_line(f"{target} = {self.member_read_struct(infos, endian, True)}")
+        elif self.is_member_type_struct(infos.type):
+            cb.add_line(f"{target} = {infos.type}(buf, cursor)")  # the nested struct parses the same buffer in place
+            cb.add_line(f"cursor = {target}.cursor")  # continue to parse the buffer after the nested struct
+        elif infos.is_string() or infos.is_bytes():
+            # the delimiter is searched natively and the value is taken with only one slice
+            cb.add_line(f"end = _find(buf, {self.delimiter_as_str(infos)}, cursor)")
+            if infos.is_string():
+                cb.add_line(f"{target} = str(buf[cursor:end], \"utf-8\")")
+            else:
+                cb.add_line(f"{target} = bytes(buf[cursor:end])")
+            cb.add_line(f"cursor = end + {self.delimiter_length_as_str(infos)}")
+        else:
+            cb.add_line(f"{target} = {self.member_read_struct(infos, endian)}")
+            cb.add_line(f"cursor += {infos.size}")
+
+    def delimiter_length_as_str(self, infos: StructMemberInfoNode) -> str:
+        """
+        Return the expression of the length in bytes of the delimiter of a string or a bytes.
+        """
+        if isinstance(infos.delimiter, IdentifierAccessNode):
+            return f"len({self.delimiter_as_str(infos)})"
+        return str(len(literal_eval(self.delimiter_as_str(infos))))
+
+    def delimiter_as_str(self, infos: StructMemberInfoNode) -> str:
+        """
+        Return the expression of the delimiter of a string or a bytes as a bytes object.
+        """
+        if isinstance(infos.delimiter, IdentifierAccessNode):
+            return f"_delimiter({self.expression_as_str(infos.delimiter)})"  # converted when parsing, as it is only known then
+        elif isinstance(infos.delimiter, IntNumberNode):
+            return repr(infos.delimiter.value.to_bytes(max(1, ceil(infos.delimiter.value.bit_length() / 8)), byteorder="big"))
+        return f"b\"{infos.delimiter.value}\""  # delimiter is either a StringNode or a CharNode
+
+    def member_read_struct(self, infos: StructMemberInfoNode, endian: Union[Endian, TernaryEndianNode], stream: bool = False) -> str:
         if isinstance(endian, TernaryEndianNode):
-            return f"({self.member_read_struct(infos, endian.if_true)} if {self.comparison_as_str(endian.comparison)} else {self.member_read_struct(infos, endian.if_false)})"
+            return f"({self.member_read_struct(infos, endian.if_true, stream)} if {self.comparison_as_str(endian.comparison)} else {self.member_read_struct(infos, endian.if_false, stream)})"
 
+        if infos.is_float() or infos.is_double():
+            fmt: str = ("<" if endian == Endian.LITTLE else ">") + ("f" if infos.is_float() else "d")
+            if stream:
+                return f"struct.unpack('{fmt}', _read(stream, {infos.size}))[0]"
+            return f"struct.unpack_from('{fmt}', buf, cursor)[0]"
 
-        if infos.is_float():
-            res = "struct.unpack('<f'" if endian == Endian.LITTLE else "struct.unpack('>f'"
-            res += f", buf[self.cursor:self.cursor+{infos.size}])[0]"
-            return res
-        elif infos.is_double():
-            res = "struct.unpack('<d'" if endian == Endian.LITTLE else "struct.unpack('>d'"
-            res += f", buf[self.cursor:self.cursor+{infos.size}])[0]"
-            return res
+        data: str = f"_read(stream, {infos.size})" if stream else f"buf[cursor:cursor+{infos.size}]"
+        return f"int.from_bytes({data}, byteorder='{'big' if endian == Endian.BIG else 'little'}', signed={infos.signed})"
 
-        return f"int.from_bytes(buf[self.cursor:self.cursor+{infos.size}], byteorder='{'big' if infos.endian == Endian.BIG else 'little'}', signed={infos.signed})"
+    def attribute_name(self, name: str) -> str:
+        """
+        Return the name of the attribute of a member, with a trailing '_' if it is a Python keyword (like 'class').
+        """
+        return name + "_" if iskeyword(name) else name
 
     def expression_as_str(self, node: Union[FloatNumberNode, IntNumberNode, BinOpNode, UnaryOpNode, IdentifierAccessNode]):
-        res = ""
         if type(node) in (FloatNumberNode, IntNumberNode):
-            res = str(node.value)
+            return str(node.value)
         elif isinstance(node, IdentifierAccessNode):
-            res = "self." + node.name
+            return "self." + ".".join([self.attribute_name(name) for name in node.name.split(".")])
         elif isinstance(node, UnaryOpNode):
-            res = node.op
-            if type(node.value) in (FloatNumberNode, IntNumberNode):
-                res += str(node.value.value)
-            elif isinstance(node, IdentifierAccessNode):
-                res += node.value.name
-            else:
-                res += self.expression_as_str(node.value)
+            return "(" + self.math_op_as_str(node.op) + self.expression_as_str(node.value) + ")"
         elif isinstance(node, BinOpNode):
-            if type(node.left_node) in (FloatNumberNode, IntNumberNode):
-                res = str(node.left_node.value)
-            elif isinstance(node.left_node, IdentifierAccessNode):
-                res = node.left_node.name
-            else:
-                res = self.expression_as_str(node.left_node)
+            # parenthesized, so the order of the operations is the one of the AST
+            return "(" + self.expression_as_str(node.left_node) + " " + self.math_op_as_str(node.op) + " " + self.expression_as_str(node.right_node) + ")"
+        return ""
 
-            res += node.op
-
-            if type(node.right_node) in (FloatNumberNode, IntNumberNode):
-                res += str(node.right_node.value)
-            elif isinstance(node.right_node, IdentifierAccessNode):
-                res += node.right_node.name
-            else:
-                res += self.expression_as_str(node.right_node)
-        return res
+    def math_op_as_str(self, op: MathOperatorNode) -> str:
+        return {
+            MathOperatorNode.ADD: "+",
+            MathOperatorNode.SUBTRACT: "-",
+            MathOperatorNode.DIVIDE: "//",  # lengths and offsets are integers
+            MathOperatorNode.MULTIPLY: "*",
+            MathOperatorNode.AND: "&",
+            MathOperatorNode.OR: "|",
+            MathOperatorNode.XOR: "^",
+            MathOperatorNode.NOT: "~",
+            MathOperatorNode.LEFT_SHIFT: "<<",
+            MathOperatorNode.RIGHT_SHIFT: ">>",
+        }[op.type]
 
 
     def comparison_as_str(self, comp: ComparisonNode) -> str:
@@ -223,32 +1090,33 @@ class Python_Class(ParseedOutputGenerator):
         for member in struct.members:
             if isinstance(member, MatchNode):
                 if member.member_name is not None: # match statement to choose the type of the identifier
-                    cb.add_line(f"if isinstance(self.{member.member_name}, list):")
+                    cb.add_line(f'if hasattr(self.{self.attribute_name(member.member_name)}, "_custom_str"):')  # the type of a case can be a struct
                     cb = cb.add_block()
-                    cb.add_line(f'res += ("\\t"*depth) + "{member.member_name} = " + "\\n".join([m.custom_str(depth+1) for m in self.{member.member_name}._custom_str(depth+1)]) + "\\n"')
+                    cb.add_line(f'res += ("\\t"*depth) + "{member.member_name} = " + self.{self.attribute_name(member.member_name)}._custom_str(depth+1) + "\\n"')
                     cb = cb.end_block()
                     cb.add_line(f"else:")
                     cb = cb.add_block()
-                    cb.add_line(f'res += ("\\t"*depth) + "{member.member_name} = " + self.{member.member_name}._custom_str(depth+1) + "\\n"')
+                    cb.add_line(f'res += ("\\t"*depth) + "{member.member_name} = " + str(self.{self.attribute_name(member.member_name)}) + "\\n"')
                     cb = cb.end_block()
                 else:
+                    names: List[str] = []
                     for case in member.cases.keys():
-                        for member_match in member.cases[case]:
-                            cb.add_line(f'if hasattr(self, "{member_match.name}"):')
-                            cb = cb.add_block()
-                            cb.add_line(f'res += ("\\t"*depth) + "{member_match.name} = " + self.{member_match.name}')
-                            cb = cb.end_block()
+                        names += [member_match.name for member_match in member.cases[case] if member_match.name not in names]
+                    for name in names:  # members of a case that was not matched are not set
+                        cb.add_line(f'if hasattr(self, "{self.attribute_name(name)}"):')
+                        cb = cb.add_block()
+                        cb.add_line(f'res += ("\\t"*depth) + "{name} = " + str(self.{self.attribute_name(name)}) + "\\n"')
                         cb = cb.end_block()
             else:
                 if isinstance(member.infos.type, TernaryDataTypeNode):
-                    cb.add_line(f'res += ("\\t"*depth) + "{member.name} = " + self.{member.name}._custom_str(depth+1) + "\\n"')
+                    cb.add_line(f'res += ("\\t"*depth) + "{member.name} = " + self.{self.attribute_name(member.name)}._custom_str(depth+1) + "\\n"')
                 elif member.infos.is_string():
-                    cb.add_line(f'res += ("\\t"*depth) + "{member.name} = " + self.{member.name} + "\\n"')
+                    cb.add_line(f'res += ("\\t"*depth) + "{member.name} = " + self.{self.attribute_name(member.name)} + "\\n"')
                 else:
                     if member.infos.is_basic_type():
-                        cb.add_line(f'res += ("\\t"*depth) + "{member.name} = " + str(self.{member.name}) + "\\n"')
+                        cb.add_line(f'res += ("\\t"*depth) + "{member.name} = " + str(self.{self.attribute_name(member.name)}) + "\\n"')
                     else:
-                        cb.add_line(f'res += ("\\t"*depth) + "{member.name} = " + self.{member.name}._custom_str(depth+1) + "\\n"')
+                        cb.add_line(f'res += ("\\t"*depth) + "{member.name} = " + self.{self.attribute_name(member.name)}._custom_str(depth+1) + "\\n"')
 
         cb.add_line('res += ("\\t"*(depth-1)) + ")"')
         cb.add_line("return res")
@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 from typing import List, Optional
 from string import digits as DIGITS, ascii_letters as LETTERS
+import re, sys
 from errors import IllegalCharacterError, ExpectedMoreCharError, InvalidSyntaxError
 from utils import *
 
@@ -77,16 +78,24 @@ TT_EOF = "EOF"
 
 
 class Token:
-    def __init__(self, type_: str, value: Optional[str] = None, pos_start: Position = None, pos_end: Position = None) -> None:
+    # a token only keeps the indexes of its first character and of the character after it,
+    # as its positions are only needed when an error is raised
+    __slots__ = ("type", "value", "start", "end", "source")
+
+    def __init__(self, type_: str, value: Optional[str] = None, start: Optional[int] = None, end: Optional[int] = None, source: Optional[SourceFile] = None) -> None:
         self.type = type_
         self.value = value
+        self.start = start
+        self.end = end
+        self.source = source
+
+    @property
+    def pos_start(self) -> Position:
+        return Position(self.start, self.source)
 
-        if pos_start:
-            self.pos_start = pos_start.get_copy()
-            self.pos_end = pos_start.get_copy()
-            self.pos_end.advance()
-        if pos_end:
-            self.pos_end = pos_end.get_copy()
+    @property
+    def pos_end(self) -> Position:
+        return Position(self.end, self.source)
 
     def __repr__(self):
         if self.value:
@@ -94,318 +103,155 @@ class Token:
         return f"{self.type}"
 
 
+# Tokens made of one or two characters, with the type of their token
+OPERATORS = {
+    "+": TT_PLUS,
+    "-": TT_MINUS,
+    "*": TT_MULT,
+    "/": TT_DIV,
+    "&": TT_BIN_AND,
+    "|": TT_BIN_OR,
+    "^": TT_BIN_XOR,
+    "~": TT_BIN_NOT,
+    "<<": TT_BIN_LSHIFT,
+    ">>": TT_BIN_RSHIFT,
+    "==": TT_COMP_EQ,
+    "!=": TT_COMP_NE,
+    ">": TT_COMP_GT,
+    "<": TT_COMP_LT,
+    ">=": TT_COMP_GEQ,
+    "<=": TT_COMP_LEQ,
+    "&&": TT_COMP_AND,
+    "||": TT_COMP_OR,
+    "(": TT_LPAREN,
+    ")": TT_RPAREN,
+    "{": TT_LCURLY,
+    "}": TT_RCURLY,
+    "[": TT_LBRACK,
+    "]": TT_RBRACK,
+    ",": TT_COMMA,
+    ".": TT_DOT,
+    ";": TT_SEMICOL,
+    "\\": TT_BACKSLASH,
+    ":": TT_COLON,
+    "?": TT_QUESTION_MARK,
+}
+
+# Type of the token of each word that is not an identifier
+WORDS_TYPES = {**{data_type: TT_DATA_TYPE for data_type in DATA_TYPES}, **{keyword: TT_KEYWORD for keyword in KEYWORDS}}
+
+# Regex matching the spaces before the next token and this token, the name of the group matched tells what kind of token it is.
+# Operators are sorted from the longest to the shortest, so '<<' is matched before '<'.
+SPACES_REGEX = re.compile("[ \t\n]*")
+TOKEN_REGEX = re.compile(SPACES_REGEX.pattern + "(?:" + "|".join([
+    # identifiers can have numbers and '_' in their name, but they cannot start with a number nor a '_'
+    r"(?P<WORD>[A-Za-z][A-Za-z0-9_]*)",
+    # floating numbers cannot begin with a '.', so '.' without any number before is a TT_DOT
+    r"(?P<NUMBER>[0-9]+(?P<FLOAT>\.[0-9]*)?)",
+    r"(?P<COMMENT>//+(?P<COMMENT_TEXT>[^\n\r]*))",
+    "(?P<OPERATOR>" + "|".join([re.escape(operator) for operator in sorted(OPERATORS.keys(), key=len, reverse=True)]) + ")",
+    "(?P<STRING>\")",
+    "(?P<CHAR>')",
+    r"(?P<EOF>\Z)",
+]) + ")")
+
+
 class Lexer:
     def __init__(self, text: str, filename: str):
-        self.pos: Position = Position(-1, 0, -1, filename, text)
-        self.current_char: Optional[str] = None
         self.text: str = text
+        self.source: SourceFile = SourceFile(filename, text)
 
     def run(self) -> List[Token]:
         """
         Run the lexer on the text given in the constructor and return a list of Token.
         """
-        self._next_token()  # init lexer
         return self._make_tokens()
 
-    def _next_token(self) -> None:
-        """
-        Returns the next character in the text if there is one.
-        It also updates the current position.
-        """
-        self.pos.advance(self.current_char)
-        self.current_char = self.text[self.pos.idx] if self.pos.idx < len(self.text) else None
-
     def _make_tokens(self) -> List[Token]:
         """
         Returns a list of Tokens gathered in self.text.
+        Each token is matched at once with the spaces before it by TOKEN_REGEX, only strings and chars are read in multiple steps.
         """
         tokens: List[Token] = []
+        text: str = self.text
+        source: SourceFile = self.source
+        match = TOKEN_REGEX.match
+        idx: int = 0
 
-        while self.current_char is not None:
-            if self.current_char in [" ", "\t", "\n"]:
-                self._next_token()
-            elif self.current_char == "'":
-                tokens.append(self._make_char())
-            elif self.current_char == "\\":
-                tokens.append(Token(TT_BACKSLASH, pos_start=self.pos))
-                self._next_token()
-            elif self.current_char == "\"":
-                tokens.append(self._make_string())
-            elif self.current_char in DIGITS:
-                tokens.append(self._make_number_or_dot())
-            elif self.current_char == "?":
-                tokens.append(Token(TT_QUESTION_MARK, pos_start=self.pos))
-                self._next_token()
-            elif self.current_char == "+":
-                tokens.append(Token(TT_PLUS, pos_start=self.pos))
-                self._next_token()
-            elif self.current_char == "-":
-                tokens.append(Token(TT_MINUS, pos_start=self.pos))
-                self._next_token()
-            elif self.current_char == "/":
-                tokens.append(self._make_div_or_comment())
-            elif self.current_char == "*":
-                tokens.append(Token(TT_MULT, pos_start=self.pos))
-                self._next_token()
-            elif self.current_char == "&":
-                tokens.append(self._make_bin_and_or_comp_and())
-            elif self.current_char == "|":
-                tokens.append(self._make_bin_or_or_comp_or())
-            elif self.current_char == "^":
-                tokens.append(Token(TT_BIN_XOR, pos_start=self.pos))
-                self._next_token()
-            elif self.current_char == "~":
-                tokens.append(Token(TT_BIN_NOT, pos_start=self.pos))
-                self._next_token()
-            elif self.current_char == "(":
-                tokens.append(Token(TT_LPAREN, pos_start=self.pos))
-                self._next_token()
-            elif self.current_char == ")":
-                tokens.append(Token(TT_RPAREN, pos_start=self.pos))
-                self._next_token()
-            elif self.current_char == "[":
-                tokens.append(Token(TT_LBRACK, pos_start=self.pos))
-                self._next_token()
-            elif self.current_char == "]":
-                tokens.append(Token(TT_RBRACK, pos_start=self.pos))
-                self._next_token()
-            elif self.current_char == "{":
-                tokens.append(Token(TT_LCURLY, pos_start=self.pos))
-                self._next_token()
-            elif self.current_char == "}":
-                tokens.append(Token(TT_RCURLY, pos_start=self.pos))
-                self._next_token()
-            elif self.current_char == ",":
-                tokens.append(Token(TT_COMMA, pos_start=self.pos))
-                self._next_token()
-            elif self.current_char == ".":
-                tokens.append(self._make_number_or_dot())
-            elif self.current_char == ";":
-                tokens.append(Token(TT_SEMICOL, pos_start=self.pos))
-                self._next_token()
-            elif self.current_char == ":":
-                tokens.append(Token(TT_COLON, pos_start=self.pos))
-                self._next_token()
-            elif self.current_char == "!":
-                tokens.append(self._make_not_equal())
-            elif self.current_char == "=":
-                tokens.append(self._make_equal())
-            elif self.current_char == "<":
-                tokens.append(self._make_less_than_or_left_bitshift())
-            elif self.current_char == ">":
-                tokens.append(self._make_greater_than_or_right_bitshift())
-            elif self.current_char in LETTERS:
-                tokens.append(self._make_identifier())
+        while True:
+            res = match(text, idx)
+            if res is None:
+                idx = SPACES_REGEX.match(text, idx).end()
+                if text[idx] in "!=":  # only valid in '!=' and '=='
+                    raise ExpectedMoreCharError(Position(idx, source), Position(idx + 1, source), ["="])
+                raise IllegalCharacterError(Position(idx, source), Position(idx + 1, source), f"'{text[idx]}'")
+
+            kind: str = res.lastgroup
+            start: int = res.start(kind)
+            idx = res.end()
+            if kind == "WORD":
+                # the same names are found many times, so they share the same string
+                word: str = sys.intern(res.group(kind))
+                tokens.append(Token(WORDS_TYPES.get(word, TT_IDENTIFIER), word, start, idx, source))
+            elif kind == "OPERATOR":
+                tokens.append(Token(OPERATORS[res.group(kind)], None, start, idx, source))
+            elif kind == "NUMBER":
+                tokens.append(Token(TT_NUM_INT if res.group("FLOAT") is None else TT_NUM_FLOAT, res.group(kind), start, idx, source))
+            elif kind == "COMMENT":
+                tokens.append(Token(TT_COMMENT, res.group("COMMENT_TEXT"), start, idx, source))
+            elif kind == "STRING":
+                tokens.append(self._make_string(start))
+                idx = tokens[-1].end
+            elif kind == "CHAR":
+                tokens.append(self._make_char(start))
+                idx = tokens[-1].end
             else:
-                pos_start: Position = self.pos.get_copy()
-                char: str = self.current_char
-                self._next_token()
-                raise IllegalCharacterError(pos_start, self.pos, f"'{char}'")
-
-        tokens.append(Token(TT_EOF, pos_start=self.pos))
-        return tokens
-
-    def _make_identifier(self) -> Token:
-        """
-        Tokenize a word by checking if it is an identifier, data-type or a keyword.
-        """
-        res_identifier: str = ""
-        pos_start: Position = self.pos.get_copy()
-
-        # identifiers can have numbers and '_' in their name, but as this function is called
-        # when a letter is founc, they cannot start with a number nor a '_'
-        while self.current_char is not None and self.current_char in LETTERS_DIGITS + "_":
-            res_identifier += self.current_char
-            self._next_token()
-
-        if res_identifier in KEYWORDS:
-            token_type = TT_KEYWORD
-        elif res_identifier in DATA_TYPES:
-            token_type = TT_DATA_TYPE
-        else:
-            token_type = TT_IDENTIFIER
-
-        return Token(token_type, res_identifier, pos_start, self.pos)
-
-    def _make_number_or_dot(self) -> Token:
-        """
-        Tokenize a word by checking if it is a number (integer or float) or a simple dot ('.').
-        """
-        pos_start: Position = self.pos.get_copy()
-        res_num: str = ""
-        dot_count: int = 0
-
-        while self.current_char is not None and self.current_char in DIGITS + ".":
-            if self.current_char == ".":
-                # As floating number cannot begin with a '.' and have to begin with a number before,
-                # we can assume that '.' without any number before are TT_DOT
-                if len(res_num) == 0:
-                    self._next_token()
-                    return Token(TT_DOT, pos_start=pos_start)
-                if dot_count == 1:  # if we already encounter a dot before
-                    break
-                dot_count += 1
-            res_num += self.current_char
-            self._next_token()
-
-        if dot_count == 0:
-            return Token(TT_NUM_INT, res_num, pos_start, self.pos)
-        else:
-            return Token(TT_NUM_FLOAT, res_num, pos_start, self.pos)
-
-    def _make_div_or_comment(self) -> Token:
-        """
-        Tokenize a word by checking if it is a comment ('//') or a simple divide.
-        """
-        pos_start: Position = self.pos.get_copy()
-        div_count: int = 1
-
-        self._next_token()
-        while self.current_char is not None and self.current_char == "/":
-            div_count += 1
-            self._next_token()
-
-        if div_count == 1:
-            return Token(TT_DIV, pos_start=pos_start, pos_end=self.pos)
-        else:
-            return Token(TT_COMMENT, self._read_until("\n\r"), pos_start, self.pos)
-
-    # comparisons
-    def _make_not_equal(self) -> Token:
-        """
-        Handle token for not equal comparison ('!=').
-        """
-        pos_start: Position = self.pos.get_copy()
-        self._next_token()
+                tokens.append(Token(TT_EOF, None, idx, idx, source))
+                return tokens
 
-        if self.current_char != "=":
-            raise ExpectedMoreCharError(pos_start, self.pos, ["="])
-
-        self._next_token()
-        return Token(TT_COMP_NE, pos_start=pos_start, pos_end=self.pos)
-
-    def _make_equal(self) -> Token:
-        """
-        Handle token for equal comparison ('==').
-        """
-        pos_start: Position = self.pos.get_copy()
-        self._next_token()
-
-        if self.current_char != "=":
-            raise ExpectedMoreCharError(pos_start, self.pos, ["="])
-
-        self._next_token()
-        return Token(TT_COMP_EQ, pos_start=pos_start, pos_end=self.pos)
-
-    def _make_less_than_or_left_bitshift(self) -> Token:
-        """
-        Handle token for less than, ('<'), less or equal ('<=') or left bitshift ('<<').
-        """
-        pos_start: Position = self.pos.get_copy()
-        self._next_token()
-
-        if self.current_char == "=":
-            self._next_token()
-            return Token(TT_COMP_LEQ, pos_start=pos_start, pos_end=self.pos)
-        elif self.current_char == "<":
-            self._next_token()
-            return Token(TT_BIN_LSHIFT, pos_start=pos_start, pos_end=self.pos)
-        return Token(TT_COMP_LT, pos_start=pos_start, pos_end=self.pos)
-
-    def _make_greater_than_or_right_bitshift(self) -> Token:
-        """
-        Handle token for greater than, ('<'), greater or equal ('<=') or right bitshift ('>>').
-        """
-        pos_start: Position = self.pos.get_copy()
-        self._next_token()
-
-        if self.current_char == "=":
-            self._next_token()
-            return Token(TT_COMP_GEQ, pos_start=pos_start, pos_end=self.pos)
-        elif self.current_char == ">":
-            self._next_token()
-            return Token(TT_BIN_RSHIFT, pos_start=pos_start, pos_end=self.pos)
-        return Token(TT_COMP_GT, pos_start=pos_start, pos_end=self.pos)
-
-    def _make_bin_and_or_comp_and(self) -> Token:
-        """
-        Handle token for comparison and ('&&') or binary and ('&').
-        """
-        pos_start: Position = self.pos.get_copy()
-        self._next_token()
-
-        if self.current_char == "&":
-            self._next_token()
-            return Token(TT_COMP_AND, pos_start=pos_start, pos_end=self.pos)
-        return Token(TT_BIN_AND, pos_start=pos_start, pos_end=self.pos)
-
-    def _make_bin_or_or_comp_or(self) -> Token:
-        """
-        Handle token for comparison or ('||') or binary or ('|').
-        """
-        pos_start: Position = self.pos.get_copy()
-        self._next_token()
-
-        if self.current_char == "|":
-            self._next_token()
-            return Token(TT_COMP_OR, pos_start=pos_start, pos_end=self.pos)
-        return Token(TT_BIN_OR, pos_start=pos_start, pos_end=self.pos)
-    
-    def _make_string(self) -> Token:
+    def _make_string(self, idx: int) -> Token:
         """
         Handle token for strings.
+
+        :param idx: Index of the opening '"'.
+        :type idx: int
         """
-        pos_start: Position = self.pos.get_copy()
-        self._next_token()
         res: str = ""
+        start: int = idx + 1
         while True:
-            res += self._read_until("\"")
-
-            if self.current_char is None:
-                raise ExpectedMoreCharError(pos_start, self.pos, ["\""])
-            
-            if self.text[self.pos.idx-1] == "\\":
-                res = res[:-1]
-                res += "\""
-                self._next_token()
+            end: int = self.text.find("\"", start)
+            if end == -1:
+                raise ExpectedMoreCharError(Position(idx, self.source), Position(len(self.text), self.source), ["\""])
+
+            if self.text[end-1] == "\\":
+                res += self.text[start:end-1] + "\""
+                start = end + 1
             else:
-                self._next_token()
-                return Token(TT_STRING, res, pos_start, self.pos)
+                return Token(TT_STRING, res + self.text[start:end], idx, end + 1, self.source)
 
-    def _make_char(self) -> Token:
+    def _make_char(self, idx: int) -> Token:
         """
         Handle token for a char.
+
+        :param idx: Index of the opening "'".
+        :type idx: int
         """
-        pos_start: Position = self.pos.get_copy()
         res: str = ""
-        self._next_token()
+        start: int = idx + 1
         while True:
-            res += self._read_until("\'")
-
-            if self.current_char is None:
-                raise ExpectedMoreCharError(pos_start, self.pos, ["\""])
+            end: int = self.text.find("'", start)
+            if end == -1:
+                raise ExpectedMoreCharError(Position(idx, self.source), Position(len(self.text), self.source), ["\""])
 
-            if self.text[self.pos.idx-1] == "\\":
+            res += self.text[start:end]
+            if self.text[end-1] == "\\":
                 res += "'"
-                self._next_token()
+                start = end + 1
             else:
                 if res[0] != "\\" and len(res) > 1:
-                    raise InvalidSyntaxError(pos_start, self.pos, f"A char must have a length of 1 or have a format of \"\\xx\"")
-
-                self._next_token()
-                return Token(TT_CHAR, res, pos_start, self.pos)
+                    raise InvalidSyntaxError(Position(idx, self.source), Position(end, self.source), f"A char must have a length of 1 or have a format of \"\\xx\"")
 
-    def _read_until(self, stop_chars: str) -> str:
-        """
-        Calls self._next_token() until a character from the stop_chars parameter is reached.
-        This functions returns all characters read until the stop character is reached.
-        This function is useful for comments for example.
-        """
-        res: str = ""
-        while self.current_char is not None and self.current_char not in stop_chars:
-            res += self.current_char
-            self._next_token()
-        return res
+                return Token(TT_CHAR, res, idx, end + 1, self.source)
 
 def convert_token_as_str(token: Token) -> str:
     """
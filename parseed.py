@@ -4,7 +4,10 @@ from test_generator import start_test_generator
 from parser import Parser
 from ast_nodes import ASTNode
 from transpiler import ParseedOutputGenerator, Writer
+from batch import expand_files, transpile_files
+from cache import DEFAULT_CACHE_DIR, TranspileCache, get_cache_key, open_if_changed, write_if_changed
 from errors import ParseedBaseError
+from profiler import Profiler, count_nodes
 from typing import List
 from glob import glob
 from pathlib import Path
@@ -13,7 +16,7 @@ from rich.panel import Panel
 from rich.syntax import Syntax
 from importlib import import_module
 from sys import argv as sys_argv
-import argparse, os
+import argparse, os, shutil, sys
 
 console = Console()
 err_console = Console(stderr=True, style="bold red")
@@ -26,15 +29,33 @@ def main():
         import_module("generators." + Path(filename).stem)
 
     argparser = argparse.ArgumentParser(description="A simple language simplifying the creation of parsers.")
-    argparser.add_argument("file", help="File to parse", nargs="?", default="")
+    argparser.add_argument("files", help="Files to parse, multiple files or glob patterns can be given to transpile them all at once.", nargs="*", metavar="file")
     argparser.add_argument("-o", "--output", help="Output file of the generated code ('-' for STDOUT).", dest="output_file", default="-")
+    argparser.add_argument("-d", "--output-dir", help="Directory where the code generated from each file is written when transpiling multiple files \
+                           (next to each file by default).", dest="output_dir", default=None, metavar="OUTPUT_DIR")
+    argparser.add_argument("-j", "--jobs", help="Number of processes used when transpiling multiple files (the number of CPUs by default).",
+                           dest="jobs", type=int, default=None)
+    argparser.add_argument("--cache-dir", help="Directory where the generated code is cached, to not generate it again from an unchanged file \
+                           (the PARSEED_CACHE_DIR environment variable by default, the code is not cached if it is not set).",
+                           dest="cache_dir", default=DEFAULT_CACHE_DIR, metavar="CACHE_DIR")
+    argparser.add_argument("--no-cache", help="Always generate the code, without using the cache, even if PARSEED_CACHE_DIR is set.",
+                           dest="no_cache", action="store_true")
+    argparser.add_argument("-p", "--profile", help="Print the wall time, the counts of tokens and nodes, and the peak memory of each phase \
+                           (lexer, parser, checks and generate), the cache is not used.", dest="profile", action="store_true")
+    argparser.add_argument("--profile-memory", help="Measure the memory allocated during each phase only with tracemalloc, which slows down the phases \
+                           (the peak memory of the process is measured otherwise, implies '--profile').", dest="profile_memory", action="store_true")
+    argparser.add_argument("--profile-trace", help="Write the phases measured by '--profile' to a Chrome trace event JSON file (implies '--profile').",
+                           dest="profile_trace", default=None, metavar="TRACE_FILE")
     argparser.add_argument("-n", "--no-color", help="Disable colors when printing to STDOUT and STDERR.", dest="no_color", action="store_true")
     argparser.add_argument("-L", "--lexer", action="store_true", help="Print the lexer's list of tokens", dest="show_lexer")
     argparser.add_argument("-A", "--ast", action="store_true", help="Print the abstract syntax tree", dest="show_ast")
     argparser.add_argument("-T", "--test-generator", help="Test a generator by generating a specific parser from the generator and its corresponding binary file to test on. \
                            The argument must be the directory where these 2 files will be generated.", dest="test_generator", default=None, metavar="OUTPUT_DIR")
+    generators_names = [c.__name__ for c in ParseedOutputGenerator.__subclasses__()]
     argparser.add_argument("-g", "--generator", help="The generator to use", dest="generator",
-                            choices=[c.__name__ for c in ParseedOutputGenerator.__subclasses__()], default=ParseedOutputGenerator.__subclasses__()[0].__name__)
+                            choices=generators_names, default="Python_Class" if "Python_Class" in generators_names else generators_names[0])
+    argparser.add_argument("-O", "--option", help="Option given to the generator, can be used multiple times.", dest="options",
+                           action="append", default=[], metavar="NAME[=VALUE]")
 
     arguments = argparser.parse_args()
 
@@ -45,6 +66,18 @@ def main():
         console.no_color = True
         err_console.no_color = True
 
+    # options given to the generator
+    generator_options = {}
+    for option in arguments.options:
+        name, _, value = option.partition("=")
+        if name not in generator_class.OPTIONS:
+            err_console.print(f"{sys_argv[0]}: Unknown option '{name}' for generator {generator_class.__name__}, available options: {', '.join(generator_class.OPTIONS.keys())}")
+            return 1
+        generator_options[name] = value
+    arguments.generator_options = generator_options
+    arguments.profiler = Profiler(enabled=arguments.profile or arguments.profile_memory or arguments.profile_trace is not None,
+                                  trace_memory=arguments.profile_memory)
+
     if arguments.test_generator != None:
         if arguments.output_file == "-":
             err_console.print(f"{sys_argv[0]}: Cannot output to STDOUT ('-') when testing a generator, please choose an output name with the '--output' parameter.")
@@ -60,7 +93,17 @@ def main():
             err_console.print(f"{sys_argv[0]}: {str(e)}")
             return 1
 
-    if arguments.file == "":
+    files = expand_files(arguments.files)
+    if len(files) > 1 or arguments.output_dir is not None:
+        if arguments.output_file != "-":
+            err_console.print(f"{sys_argv[0]}: Cannot use '--output' when transpiling multiple files, please use '--output-dir' instead.")
+            return 1
+        if arguments.profiler.enabled:
+            err_console.print(f"{sys_argv[0]}: Cannot use '--profile' when transpiling multiple files.")
+            return 1
+        return run_batch(files, arguments, generator_class)
+
+    if len(files) == 0:
         console.print(f"Using generator: [italic bold]{generator_class.__name__}[/italic bold]")
         while True:
             try:
@@ -71,20 +114,60 @@ def main():
             except KeyboardInterrupt:
                 err_console.print("[green]Quitting...[/green]")
                 break
-            run(lexer, arguments, generator_class)
+            code = run(lexer, arguments, generator_class)
+            if code is not None:
+                output(code, arguments, generator_class)
+            profile_report(arguments)
     else:
         try:
-            with open(arguments.file, "r") as f:
-                lexer = Lexer(f.read(), arguments.file)
-                run(lexer, arguments, generator_class)
+            with open(files[0], "r") as f:
+                text = f.read()
         except OSError as e:
             err_console.print(f"[red]{sys_argv[0]}:[/red] {str(e)}")
             return 1
 
+        # the cache is not used when printing the tokens or the AST or when profiling, as they need the code to be generated
+        cache = None if arguments.cache_dir is None or arguments.no_cache or arguments.show_lexer or arguments.show_ast or arguments.profiler.enabled \
+                else TranspileCache(arguments.cache_dir)
+        key = get_cache_key(text, generator_class, generator_options) if cache is not None else None
+        if arguments.output_file != "-":
+            res = run_to_file(Lexer(text, files[0]), arguments, generator_class, cache, key)
+            profile_report(arguments)
+            return res
 
-def run(lexer, arguments, generator_class):
+        code = cache.get(key) if cache is not None else None
+        if code is None:
+            code = run(Lexer(text, files[0]), arguments, generator_class)
+            if code is None:
+                profile_report(arguments)
+                return 1
+            if cache is not None:
+                cache.put(key, code)
+        output(code, arguments, generator_class)
+        profile_report(arguments)
+
+
+def run_batch(files, arguments, generator_class):
+    results = transpile_files(files, generator_class, arguments.generator_options, arguments.output_dir, arguments.jobs,
+                              None if arguments.no_cache else arguments.cache_dir)
+    errors_count = 0
+    for file_path, output_path, error in results:
+        if error is None:
+            console.print(f"[green]OK[/green]     {file_path} -> {output_path}", highlight=False)
+        else:
+            errors_count += 1
+            err_console.print(f"FAILED {file_path}", highlight=False)
+            err_console.print(error, markup=False, highlight=False)
+    console.print(f"{len(results) - errors_count} file(s) transpiled, {errors_count} failed.")
+    return 1 if errors_count > 0 else 0
+
+
+def build_generator(lexer, arguments, generator_class):
+    profiler = arguments.profiler
     try:
-        tokens = lexer.run()
+        with profiler.phase("lexer") as phase:
+            tokens = lexer.run()
+            phase.counters["tokens"] = len(tokens)
     except ParseedBaseError as e:
         err_console.print(e)  # just print the error
         return
@@ -94,26 +177,90 @@ def run(lexer, arguments, generator_class):
 
     parser = Parser(tokens)
     try:
-        ast = parser.run()
+        with profiler.phase("parser") as phase:
+            ast = parser.run()
+            if profiler.enabled:
+                phase.counters["nodes"] = count_nodes(ast)
     except ParseedBaseError as e:
         err_console.print(e)  # just print the error
         return
     if arguments.show_ast:
         AST_pprint(ast)
 
+    try:
+        with profiler.phase("checks") as phase:
+            generator = generator_class(ast, arguments.generator_options)
+            phase.counters["structs"] = len(generator.structs)
+            phase.counters["bitfields"] = len(generator.bitfields)
+        return generator
+    except ParseedBaseError as e:
+        err_console.print(e)  # just print the error
+        return
+
+
+def run(lexer, arguments, generator_class):
+    generator = build_generator(lexer, arguments, generator_class)
+    if generator is None:
+        return
+
     writer: Writer = Writer()
     try:
-        generator_class(ast).generate(writer)
+        with arguments.profiler.phase("generate") as phase:
+            generator.generate(writer)
+            code = writer.generate_code()
+            phase.counters["output_size"] = len(code)
     except ParseedBaseError as e:
         err_console.print(e)  # just print the error
         return
 
+    return code
+
+
+def run_to_file(lexer, arguments, generator_class, cache, key):
+    # the code is streamed to the output file, so it is never fully kept in memory
+    try:
+        cached_path = cache.get_path(key) if cache is not None else None
+        if cached_path is not None:
+            with open(cached_path, "r") as cached, open_if_changed(arguments.output_file) as f:
+                shutil.copyfileobj(cached, f)
+            return 0
+
+        generator = build_generator(lexer, arguments, generator_class)
+        if generator is None:
+            return 1
+        with open_if_changed(arguments.output_file) as f, arguments.profiler.phase("generate") as phase:
+            writer: Writer = Writer(f)
+            generator.generate(writer)
+            writer.flush()
+            phase.counters["output_size"] = f.tell()
+    except (OSError, ParseedBaseError) as e:
+        err_console.print(e)
+        return 1
+
+    if cache is not None:
+        cache.put_file(key, arguments.output_file)
+    return 0
+
+
+def profile_report(arguments):
+    profiler = arguments.profiler
+    if not profiler.enabled:
+        return
+    err_console.print(profiler.report(), style="none", highlight=False)
+    if arguments.profile_trace is not None:
+        try:
+            profiler.write_trace(arguments.profile_trace)
+        except OSError as e:
+            err_console.print(e)
+    profiler.clear()
+
+
+def output(code, arguments, generator_class):
     if arguments.output_file == "-":
-        console.print(Syntax(writer.generate_code(), generator_class.PYGMENT_HIGHLIGHTER))
+        console.print(Syntax(code, generator_class.PYGMENT_HIGHLIGHTER))
     else:
         try:
-            with open(arguments.output_file, "w") as f:
-                f.write(writer.generate_code())
+            write_if_changed(arguments.output_file, code)
         except OSError as e:
             err_console.print(e)
 
@@ -150,4 +297,4 @@ def lexer_pprint(tokens: List[Token]):
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
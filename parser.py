@@ -1,8 +1,8 @@
 #!/usr/bin/env python3
-from typing import List, Any, Union, Dict
+from typing import List, Any, Union, Dict, Tuple
 from lexer import *
 from ast_nodes import *
-from errors import InvalidStateError, InvalidSyntaxError
+from errors import InvalidSyntaxError
 from binascii import unhexlify
 
 
@@ -10,23 +10,23 @@ class Parser:
     def __init__(self, tokens: List[Token]):
         self.tokens: List[Token] = tokens
         self.token_index: int = -1
+        # expressions already parsed, with the index of the token after them, by the index of their first token,
+        # so an expression is not parsed again when the parser goes back to parse it as a comparison
+        self._expr_memo: Dict[int, Tuple[Any, int]] = {}
 
         # self.tokens contains at least a TT_EOF token
         self.current_token: Token = self.tokens[0]
         self.advance()
 
-    def _rollback_to(self, token: Token):
+    def _rollback_to(self, token_index: int):
         """
         Rollback parser to specified token.
-        The token must be in the self.tokens.
 
-        :param token: Token to rollback to.
-        :type token: Token, must be an instance present in the self.tokens list.
+        :param token_index: Index of the token to rollback to, saved from self.token_index.
+        :type token_index: int
         """
-        for i, t in enumerate(self.tokens):
-            if t == token:
-                self.current_token = t
-                self.token_index = i
+        self.token_index = token_index
+        self.current_token = self.tokens[min(token_index, len(self.tokens) - 1)]
 
     def run(self) -> list:
         """
@@ -216,6 +216,8 @@ class Parser:
         list_length_node: Any = None
 
         if self.current_token.type == TT_IDENTIFIER:  # nothing to do, just continue parsing
+            if isinstance(member_type, Token) and member_type.value in BASIC_TYPES_INFOS and isinstance(endian, Endian):
+                return StructMemberInfoNode.get_basic_type(member_type.value, endian)
             return StructMemberInfoNode(member_type, endian)
         elif self.current_token.type == TT_LPAREN and isinstance(member_type, Token) and member_type.value in ("string", "bytes"):
             self.advance()
@@ -229,17 +231,26 @@ class Parser:
             self.advance()
             list_length_node = None
             if self.current_token.type != TT_RBRACK:
-                current_token_tmp = self.current_token
-                list_length_node = self.expr()
-                if self.current_token.type != TT_RBRACK:
-                    self._rollback_to(current_token_tmp)
-                    list_length_node = self.comparison()
+                list_length_node = self._read_list_length()
             if self.current_token.type != TT_RBRACK:
                 raise InvalidSyntaxError(self.current_token.pos_start, self.current_token.pos_end, "expected ']'")
             self.advance()
 
         return StructMemberInfoNode(member_type, endian, is_list, list_length_node)
 
+    def _read_list_length(self) -> Any:
+        """
+        Parse the length of a list, that is either an expression or a comparison.
+        The expression is parsed first, and if it is not followed by ']' it is the left part of a comparison,
+        which is parsed again from the same token (the expression is taken from self._expr_memo).
+        """
+        token_index: int = self.token_index
+        list_length_node: Any = self.expr()
+        if self.current_token.type != TT_RBRACK:
+            self._rollback_to(token_index)
+            list_length_node = self.comparison()
+        return list_length_node
+
     def _read_delimiter(self) -> Union[CharNode, StringNode, IntNumberNode]:
         """
         Parse a delimiter for string and bytes data-types.
@@ -354,31 +365,43 @@ class Parser:
 
     def _handle_ternary_member_type_or_endian(self, struct_endian) -> Union[TernaryEndianNode, TernaryDataTypeNode]:
         """
-        Handle parsing ternary endian and ternary type by checking if an error is thrown when parsing ternary endian.
+        Handle parsing ternary endian and ternary type, as they both start with "(" <comparison> "?".
 
-        If an error is thrown when parsing with ternary endian, it means it is a ternary data-type.
+        The comparison is parsed once, and the token after the '?' tells if it is a ternary endian or a ternary data-type.
         """
-        tmp_curr_token = self.current_token
-        try:
-            return self.ternary_endian()
-        except InvalidStateError:
-            self._rollback_to(tmp_curr_token)
-            return self.ternary_data_type(struct_endian)
+        comparison_node: ComparisonNode = self._ternary_condition()
+        if self.current_token.type == TT_KEYWORD and self.current_token.value in ENDIANNESS_KEYWORDS:
+            return self._ternary_endian_values(comparison_node)
+        return self._ternary_data_type_values(comparison_node, struct_endian)
 
-    def ternary_endian(self) -> TernaryEndianNode:
+    def _ternary_condition(self) -> ComparisonNode:
         """
-        <endian> ::= "LE" | "BE"
-
-        <ternary_endian> ::= "(" <comparison> "?" <endian> ":" <endian> ")"
+        Parse the beginning of a ternary operator: "(" <comparison> "?".
         """
         self.advance()
         comparison_node: ComparisonNode = self.comparison()
         if self.current_token.type != TT_QUESTION_MARK:
             raise InvalidSyntaxError(self.current_token.pos_start, self.current_token.pos_end, "expected '?'")
         self.advance()
+        return comparison_node
+
+    def ternary_endian(self) -> TernaryEndianNode:
+        """
+        <endian> ::= "LE" | "BE"
+
+        <ternary_endian> ::= "(" <comparison> "?" <endian> ":" <endian> ")"
+        """
+        return self._ternary_endian_values(self._ternary_condition())
 
+    def _ternary_endian_values(self, comparison_node: ComparisonNode) -> TernaryEndianNode:
+        """
+        Parse the endians of a ternary endian, after its '?'.
+
+        :param comparison_node: Condition of the ternary endian.
+        :type comparison_node: ComparisonNode
+        """
         if self.current_token.type != TT_KEYWORD or self.current_token.value not in ENDIANNESS_KEYWORDS:
-            raise InvalidStateError("Not a ternary endian.")
+            raise InvalidSyntaxError(self.current_token.pos_start, self.current_token.pos_end, "expected 'LE' or 'BE'")
         if_true: Endian = Endian.from_token(self.current_token)
         self.advance()
 
@@ -387,7 +410,7 @@ class Parser:
         self.advance()
 
         if self.current_token.type != TT_KEYWORD or self.current_token.value not in ENDIANNESS_KEYWORDS:
-            raise InvalidStateError("Not a ternary endian.")
+            raise InvalidSyntaxError(self.current_token.pos_start, self.current_token.pos_end, "expected 'LE' or 'BE'")
 
         if_false: Endian = Endian.from_token(self.current_token)
         self.advance()
@@ -402,12 +425,17 @@ class Parser:
         """
         <ternary_data_type> ::= "(" <comparison> "?" <data_type> ":" <data_type> ")"
         """
-        self.advance()
-        comparison_node: ComparisonNode = self.comparison()
-        if self.current_token.type != TT_QUESTION_MARK:
-            raise InvalidSyntaxError(self.current_token.pos_start, self.current_token.pos_end, "expected '?'")
-        self.advance()
+        return self._ternary_data_type_values(self._ternary_condition(), struct_endian)
+
+    def _ternary_data_type_values(self, comparison_node: ComparisonNode, struct_endian: Endian) -> TernaryDataTypeNode:
+        """
+        Parse the data-types of a ternary data-type, after its '?'.
 
+        :param comparison_node: Condition of the ternary data-type.
+        :type comparison_node: ComparisonNode
+        :param struct_endian: Endian of the struct.
+        :type struct_endian: Endian
+        """
         if_true_data_type: StructMemberInfoNode = StructMemberInfoNode(self.current_token)
         self.advance()
 
@@ -425,11 +453,7 @@ class Parser:
             is_list = True
             list_length_node = None
             if self.current_token.type != TT_RBRACK:
-                current_token_tmp = self.current_token
-                list_length_node = self.expr()
-                if self.current_token.type != TT_RBRACK:
-                    self._rollback_to(current_token_tmp)
-                    list_length_node = self.comparison()
+                list_length_node = self._read_list_length()
             if self.current_token.type != TT_RBRACK:
                 raise InvalidSyntaxError(self.current_token.pos_start, self.current_token.pos_end, "expected ']'")
             self.advance()
@@ -457,11 +481,7 @@ class Parser:
             list_length_node = None
             self.advance()
             if self.current_token.type != TT_RBRACK:
-                current_token_tmp = self.current_token
-                list_length_node = self.expr()
-                if self.current_token.type != TT_RBRACK:
-                    self._rollback_to(current_token_tmp)
-                    list_length_node = self.comparison()
+                list_length_node = self._read_list_length()
             if self.current_token.type != TT_RBRACK:
                 raise InvalidSyntaxError(self.current_token.pos_start, self.current_token.pos_end, "expected ']'")
             self.advance()
@@ -577,7 +597,15 @@ class Parser:
         """
         <expr> ::= <term> (("+" | "-" | <logical_operator>) <term>)*
         """
-        return self.binary_op(self.term, [TT_PLUS, TT_MINUS, TT_BIN_OR, TT_BIN_AND, TT_BIN_NOT, TT_BIN_XOR, TT_BIN_LSHIFT, TT_BIN_RSHIFT])
+        token_index: int = self.token_index
+        if token_index in self._expr_memo:
+            expr, end_index = self._expr_memo[token_index]
+            self._rollback_to(end_index)
+            return expr
+
+        expr = self.binary_op(self.term, [TT_PLUS, TT_MINUS, TT_BIN_OR, TT_BIN_AND, TT_BIN_NOT, TT_BIN_XOR, TT_BIN_LSHIFT, TT_BIN_RSHIFT])
+        self._expr_memo[token_index] = (expr, self.token_index)
+        return expr
 
     def term(self) -> Any:
         """
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+from ast_nodes import ASTNode
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Any, Dict, Iterator, List
+import json, os, sys, tracemalloc
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+
+def get_peak_rss() -> int:
+    """
+    Return the peak resident set size of the process in bytes, 0 if it cannot be known.
+    """
+    if resource is None:
+        return 0
+    # in bytes on macOS, in kilobytes elsewhere
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+
+
+def count_nodes(ast: List[Any]) -> int:
+    """
+    Return the number of nodes in an AST, a node shared by multiple nodes is counted each time.
+
+    :param ast: List of nodes returned by the parser.
+    :type ast: List[Any]
+    """
+    res: int = 0
+    values: List[Any] = list(ast)
+    while len(values) > 0:
+        value: Any = values.pop()
+        if isinstance(value, ASTNode):
+            res += 1
+            for cls in type(value).__mro__:
+                for name in getattr(cls, "__slots__", ()):
+                    values.append(getattr(value, name, None))
+        elif isinstance(value, (list, tuple)):
+            values += value
+        elif isinstance(value, dict):
+            values += value.keys()
+            values += value.values()
+    return res
+
+
+class Phase:
+    """
+    Wall time, peak memory and counters (tokens, nodes...) of a phase of the transpiling.
+    """
+    def __init__(self, name: str, start: float):
+        """
+        :param name: Name of the phase.
+        :type name: str
+        :param start: Time when the phase started, in seconds since the profiler was created.
+        :type start: float
+        """
+        self.name: str = name
+        self.start: float = start
+        self.duration: float = 0.0
+        self.peak_memory: int = 0
+        self.counters: Dict[str, int] = {}
+
+
+class Profiler:
+    """
+    Records each phase of the transpiling (lexer, parser, checks and generate).
+    By default, the peak memory of a phase is the peak resident set size of the process at the end of the phase,
+    which costs nothing to measure but includes the phases before it.
+    If memory is traced, it is the maximum size of the memory allocated by Python during the phase only,
+    measured with tracemalloc, which slows down the phases a lot.
+    """
+    def __init__(self, enabled: bool = True, trace_memory: bool = False):
+        """
+        :param enabled: If False, phases are not measured nor recorded, defaults to True.
+        :type enabled: bool
+        :param trace_memory: Measure the memory allocated during each phase with tracemalloc, defaults to False.
+        :type trace_memory: bool
+        """
+        self.enabled: bool = enabled
+        self.trace_memory: bool = trace_memory
+        self.phases: List[Phase] = []
+        self.__start: float = perf_counter()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[Phase]:
+        """
+        Measure the phase run in the 'with' block, its counters can be set on the Phase given.
+        The phase is not recorded if an exception is raised.
+
+        :param name: Name of the phase.
+        :type name: str
+        """
+        phase: Phase = Phase(name, perf_counter() - self.__start)
+        if not self.enabled:
+            yield phase
+            return
+
+        started_tracing: bool = self.trace_memory and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        # the peak of a tracing just started is the one of the phase, otherwise it can only be reset since Python 3.9,
+        # without it the memory still allocated at the end of the phase is measured instead
+        measure_peak: bool = started_tracing or hasattr(tracemalloc, "reset_peak")
+        if self.trace_memory:
+            # the peak is measured from the memory already allocated when the phase starts
+            if not started_tracing and measure_peak:
+                tracemalloc.reset_peak()
+            memory_start: int = tracemalloc.get_traced_memory()[0]
+        start: float = perf_counter()
+        try:
+            yield phase
+            phase.duration = perf_counter() - start
+            phase.peak_memory = max(0, tracemalloc.get_traced_memory()[1 if measure_peak else 0] - memory_start) if self.trace_memory else get_peak_rss()
+            self.phases.append(phase)
+        finally:
+            if started_tracing:
+                tracemalloc.stop()
+
+    def clear(self):
+        """
+        Remove the phases recorded.
+        """
+        self.phases = []
+
+    def report(self) -> str:
+        """
+        Return a table of the phases recorded, with their wall time, peak memory and counters.
+        """
+        memory: str = "peak alloc (KiB)" if self.trace_memory else "peak RSS (KiB)"
+        res: str = f"{'phase':<10} {'time (ms)':>10} {memory:>18}  counters\n"
+        for phase in self.phases:
+            counters: str = ", ".join([f"{name}: {value}" for name, value in phase.counters.items()])
+            res += f"{phase.name:<10} {phase.duration * 1000:>10.2f} {phase.peak_memory / 1024:>18.1f}  {counters}\n"
+        res += f"{'total':<10} {sum([phase.duration for phase in self.phases]) * 1000:>10.2f}"
+        return res
+
+    def get_trace_events(self) -> Dict[str, Any]:
+        """
+        Return the phases recorded in the Chrome trace event format, that can be opened with a trace viewer (chrome://tracing, Perfetto...).
+        Each phase is a complete event ('X'), its counters and peak memory are in its arguments.
+        """
+        events: List[Dict[str, Any]] = []
+        for phase in self.phases:
+            events.append({
+                "name": phase.name,
+                "cat": "parseed",
+                "ph": "X",
+                "ts": phase.start * 1e6,  # in microseconds
+                "dur": phase.duration * 1e6,
+                "pid": os.getpid(),
+                "tid": 0,
+                "args": {**phase.counters, "peak_memory": phase.peak_memory},
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write_trace(self, path: str):
+        """
+        Write the phases recorded to a JSON file in the Chrome trace event format (see get_trace_events).
+
+        :param path: Path of the file.
+        :type path: str
+        """
+        with open(path, "w") as f:
+            json.dump(self.get_trace_events(), f, indent=1)
@@ -77,3 +77,15 @@ def test_struct_member_ternary_type():
     assert member.infos.type.comparison.left_node.value == 1
     assert member.infos.type.comparison.right_node.value == 1
     assert member.infos.type.comparison.comparison_op.type == ComparisonOperatorNode.EQUAL
+
+def test_shared_nodes():
+    ast = get_AST("struct test { uint8 a, LE uint16 b, uint8 c, uint8[a] d, unknown e, } struct other { uint8 a, }")
+    members = ast[0].members
+    # the same basic data-type with the same endianness is a single node
+    assert members[0].infos is members[2].infos is ast[1].members[0].infos
+    assert members[0].infos is not members[1].infos and members[0].infos is not members[3].infos
+    assert members[0].infos.size == 1 and members[0].infos.signed == False
+    assert members[0].name is ast[1].members[0].name
+
+    for node in [ast[0], members[0], members[0].infos, members[3].infos.list_length]:
+        assert not hasattr(node, "__dict__")
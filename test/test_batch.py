@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+from batch import expand_files, get_output_path, transpile_files
+from generators.python_class import Python_Class
+import os
+
+def test_expand_files(tmp_path):
+    (tmp_path / "sub").mkdir()
+    for name in ("b.prsd", "a.prsd", "sub/c.prsd", "d.txt"):
+        (tmp_path / name).write_text("")
+    assert expand_files([str(tmp_path / "*.prsd"), str(tmp_path / "a.prsd")]) == [str(tmp_path / "a.prsd"), str(tmp_path / "b.prsd")]
+    assert expand_files([str(tmp_path / "**" / "*.prsd")]) == [str(tmp_path / name) for name in ("a.prsd", "b.prsd", "sub/c.prsd")]
+    assert expand_files(["missing.prsd", "missing/*.prsd"]) == ["missing.prsd", "missing/*.prsd"]
+
+def test_transpile_files(tmp_path):
+    files = []
+    for name, text in (("a", "struct a { uint8 x, }"), ("b", "struct b { unknown x, }"), ("c", "struct c { uint16 y, }")):
+        files.append(str(tmp_path / f"{name}.prsd"))
+        (tmp_path / f"{name}.prsd").write_text(text)
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "a.prsd").write_text("")
+    files += [str(tmp_path / "sub" / "a.prsd"), str(tmp_path / "missing.prsd")]
+    assert get_output_path(files[0], Python_Class, {}) == str(tmp_path / "a.py")
+
+    for jobs in (1, 2):
+        output_dir = tmp_path / f"out{jobs}"
+        results = transpile_files(files, Python_Class, {}, str(output_dir), jobs)
+        assert [output for _, output, _ in results[:3]] == [str(output_dir / name) for name in ("a.py", "b.py", "c.py")]
+        assert [error is None for _, _, error in results] == [True, False, True, False, False]
+        assert "already generated" in results[3][2]
+        assert sorted(os.listdir(output_dir)) == ["a.py", "c.py"]
+
+        module = {}
+        exec((output_dir / "c.py").read_text(), module)
+        assert module["c"](b"\x01\x02").y == 0x102
+
+def test_transpile_files_unexpected_errors(tmp_path):
+    for name in ("a", "c", "d"):
+        (tmp_path / f"{name}.prsd").write_text(f"struct {name} {{ uint8 x, }}")
+    (tmp_path / "latin1.prsd").write_bytes("struct b { uint8 é, }".encode("latin-1"))
+    (tmp_path / "bitfield.prsd").write_text("bitfield flags { a (3), b (5), } struct b { uint8 x, flags f, }")
+
+    # an exception that is not a Parseed error in one file does not stop the other files
+    for bad, error in (("latin1", "UnicodeDecodeError"), ("bitfield", "AttributeError")):
+        files = [str(tmp_path / f"{name}.prsd") for name in ("a", bad, "c", "d")]
+        for jobs in (1, 2):
+            results = transpile_files(files, Python_Class, {}, str(tmp_path / f"out_{bad}{jobs}"), jobs)
+            errors = [error for _, _, error in results if error is not None]
+            assert len(errors) == 1 and len(results) - len(errors) == 3
+            assert results[1][2].startswith(error)
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+from transpiler import Writer
+from generators.c_struct import C_Struct
+from generators.python_class import Python_Class
+from lexer import Lexer
+from parser import Parser
+from errors import UnsupportedFeatureError
+import shutil, struct, subprocess
+import pytest
+
+pytestmark = pytest.mark.skipif(shutil.which("cc") is None, reason="no C compiler")
+
+TEXT = """
+struct root {
+    uint8 count,
+    LE uint16 little,
+    (count == 2 ? LE : BE) uint16 either,
+    elem[count] elems,
+    (count == 2 ? uint32 : elem) value,
+    match (count) { 1: uint8, 2: uint16, } picked,
+    match (count) { 2: { uint8 a, string b, }, 3: { uint8 b, }, },
+    string name,
+    string('x') upto_x,
+    bytes("end") upto_end,
+    bytes(\\x0102) upto_int,
+    LE int128 big,
+    BE float f,
+    LE double d,
+    nested n,
+    int24 signed24,
+    uint8[] rest,
+}
+struct elem { uint8 length, uint8[length] data, }
+struct nested { uint16 x, }
+"""
+
+def get_code(text, generator, options=None):
+    writer = Writer()
+    generator(Parser(Lexer(text, "").run()).run(), options).generate(writer)
+    return writer.generate_code()
+
+def get_module(text, monkeypatch, tmp_path):
+    monkeypatch.setenv("PARSEED_BUILD_DIR", str(tmp_path))
+    module = {}
+    exec(get_code(text, C_Struct, {"ctypes": ""}), module)
+    return module
+
+def test_c_code_compiles(tmp_path):
+    path = tmp_path / "root.c"
+    path.write_text(get_code(TEXT, C_Struct))
+    subprocess.run(["cc", "-Wall", "-Werror", "-c", "-o", str(tmp_path / "root.o"), str(path)], check=True)
+
+def test_ctypes(monkeypatch, tmp_path):
+    buf = bytes([2]) + struct.pack("<H", 513) + struct.pack("<H", 7) + bytes([1, 0xaa, 2, 0xbb, 0xcc]) + struct.pack(">I", 9) + \
+          struct.pack(">H", 300) + bytes([5]) + b"bee\x00" + b"hello\x00" + b"abx" + b"12end" + b"zz\x01\x02" + \
+          (-5).to_bytes(16, "little", signed=True) + struct.pack(">f", 1.5) + struct.pack("<d", -2.25) + b"\x01\x02" + b"\xff\xff\xfe" + b"\x09\x08"
+    module = get_module(TEXT, monkeypatch, tmp_path)
+    python_module = {}
+    exec(get_code(TEXT, Python_Class), python_module)
+
+    for data in (buf, bytearray(buf), memoryview(buf)):
+        root = module["root"].parse(data)
+        expected = python_module["root"](buf)
+        for name in ("count", "little", "either", "value", "picked", "a", "b", "name", "upto_x", "upto_end", "upto_int", "big", "f", "d", "signed24", "rest", "cursor"):
+            assert getattr(root, name) == getattr(expected, name)
+        assert [elem.data for elem in root.elems] == [[0xaa], [0xbb, 0xcc]]
+        assert root.n.x == 0x102
+
+    buf = bytes([3, 0, 0, 0, 0]) + bytes([0, 1, 0xdd, 2, 0xee, 0xff]) + bytes([1, 0x11]) + bytes([6]) + b"\x00xend\x01\x02" + bytes(16 + 4 + 8 + 2 + 3)
+    root = module["root"].parse(buf)
+    assert (root.value.length, root.value.data, root.picked, root.b) == (1, [0x11], None, 6)
+    with pytest.raises(AttributeError):
+        root.a
+    with pytest.raises(ValueError, match="unexpected end of buffer at offset 1"):
+        module["root"].parse(b"\x01")
+    with pytest.raises(ValueError, match="delimiter not found"):
+        module["root"].parse(buf[:16])
+
+def test_names(monkeypatch, tmp_path):
+    module = get_module("struct test { uint8 class, uint8 int, string default, } struct other { test[] tests, }", monkeypatch, tmp_path)
+    test = module["test"].parse(b"\x01\x02abc\x00")
+    assert (getattr(test, "class"), test.int, test.default) == (1, 2, "abc")
+    other = module["other"].parse(b"\x01\x02a\x00\x03\x04b\x00")
+    tests = other.tests
+    del other  # the lists of a nested struct are kept with the struct
+    assert [(t.int, t.default) for t in tests] == [(2, "a"), (4, "b")]
+
+def test_bitfields_not_supported():
+    bitfield = "bitfield Flags { a (3), b (5), } "
+    for struct_text in ("struct S { uint8 x, Flags f, uint8 y, }", "struct S { uint8 x, (x == 1 ? Flags : uint8) f, }",
+                        "struct S { uint8 x, match (x) { 1: Flags, } f, }", "struct S { uint8 x, match (x) { 1: { Flags f, }, }, }"):
+        for options in (None, {"ctypes": ""}):
+            with pytest.raises(UnsupportedFeatureError) as e:
+                get_code(bitfield + struct_text, C_Struct, options)
+            assert e.value.details == "bitfields are not supported by C_Struct, \"Flags\" in struct S"
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+from batch import transpile_file
+from cache import TranspileCache, get_cache_key, open_if_changed, write_if_changed
+from generators.c_struct import C_Struct
+from generators.python_class import Python_Class
+import cache, os
+import pytest
+
+def test_cache_key():
+    key = get_cache_key("struct a { uint8 x, }", Python_Class, {})
+    assert key == get_cache_key("struct a { uint8 x, }", Python_Class, {})
+    assert key != get_cache_key("struct a { uint8 y, }", Python_Class, {})
+    assert key != get_cache_key("struct a { uint8 x, }", Python_Class, {"lazy": ""})
+    assert key != get_cache_key("struct a { uint8 x, }", C_Struct, {})
+    assert get_cache_key("", Python_Class, {"a": "", "b": "1"}) == get_cache_key("", Python_Class, {"b": "1", "a": ""})
+
+    version = Python_Class.VERSION
+    try:
+        Python_Class.VERSION = version + ".1"
+        assert key != get_cache_key("struct a { uint8 x, }", Python_Class, {})
+    finally:
+        Python_Class.VERSION = version
+
+def test_cache_key_core_modules(tmp_path, monkeypatch):
+    # editing a module used by every generator, like the parser, invalidates the cached code
+    (tmp_path / "core_module.py").write_text("VALUE = 1\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setattr(cache, "CORE_MODULES", cache.CORE_MODULES + ["core_module"])
+    key = get_cache_key("struct a { uint8 x, }", Python_Class, {})
+    assert key == get_cache_key("struct a { uint8 x, }", Python_Class, {})
+    (tmp_path / "core_module.py").write_text("VALUE = 22\n")
+    assert key != get_cache_key("struct a { uint8 x, }", Python_Class, {})
+
+def test_cache(tmp_path):
+    cache = TranspileCache(str(tmp_path / "cache"))
+    assert cache.get("ab12") is None
+    cache.put("ab12", "code")
+    assert cache.get("ab12") == "code"
+    assert os.listdir(tmp_path / "cache" / "ab") == ["ab12"]
+
+    output_path = tmp_path / "out.py"
+    write_if_changed(str(output_path), "code")
+    os.utime(output_path, (0, 0))
+    write_if_changed(str(output_path), "code")
+    assert output_path.stat().st_mtime == 0
+    write_if_changed(str(output_path), "other")
+    assert output_path.read_text() == "other"
+
+def test_transpile_file_cached(tmp_path):
+    file_path = tmp_path / "a.prsd"
+    file_path.write_text("struct a { uint8 x, }")
+    cache_dir = str(tmp_path / "cache")
+    assert transpile_file(str(file_path), str(tmp_path / "a.py"), Python_Class, {}, cache_dir) is None
+
+    # the cached code is used instead of generating it again
+    TranspileCache(cache_dir).put(get_cache_key(file_path.read_text(), Python_Class, {}), "cached")
+    assert transpile_file(str(file_path), str(tmp_path / "a.py"), Python_Class, {}, cache_dir) is None
+    assert (tmp_path / "a.py").read_text() == "cached"
+    assert transpile_file(str(file_path), str(tmp_path / "b.py"), Python_Class, {}) is None
+    assert (tmp_path / "b.py").read_text() != "cached"
+
+def test_open_if_changed(tmp_path):
+    output_path = tmp_path / "out.py"
+    with open_if_changed(str(output_path)) as f:
+        f.write("code")
+    assert output_path.read_text() == "code"
+    os.utime(output_path, (0, 0))
+    with open_if_changed(str(output_path)) as f:
+        f.write("code")
+    assert output_path.stat().st_mtime == 0
+
+    # the file is left unchanged if the generation fails
+    with pytest.raises(ValueError):
+        with open_if_changed(str(output_path)) as f:
+            f.write("partial")
+            raise ValueError()
+    assert output_path.read_text() == "code"
+    assert os.listdir(tmp_path) == ["out.py"]
@@ -209,3 +209,23 @@ def test_keywords():
         assert tokens[i].value == identifiers[i]
 
     assert tokens[len(identifiers)].type == TT_EOF
+
+def test_positions():
+    lexer = Lexer("struct a {\n\t// comment\n\tstring(\"x\ny\") b,\n}\n", "")
+    tokens = lexer.run()
+    positions = [(token.type, token.pos_start.ln, token.pos_start.col, token.pos_end.ln, token.pos_end.col) for token in tokens]
+    assert positions == [
+        (TT_KEYWORD, 0, 0, 0, 6), (TT_IDENTIFIER, 0, 7, 0, 8), (TT_LCURLY, 0, 9, 0, 10),
+        (TT_COMMENT, 1, 1, 1, 11),
+        (TT_DATA_TYPE, 2, 1, 2, 7), (TT_LPAREN, 2, 7, 2, 8), (TT_STRING, 2, 8, 3, 2), (TT_RPAREN, 3, 2, 3, 3), (TT_IDENTIFIER, 3, 4, 3, 5), (TT_COMMA, 3, 5, 3, 6),
+        (TT_RCURLY, 4, 0, 4, 1),
+        (TT_EOF, 5, 0, 5, 0),
+    ]
+    assert tokens[3].value == " comment"
+    assert tokens[6].value == "x\ny"
+    assert tokens[6].pos_start.get_line_text() == "\tstring(\"x"
+    assert tokens[6].pos_end.get_copy().go_to_beginning_of_line().idx == tokens[6].pos_end.idx - 2
+
+    with pytest.raises(IllegalCharacterError) as e:
+        Lexer("a\n  _", "").run()
+    assert (e.value.pos_start.ln, e.value.pos_start.col) == (1, 2)
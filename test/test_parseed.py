@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+import os, subprocess, sys
+import pytest
+
+pytest.importorskip("rich")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def run_parseed(*args):
+    return subprocess.run([sys.executable, "parseed.py", "--no-cache", *args], cwd=ROOT, capture_output=True, text=True)
+
+def test_exit_status(tmp_path):
+    (tmp_path / "good.prsd").write_text("struct good { uint8 x, }")
+    (tmp_path / "broken.prsd").write_text("struct broken { uint8 x, ")
+
+    assert run_parseed("-o", str(tmp_path / "good.py"), str(tmp_path / "good.prsd")).returncode == 0
+    assert run_parseed("-o", str(tmp_path / "broken.py"), str(tmp_path / "broken.prsd")).returncode != 0
+    assert run_parseed(str(tmp_path / "missing.prsd")).returncode != 0
+
+    # a batch where some files failed
+    result = run_parseed("-d", str(tmp_path / "out"), str(tmp_path / "good.prsd"), str(tmp_path / "broken.prsd"))
+    assert result.returncode == 1
+    assert (tmp_path / "out" / "good.py").exists()
+    assert run_parseed("-d", str(tmp_path / "out"), str(tmp_path / "good.prsd")).returncode == 0
+
+def test_cache_opt_in(tmp_path):
+    (tmp_path / "a.prsd").write_text("struct a { uint8 x, }")
+    env = {name: value for name, value in os.environ.items() if name != "PARSEED_CACHE_DIR"}
+    env["HOME"] = str(tmp_path / "home")
+    run = lambda *args, env=env: subprocess.run([sys.executable, "parseed.py", *args], cwd=ROOT, capture_output=True, text=True, env=env)
+
+    # nothing is written outside of the output by default
+    assert run("-o", str(tmp_path / "a.py"), str(tmp_path / "a.prsd")).returncode == 0
+    assert not (tmp_path / "home").exists()
+
+    assert run("--cache-dir", str(tmp_path / "cache"), "-o", str(tmp_path / "a.py"), str(tmp_path / "a.prsd")).returncode == 0
+    assert len(os.listdir(tmp_path / "cache")) == 1
+    assert run("-o", str(tmp_path / "a.py"), str(tmp_path / "a.prsd"), env={**env, "PARSEED_CACHE_DIR": str(tmp_path / "env_cache")}).returncode == 0
+    assert len(os.listdir(tmp_path / "env_cache")) == 1
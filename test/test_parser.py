@@ -77,6 +77,14 @@ def test_struct_members_with_expressions():
     assert stmts[0].members[1].infos.list_length.comparison_op.type == ComparisonOperatorNode.EQUAL
     stmts[0].to_str()
 
+    # the left part of a comparison is not parsed again after being parsed as an expression
+    parser = Parser(get_tokens("struct test { uint8 a, uint8[(a + 1) * 2 == 4] b, (a > 1 ? uint8[a < 3] : uint16) c, }"))
+    terms_indexes = []
+    term = parser.term
+    parser.term = lambda: terms_indexes.append(parser.token_index) or term()
+    parser.run()[0].to_str()
+    assert len(terms_indexes) == len(set(terms_indexes))
+
     Parser(get_tokens("struct test { uint8[1+1] member1, int16 member2, uint8[-3+24] member2, }")).run()[0].to_str()
     Parser(get_tokens("struct test { uint8[3*(2+3)] member1, int16 member2, uint8[-(-3*12)] member3, }")).run()[0].to_str()
     Parser(get_tokens("struct test { uint8 member1, int16[some_struct.member_value*2] member2, }")).run()[0].to_str()
@@ -409,6 +417,10 @@ def test_struct_member_ternary_type_errors():
         # char with len > 1
         Parser(get_tokens("struct test { (2 == 1 ? bytes('test') : uint16) test, }")).run()
 
+    with pytest.raises(InvalidSyntaxError):
+        # mixing endian and data-type
+        Parser(get_tokens("struct test { (2 == 1 ? LE : uint16) test, }")).run()
+
 
 def test_struct_members_match():
     stmts = Parser(get_tokens("struct test { match(1+1) {1: uint8,} member, }")).run()
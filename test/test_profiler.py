@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+from profiler import Profiler, count_nodes
+from lexer import Lexer
+from parser import Parser
+import json
+import pytest, tracemalloc
+
+def test_count_nodes():
+    ast = Parser(Lexer("struct a { uint8 x, uint8[x + 1] y, match (x) { 1: uint8, 2: uint16, } z, }", "").run()).run()
+    # struct, 2 declarations with their infos and delimiter, the list length (binary operation of 2 values and an operator),
+    # and the match (condition, 2 cases with their value, infos and delimiter)
+    assert count_nodes(ast) == 1 + 2 * 3 + 4 + 1 + 1 + 2 * 3
+
+def test_profiler(tmp_path):
+    profiler = Profiler(trace_memory=True)
+    with profiler.phase("lexer") as phase:
+        tokens = Lexer("struct a { uint8 x, }", "").run()
+        phase.counters["tokens"] = len(tokens)
+    with profiler.phase("parser"):
+        Parser(tokens).run()
+    with pytest.raises(ValueError):
+        with profiler.phase("failed"):
+            raise ValueError()
+    assert [phase.name for phase in profiler.phases] == ["lexer", "parser"]
+    assert profiler.phases[0].counters == {"tokens": 8}
+    assert profiler.phases[1].start >= profiler.phases[0].start + profiler.phases[0].duration
+    assert all(phase.peak_memory > 0 for phase in profiler.phases)
+    assert "tokens: 8" in profiler.report()
+
+    path = tmp_path / "trace.json"
+    profiler.write_trace(str(path))
+    events = json.loads(path.read_text())["traceEvents"]
+    assert [(event["name"], event["ph"]) for event in events] == [("lexer", "X"), ("parser", "X")]
+    assert events[0]["args"]["tokens"] == 8
+
+    # nothing is recorded when the profiler is disabled
+    profiler = Profiler(enabled=False)
+    with profiler.phase("lexer") as phase:
+        phase.counters["tokens"] = 1
+    assert profiler.phases == []
+
+def test_profiler_without_reset_peak(monkeypatch):
+    # tracemalloc.reset_peak only exists since Python 3.9
+    monkeypatch.delattr(tracemalloc, "reset_peak", raising=False)
+    profiler = Profiler(trace_memory=True)
+    with profiler.phase("temporary"):
+        len([0] * 100000)
+    assert profiler.phases[0].peak_memory >= 800000  # the peak of the tracing started for the phase
+
+    tracemalloc.start()
+    try:
+        with profiler.phase("kept"):
+            kept = [0] * 100000
+        with profiler.phase("temporary"):
+            len([0] * 100000)
+    finally:
+        tracemalloc.stop()
+    # the peak cannot be reset when already tracing, only the memory still allocated is measured
+    assert profiler.phases[1].peak_memory >= 800000 and len(kept) == 100000
+    assert profiler.phases[2].peak_memory < 800000
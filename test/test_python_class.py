@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+from transpiler import Writer
+from generators.python_class import Python_Class
+from lexer import Lexer
+from parser import Parser
+import io, struct
+import pytest
+
+def get_module(text, options=None):
+    writer = Writer()
+    Python_Class(Parser(Lexer(text, "").run()).run(), options).generate(writer)
+    module = {}
+    exec(writer.generate_code(), module)
+    return module
+
+def test_nested_struct_in_place():
+    module = get_module("struct root { uint8 a, nested n, uint8 b, } struct nested { uint16 x, uint8 y, }")
+    buf = bytes([1, 0, 2, 3, 4])
+    root = module["root"](buf)
+    assert root.a == 1
+    assert root.n.x == 2
+    assert root.n.y == 3
+    assert root.n.cursor == 4  # end offset is absolute
+    assert root.b == 4
+    assert root.cursor == 5
+
+def test_offset_and_memoryview():
+    module = get_module("struct test { uint8 a, LE uint16 b, }")
+    buf = memoryview(b"\xff\xff\x07\x01\x00")
+    test = module["test"](buf, 2)
+    assert test.a == 7
+    assert test.b == 1
+    assert test.cursor == 5
+
+def test_list_of_structs():
+    module = get_module("struct root { uint8 count, elem[count] elems, elem[] others, } struct elem { uint8 length, uint8[length] data, }")
+    buf = bytes([2, 1, 0xaa, 2, 0xbb, 0xcc, 0, 1, 0xdd])
+    root = module["root"](buf)
+    assert [e.data for e in root.elems] == [[0xaa], [0xbb, 0xcc]]
+    assert [e.data for e in root.others] == [[], [0xdd]]
+    assert root.others[1].cursor == len(buf)
+    assert root.cursor == len(buf)
+
+def test_fixed_size_members_runs():
+    module = get_module("LE struct test { uint8 a, uint16 b, BE uint16 c, int8[2] d, uint24 e, double f, BE float[2] g, }")
+    assert module["_test_0"].format == "<BH"
+    assert module["_test_1"].format == ">H2b"
+    assert module["_test_2"].format == "<d"
+    assert module["_test_3"].format == ">2f"
+
+    buf = bytes([1, 2, 0, 0, 3, 0xff, 0xfe, 4, 0, 0]) + struct.pack("<d", 1.5) + struct.pack(">2f", 2.5, -1.0)
+    test = module["test"](buf)
+    assert (test.a, test.b, test.c, test.d, test.e, test.f, test.g) == (1, 2, 3, [-1, -2], 4, 1.5, [2.5, -1.0])
+    assert test.cursor == len(buf)
+
+def test_slots():
+    module = get_module("""
+    struct test {
+        uint8 type,
+        match (type) {
+            1: uint8,
+            2: uint16,
+        } value,
+        match (type) {
+            1: { uint8 a, uint8 b, },
+            2: { uint8 b, uint16 c, },
+        },
+    }""")
+    assert module["test"].__slots__ == ("cursor", "type", "value", "a", "b", "c")
+
+    test = module["test"](bytes([1, 2, 3, 4]))
+    assert not hasattr(test, "__dict__")
+    assert (test.value, test.a, test.b) == (2, 3, 4)
+    assert not hasattr(test, "c")
+
+    test = module["test"](bytes([2, 0, 2, 3, 0, 4]))
+    assert (test.value, test.b, test.c) == (2, 3, 4)
+    assert not hasattr(test, "a")
+    assert "c = 4" in str(test)
+
+def test_lazy():
+    text = "struct test { uint8 a, string name, uint16 b, nested n, uint8[a] c, uint8 d, } struct nested { uint8 x, }"
+    buf = b"\x02abc\x00\x00\x03\x04\x05\x06\x07"
+    module = get_module(text, {"lazy": ""})
+    test = module["test"](buf)
+    assert test.d == 7  # needs the end of 'name' and 'c', but 'b' and 'n' have a fixed size
+    assert hasattr(test, "_name") and hasattr(test, "_c")
+    assert not hasattr(test, "_b") and not hasattr(test, "_n")
+    assert test.cursor == len(buf)
+
+    eager = get_module(text)["test"](buf)
+    for name in ("a", "b", "name", "c", "d", "cursor"):
+        assert getattr(test, name) == getattr(eager, name)
+    assert test.n.x == eager.n.x == 4
+    assert str(test) == str(eager)
+
+def test_from_stream():
+    text = """
+    struct root { uint8 count, elem[count] elems, LE (count == 2 ? uint16 : uint8) value, string name, bytes("ab") raw, elem[] others, }
+    struct elem { uint8 length, uint8[length] data, }
+    """
+    buf = bytes([2, 1, 0xaa, 2, 0xbb, 0xcc, 3, 0]) + b"name\x00xyzab" + bytes([0, 1, 0xdd])
+    for options in (None, {"lazy": ""}):
+        module = get_module(text, options)
+        root = module["root"].from_stream(io.BytesIO(buf))
+        assert [e.data for e in root.elems] == [[0xaa], [0xbb, 0xcc]]
+        assert (root.value, root.name, root.raw) == (3, "name", b"xyz")
+        assert not isinstance(root.others, list)  # elements are read one at a time
+        assert [e.data for e in root.others] == [[], [0xdd]]
+
+    stream = io.BytesIO(buf[:-1])
+    with pytest.raises(EOFError):
+        list(module["root"].from_stream(stream).others)
+
+def test_from_file(tmp_path):
+    text = "struct root { uint8 length, string name, elem[length] elems, } struct elem { LE uint16 value, }"
+    path = tmp_path / "root.bin"
+    path.write_bytes(b"\x02abc\x00\x01\x00\x02\x00")
+    for options in (None, {"lazy": ""}):
+        root = get_module(text, options)["root"].from_file(str(path))
+        assert (root.name, [e.value for e in root.elems]) == ("abc", [1, 2])
+        assert root.cursor == 9
+
+    path.write_bytes(b"")
+    with pytest.raises(struct.error):
+        get_module(text)["root"].from_file(str(path))
+
+def test_delimiters():
+    module = get_module("""
+    struct test { string a, string('x') b, string("end") c, bytes(\\x0102) d, bytes(0) e, }
+    """)
+    buf = b"abc\x00defxghiendjk\x01\x02lm\x00"
+    for data in (buf, bytearray(buf), memoryview(buf)):
+        test = module["test"](data)
+        assert (test.a, test.b, test.c, test.d, test.e) == ("abc", "def", "ghi", b"jk", b"lm")
+        assert test.cursor == len(buf)
+
+    with pytest.raises(ValueError, match="not found after offset 18"):
+        module["test"](buf[:-1])
+
+def test_member_delimiters(tmp_path):
+    # a delimiter taken from a member is a number, it is searched as a single byte
+    text = "struct test { uint8 sep, string(sep) name, bytes(sep) data, uint8 end, }"
+    buf = b",abc,de,\x07"
+    path = tmp_path / "test.bin"
+    path.write_bytes(buf)
+    for options in (None, {"lazy": ""}):
+        module = get_module(text, options)
+        for test in (module["test"](buf), module["test"](memoryview(buf)), module["test"].from_file(str(path)),
+                     module["test"].from_stream(io.BufferedReader(io.BytesIO(buf)))):
+            assert (test.name, test.data, test.end) == ("abc", b"de", 7)
+
+def test_numpy():
+    numpy = pytest.importorskip("numpy")
+    text = """
+    struct root { uint16 count, entry[2] entries, LE uint16[count] values, }
+    LE struct entry { uint8 type, BE uint16 id, float[2] point, }
+    struct not_fixed { string name, }
+    """
+    module = get_module(text, {"numpy": ""})
+    assert module["entry"].DTYPE.itemsize == 11
+    assert not hasattr(module["root"], "DTYPE")  # the length of 'values' is not constant
+    assert not hasattr(module["not_fixed"], "array_from_buffer")
+
+    entries = struct.pack("<B", 1) + struct.pack(">H", 2) + struct.pack("<2f", 0.5, 1.5) + \
+              struct.pack("<B", 3) + struct.pack(">H", 4) + struct.pack("<2f", 2.5, 3.5)
+    buf = b"\x00\x03" + entries + struct.pack("<3H", 5, 6, 7)
+    root = module["root"](buf)
+    assert list(root.entries["id"]) == [2, 4]
+    assert root.entries["point"][1].tolist() == [2.5, 3.5]
+    assert root.values.tolist() == [5, 6, 7]
+    assert root.cursor == len(buf)
+    assert module["root"].from_stream(io.BytesIO(buf)).values.tolist() == [5, 6, 7]
+
+    array = module["entry"].array_from_buffer(entries * 3, cursor=11)
+    assert array["type"].tolist() == [3, 1, 3, 1, 3]
+
+def test_parse_many():
+    text = """
+    struct root { uint8 count, entry[count] entries, }
+    LE struct entry { uint8 type, uint16[2] point, }
+    LE struct mixed { uint8 a, uint24 b, BE uint16 c, }
+    """
+    for options in (None, {"lazy": ""}):
+        module = get_module(text, options)
+        assert not hasattr(module["root"], "parse_many")  # not a fixed size
+        assert not hasattr(module["root"], "SIZE") and module["entry"].SIZE == 5
+
+        entries = struct.pack("<B2H", 1, 2, 3) + struct.pack("<B2H", 4, 5, 6)
+        columns = module["entry"].parse_many(b"\xff" + entries, 2, 1)
+        assert columns["type"].tolist() == [1, 4]
+        assert columns["point"] == [[2, 3], [5, 6]]
+        assert module["entry"].parse_many(memoryview(entries))["type"].tolist() == [1, 4]
+        with pytest.raises(struct.error):
+            module["entry"].parse_many(entries, 3)
+        stream = io.BufferedReader(io.BytesIO(entries))
+        assert [module["entry"].from_stream(stream).point for _ in range(2)] == [[2, 3], [5, 6]]
+
+        buf = bytes([1, 2, 0, 0, 0, 3, 4, 5, 0, 0, 0, 6])
+        columns = module["mixed"].parse_many(buf)
+        assert (columns["a"].tolist(), columns["b"], columns["c"].tolist()) == ([1, 4], [2, 5], [3, 6])
+
+def test_index(tmp_path):
+    text = """
+    struct capture { uint8 count, record[count] records, record[] others, }
+    struct record {
+        uint8 type,
+        uint8 length,
+        uint8[length] data,
+        string name,
+        (type == 1 ? uint16 : entry) value,
+        match (type) { 1: { uint8 a, }, 2: { uint16 b, }, },
+        entry[length] entries,
+    }
+    struct entry { uint8 size, uint8[size] raw, }
+    """
+    records = [bytes([1, 2, 0xaa, 0xbb]) + b"n\x00" + b"\x00\x05" + b"\x07" + b"\x01\x00" * 2,
+               bytes([2, 0]) + b"\x00" + b"\x01x" + b"\x00\x08",
+               bytes([3, 1, 0xcc]) + b"abc\x00" + b"\x01y" + b"\x02zz"]
+    buf = bytes([2]) + b"".join(records) + records[0]
+    offsets = [1, 1 + len(records[0]), 1 + len(records[0]) + len(records[1]), len(buf) - len(records[0])]
+
+    for options in (None, {"lazy": ""}):
+        module = get_module(text, options)
+        capture = module["capture"](buf)
+        assert module["capture"]._skip(buf) == capture.cursor == len(buf)
+        assert module["record"].build_index(buf, 1).tolist() == offsets
+        assert module["record"].build_index(buf, 1, 2).tolist() == offsets[:2]
+        assert module["capture"].index_records(buf).tolist() == offsets[:2]
+        assert module["capture"].index_others(buf).tolist() == offsets[2:]
+
+        index = module["record"].build_index(buf, 1)
+        path = tmp_path / "capture.idx"
+        module["save_index"](index, str(path))
+        assert path.stat().st_size == 8 * len(index)
+        index = module["load_index"](str(path))
+        records_ = module["record"].from_index(buf, index)
+        assert len(records_) == 4
+        assert (records_[2].name, records_[2].value.raw) == ("abc", [ord("y")])
+        assert [record.type for record in records_[1:3]] == [2, 3]
+        assert records_[-1].data == [0xaa, 0xbb]
+
+def test_streaming_writer():
+    text = "struct a { uint8 x, LE uint16 y, b z, } struct b { BE uint32 x, uint8[x] y, }"
+    writer = Writer()
+    Python_Class(Parser(Lexer(text, "").run()).run()).generate(writer)
+    stream = io.StringIO()
+    streaming_writer = Writer(stream)
+    Python_Class(Parser(Lexer(text, "").run()).run()).generate(streaming_writer)
+    streaming_writer.flush()
+    assert stream.getvalue() == writer.generate_code()
+
+def test_keyword_member_names():
+    module = get_module("struct test { uint8 class, uint8[class] def, }")
+    test = module["test"](bytes([2, 7, 8]))
+    assert test.class_ == 2
+    assert test.def_ == [7, 8]
+    assert "class = 2" in str(test)
+
+def test_expressions():
+    module = get_module("struct test { uint8 a, uint8 b, uint8[(a + b) * 2] c, uint8[(a - 1) / 2] d, uint8[-(0 - a) << 1 >> 1] e, }")
+    test = module["test"](bytes([3, 1]) + bytes(range(8)) + b"\xaa" + b"\xbb\xcc\xdd")
+    assert test.c == list(range(8))
+    assert test.d == [0xaa]
+    assert test.e == [0xbb, 0xcc, 0xdd]
@@ -1,9 +1,9 @@
 #!/usr/bin/env python3
-from transpiler import ParseedOutputGenerator
+from transpiler import ParseedOutputGenerator, Writer
 from lexer import Lexer
 from parser import Parser
 from errors import *
-import pytest
+import io, pytest
 
 def get_AST(text):
     tokens = Lexer(text, "").run()
@@ -80,6 +80,18 @@ def test_duplicate_structs_and_bitfields():
     with pytest.raises(DuplicateStructOrBitfieldError):
         TranspilerTest(get_AST("struct some_name { } bitfield some_name { }"))
 
+    with pytest.raises(DuplicateStructOrBitfieldError) as e:
+        TranspilerTest(get_AST("bitfield some_name { } struct other { } struct some_name { }"))
+    assert len(e.value.pos_start) == 2
+
+def test_symbols():
+    transpiler = TranspilerTest(get_AST("struct a { b x, c y, } struct b { uint8 x, } bitfield c { x, }"))
+    assert transpiler.get_struct_by_name("b") is transpiler.structs[1]
+    assert transpiler.get_bitfield_by_name("c") is transpiler.bitfields[0]
+    assert transpiler.get_struct_by_name("c") is None and transpiler.get_bitfield_by_name("a") is None
+    assert transpiler.is_member_type_struct("b") and not transpiler.is_member_type_struct("c")
+    assert not transpiler.is_member_type_struct("uint8")
+
 
 def test_nested_structs():
     # just to check if there is an error thrown when using nested structs
@@ -94,7 +106,65 @@ def test_nested_structs():
     with pytest.raises(RecursiveStructError):
         TranspilerTest(get_AST("struct root_struct { nested_struct_1 test, } struct nested_struct_1 { nested_struct_2 should_not_work, } struct nested_struct_2 { root_struct should_not_work , }"))
 
+def test_recursive_structs_cycles():
+    # every recursion is reported, with its path
+    with pytest.raises(RecursiveStructError) as e:
+        TranspilerTest(get_AST("""struct a { b x, } struct b { c x, uint8[2] y, } struct c { a x, }
+                                  struct d { d[2] x, } struct e { a x, (x == 1 ? e : uint8) y, }"""))
+    assert e.value.details == "a -> b -> c -> a, d -> d"
+
+    # ternary data-types can be the base case of a recursion
+    TranspilerTest(get_AST("struct a { uint8 x, (x == 1 ? b : uint8) y, } struct b { a x, }"))
+
+def test_dependency_order():
+    tt = TranspilerTest(get_AST("""struct root { a x, b y, b z, (1 == 1 ? c : uint8) w, }
+                                   struct a { b x, } struct b { uint8 x, } struct c { uint8 x, }"""))
+    assert [s.name for s in tt.get_struct_dependencies("root")] == ["a", "b"]
+    assert tt.get_struct_dependencies("b") == []
+    assert [s.name for s in tt.get_structs_in_dependency_order()] == ["b", "a", "root", "c"]
+
+    # deep nesting does not reach the recursion limit
+    depth = 5000
+    tt = TranspilerTest(get_AST(" ".join([f"struct s{i} {{ s{i + 1} x, }}" for i in range(depth)]) + f" struct s{depth} {{ uint8 x, }}"))
+    assert tt.get_structs_in_dependency_order()[0].name == f"s{depth}"
+    assert tt.get_struct_size("s0") == 1
+
 def unknwon_types():
     with pytest.raises(UnknownTypeError):
         # unknown struct in ternary data-type
-        Parser(get_tokens("struct test { (1 == 1 ? Unknown_Struct : uint8) some_member, }")).run()
\ No newline at end of file
+        Parser(get_tokens("struct test { (1 == 1 ? Unknown_Struct : uint8) some_member, }")).run()
+
+def test_layouts():
+    tt = TranspilerTest(get_AST("""
+    struct root { uint8 a, nested[2] n, uint24 b, string name, uint8 c, }
+    struct nested { uint16 x, (x == 1 ? uint32 : int32) y, }
+    struct not_fixed { uint8 length, uint8[length] data, (length == 1 ? uint8 : uint16) value, }
+    struct recursive { uint8 a, (a == 0 ? uint8 : recursive) next, }
+    """))
+    assert tt.get_struct_size("nested") == 6
+    assert tt.get_struct_size("root") is None
+    assert tt.get_struct_size("not_fixed") is None
+    assert tt.get_struct_size("recursive") is None
+    assert tt.get_struct_size("unknown") is None
+    assert tt.get_member_size(tt.structs[0].members[1]) == 12
+
+    assert [tt.get_member_offset("root", name) for name in ("a", "n", "b", "name", "c")] == [0, 1, 13, 16, None]
+    assert tt.get_member_offset("nested", "y") == 2
+    assert tt.get_member_offset("not_fixed", "data") == 1
+    assert tt.get_member_offset("not_fixed", "value") is None
+
+def test_streaming_writer():
+    stream = io.StringIO()
+    writer = Writer(stream)
+    cb = writer.add_block()
+    cb.add_line("a")
+    cb = cb.add_block()
+    cb.add_line("b")
+    cb.add_block().add_line("c")
+    assert stream.getvalue() == ""
+    # a root block is written once the next one is added
+    writer.add_block().add_line("d")
+    assert stream.getvalue() == "a\n\tb\n\t\tc\n"
+    writer.flush()
+    assert stream.getvalue() == "a\n\tb\n\t\tc\n\nd\n"
+    assert writer.blocks == []
@@ -71,11 +71,11 @@ def start_test_generator(generator_class: ParseedOutputGenerator, output_dir: st
     parser = Parser(lexer.run())
     ast = parser.run()
 
-    writer = Writer()
-    generator_class(ast).generate(writer)
-
+    generator = generator_class(ast)
     with open(output_dir + os.sep + output_name, "w") as f:
-        f.write(writer.generate_code())
+        writer = Writer(f)
+        generator.generate(writer)
+        writer.flush()
     
     generate_binary_test_file(output_dir)
 
@@ -1,8 +1,9 @@
 #!/usr/bin/env python3
-from typing import Any, List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Set, TextIO, Tuple, Union
+from io import StringIO
 from lexer import Token
 from abc import ABC, abstractmethod
-from ast_nodes import BitfieldDefNode, StructDefNode, StructMemberDeclareNode, TernaryDataTypeNode
+from ast_nodes import BitfieldDefNode, IntNumberNode, MatchNode, StructDefNode, StructMemberDeclareNode, StructMemberInfoNode, TernaryDataTypeNode
 from errors import *
 from utils import DATA_TYPES
 
@@ -13,16 +14,23 @@ class CodeBlock:
     This class can be viewed as a stack, you can push with add_block and pop with end_block.
     It helps with the formatting of the generated code.
     """
+
+    # indentation of each depth, shared by every block
+    INDENTS: List[str] = [""]
+
     def __init__(self, depth: int, parent):
         self.text: List = []
         self.depth: int = depth
         self.parent: CodeBlock = parent
+        while len(CodeBlock.INDENTS) <= depth:
+            CodeBlock.INDENTS.append(CodeBlock.INDENTS[-1] + "\t")
+        self.indent: str = CodeBlock.INDENTS[depth]
 
     def add_line(self, line: str) -> None:
         """
         Add a line in this block of code. The line will be automatically indented.
         """
-        self.text.append(("\t" * self.depth) + line + "\n")
+        self.text.append(self.indent + line + "\n")
 
     def add_empty_line(self) -> None:
         """
@@ -45,11 +53,26 @@ class CodeBlock:
         """
         return self.parent
 
+    def write(self, stream: TextIO) -> None:
+        """
+        Write this block's code and blocks' code above to a stream, without joining them in one string.
+
+        :param stream: Stream to write to.
+        :type stream: TextIO
+        """
+        for part in self.text:
+            if isinstance(part, CodeBlock):
+                part.write(stream)
+            else:
+                stream.write(part)
+
     def __str__(self) -> str:
         """
         Generate and return this block's code and blocks' code above.
         """
-        return "".join([str(block) for block in self.text])
+        res: StringIO = StringIO()
+        self.write(res)
+        return res.getvalue()
 
 
 class Writer:
@@ -58,22 +81,48 @@ class Writer:
     It can be seen as a stack of CodeBlock.
     Each CodeBlock represents a part of code with a certain depth (=indentation).
     This class keeps a list of CodeBlock that are root block (depth=0).
+
+    If a stream is given, the code is not kept in memory: a root block is written to the stream as soon as
+    the next root block is added, so a generator must not change a root block after adding another one.
+    The last root block is written by 'flush', which must be called once the code is generated.
     """
-    def __init__(self):
+    def __init__(self, stream: Optional[TextIO] = None):
+        """
+        :param stream: Stream where the root blocks are written, the code is kept in memory if None, defaults to None.
+        :type stream: Optional[TextIO]
+        """
         self.text = ""
         self.blocks: List[CodeBlock] = []
+        self.stream: Optional[TextIO] = stream
+        self.__blocks_written: bool = False
 
     def add_block(self) -> CodeBlock:
         """
         Create a new root code block and returns it.
         """
+        if self.stream is not None:
+            self.flush()
         res: CodeBlock = CodeBlock(0, None)
         self.blocks.append(res)
         return res
 
+    def flush(self) -> None:
+        """
+        Write the root blocks not written yet to the stream, if a stream was given.
+        """
+        if self.stream is None:
+            return
+        for block in self.blocks:
+            if self.__blocks_written:
+                self.stream.write("\n")
+            block.write(self.stream)
+            self.__blocks_written = True
+        self.blocks = []
+
     def generate_code(self) -> str:
         """
         Return the full generated code from root blocks.
+        If a stream was given, only the root blocks not written yet are returned.
         """
         return "\n".join([str(block) for block in self.blocks])
 
@@ -90,17 +139,61 @@ class ParseedOutputGenerator(ABC):
     """
     PYGMENT_HIGHLIGHTER: str = ""
 
-    def __init__(self, ast: List[Any]):
+    """
+    Extension of the files generated, used when transpiling multiple files at once (see get_file_extension).
+    """
+    FILE_EXTENSION: str = ""
+
+    """
+    Version of the generator, must be changed when the code generated changes, to invalidate the cached code.
+    """
+    VERSION: str = "1"
+
+    """
+    Options accepted by this generator, with their description.
+    Options are given in the command line with '--option NAME' or '--option NAME=VALUE'.
+    """
+    OPTIONS: Dict[str, str] = {}
+
+    def __init__(self, ast: List[Any], options: Optional[Dict[str, str]] = None):
+        """
+        :param ast: List of nodes returned by the parser.
+        :type ast: List[Any]
+        :param options: Options given to this generator with their value (an empty string if no value was given), defaults to None.
+        :type options: Optional[Dict[str, str]]
+        """
         self.structs: List[StructDefNode] = []
         self.bitfields: List[BitfieldDefNode] = []
+        self.options: Dict[str, str] = options if options is not None else {}
+        self.__structs_by_name: Dict[str, StructDefNode] = {}
+        self.__bitfields_by_name: Dict[str, BitfieldDefNode] = {}
+        self.__structs_sizes: Dict[str, Optional[int]] = {}
+        self.__members_offsets: Dict[str, Dict[str, int]] = {}
+        self.__dependencies: Dict[str, List[StructDefNode]] = {}
+        self.__structs_in_dependency_order: List[StructDefNode] = []
         self.__init_intermediate_ast(ast)
+        self.__init_layouts()
+
+    @classmethod
+    def get_file_extension(cls, options: Dict[str, str]) -> str:
+        """
+        Return the extension of the files generated with some options, FILE_EXTENSION by default.
+
+        :param options: Options given to this generator with their value.
+        :type options: Dict[str, str]
+        """
+        return cls.FILE_EXTENSION
 
     @abstractmethod
     def generate(self, writer: Writer):
         """
         This method is where the code will be generated.
-        An instance of the Writer class is given in parameter and should be filled with the generated code.
-        You can access the list of struct and bitfields from the 'self.structs' and 'self.bitfields' attributes.
+        An instance of the Writer class is given in parameter and should be filled with the generated code,
+        root blocks may be written as soon as the next one is added so they must be filled in order.
+        You can access the list of struct and bitfields from the 'self.structs' and 'self.bitfields' attributes,
+        and the options given by the user from the 'self.options' attribute.
+        Sizes and offsets known before parsing are given by 'get_struct_size', 'get_member_size' and 'get_member_offset',
+        and the structs contained by each struct by 'get_struct_dependencies' and 'get_structs_in_dependency_order'.
         This abstract method must be defined in the child class, and it will be called automatically.
         """
         pass
@@ -116,7 +209,7 @@ class ParseedOutputGenerator(ABC):
             elif isinstance(node, StructDefNode):
                 self.structs.append(node)
 
-        self.__check_duplicate_structs_and_bitfields()
+        self.__init_symbols()
 
         # verify that everything is correct
         # unknown types
@@ -130,9 +223,50 @@ class ParseedOutputGenerator(ABC):
                     self.__check_unknown_type(struct, member)
 
         # if there is no unknown types, now we can check for recursive structs
+        self.__init_dependencies()
+
+    def __init_layouts(self):
+        """
+        Compute the size of each struct if it is constant,
+        and the offset of its members up to the first member with a size not known before parsing.
+        This function MUST NOT be called in the 'generate' method, as it only used in the constructor.
+        """
+        # contained structs come first, so their size is already known
+        for struct in self.__structs_in_dependency_order:
+            self.__compute_struct_size(struct)
+
         for struct in self.structs:
+            offset: Optional[int] = 0
+            offsets: Dict[str, int] = {}
             for member in struct.members:
-                self.__verify_recursive_struct_member(member, [])
+                if offset is None:
+                    break
+                if isinstance(member, StructMemberDeclareNode):
+                    offsets[member.name] = offset
+                elif member.member_name is not None:
+                    offsets[member.member_name] = offset
+                size: Optional[int] = self.get_member_size(member)
+                offset = offset + size if size is not None else None
+            self.__members_offsets[struct.name] = offsets
+
+    def __compute_struct_size(self, struct: StructDefNode) -> Optional[int]:
+        """
+        Compute and store the size of a struct, or None if it depends on the parsed data.
+        """
+        if struct.name in self.__structs_sizes:
+            return self.__structs_sizes[struct.name]
+        # a struct can only contain itself through a ternary operator, its size is then not constant
+        self.__structs_sizes[struct.name] = None
+
+        size: Optional[int] = 0
+        for member in struct.members:
+            member_size: Optional[int] = self.get_member_size(member)
+            if member_size is None:
+                size = None
+                break
+            size += member_size
+        self.__structs_sizes[struct.name] = size
+        return size
 
     def __check_unknown_type(self, struct, member):
         # check for unknown types
@@ -152,63 +286,111 @@ class ParseedOutputGenerator(ABC):
         """
         Check if a struct contains multiple members with the same name.
         """
-        tmp = []
+        names = set()
         for member in struct.members:
             if not isinstance(member, StructMemberDeclareNode):
                 # TODO
                 continue
-            if member.name in tmp:
+            if member.name in names:
                 members = [m for m in struct.members if m.name == member.name]
                 raise DuplicateMemberError(members, struct.name)
-            tmp.append(member.name)
+            names.add(member.name)
 
-    def __check_duplicate_structs_and_bitfields(self):
+    def __init_symbols(self):
         """
-        Check if some structs or bitfields share the same name.
+        Build the tables of structs and bitfields by name used by 'get_struct_by_name' and 'get_bitfield_by_name',
+        and check if some structs or bitfields share the same name.
+        This function MUST NOT be called in the 'generate' method, as it only used in the _init_intermediate_ast method.
         """
-        tmp = []
-        # check in structs
-        for struct in self.structs:
-            if struct.name in tmp:
-                nodes = [s for s in self.structs if s.name == struct.name] + \
-                        [b for b in self.bitfields if b.name == struct.name]
+        for node in self.structs + self.bitfields:
+            if node.name in self.__structs_by_name or node.name in self.__bitfields_by_name:
+                nodes = [s for s in self.structs if s.name == node.name] + \
+                        [b for b in self.bitfields if b.name == node.name]
                 raise DuplicateStructOrBitfieldError(nodes)
-            tmp.append(struct.name)
-        # check in bitfields
-        for bitfield in self.bitfields:
-            if bitfield.name in tmp:
-                nodes = [s for s in self.structs if s.name == bitfield.name] + \
-                        [b for b in self.bitfields if b.name == bitfield.name]
-                raise DuplicateStructOrBitfieldError(nodes)
-            tmp.append(bitfield.name)
+            if isinstance(node, StructDefNode):
+                self.__structs_by_name[node.name] = node
+            else:
+                self.__bitfields_by_name[node.name] = node
 
-    def __verify_recursive_struct_member(self, visited_member, structs_stack):
+    def __init_dependencies(self):
         """
-        Verify if a struct is using itself in one of its members.
-        A stack containing the visited structs is used.
-        If the same struct appears twice in the stack, it means there is a recursion.
+        Build the graph of the structs contained by each struct, and sort the structs with Tarjan's algorithm in one pass.
+        Structs in a ternary operator or a match are not contained, as they can be the base case of a recursive struct.
+        A group of structs containing each other, or a struct containing itself, is a recursion:
+        every recursion found is reported at once.
         This function MUST NOT be called in the 'generate' method, as it only used in the _init_intermediate_ast method.
         """
-        if not isinstance(visited_member, StructMemberDeclareNode):
-            # TODO
-            return
-        elif isinstance(visited_member.infos.type, TernaryDataTypeNode):
-            # ternary operator can contain a base case for a recursive struct
-            # so we don't need to check anything here and we can just leave
-            return
-
-        if visited_member.infos.type in DATA_TYPES:  # base case, cannot visit native data types as they are not structs
-            return
-        elif self.get_bitfield_by_name(visited_member.infos.type) is not None:  # base case too as bitfields don't have members with types
-            return
-        elif visited_member.infos.type in structs_stack:
-            raise RecursiveStructError([self.get_struct_by_name(s) for s in structs_stack])
-
-        structs_stack.append(visited_member.infos.type)
-
-        for member in self.get_struct_by_name(visited_member.infos.type).members:
-            self.__verify_recursive_struct_member(member, structs_stack)
-        structs_stack.pop()
+        for struct in self.structs:
+            dependencies: Dict[str, StructDefNode] = {}
+            for member in struct.members:
+                if isinstance(member, StructMemberDeclareNode) and isinstance(member.infos.type, str) and self.is_member_type_struct(member.infos.type):
+                    dependencies.setdefault(member.infos.type, self.get_struct_by_name(member.infos.type))
+            self.__dependencies[struct.name] = list(dependencies.values())
+
+        # the graph is walked without recursion, so deeply nested structs do not reach Python's recursion limit
+        index: Dict[str, int] = {}
+        lowlink: Dict[str, int] = {}
+        stack: List[StructDefNode] = []
+        on_stack: Set[str] = set()
+        cycles: List[List[StructDefNode]] = []
+        for root in self.structs:
+            if root.name in index:
+                continue
+            index[root.name] = lowlink[root.name] = len(index)
+            stack.append(root)
+            on_stack.add(root.name)
+            # structs being visited, with the iterator over their dependencies left to visit
+            visiting: List[Tuple[StructDefNode, Iterator[StructDefNode]]] = [(root, iter(self.__dependencies[root.name]))]
+            while len(visiting) > 0:
+                struct, dependencies = visiting[-1]
+                for dependency in dependencies:
+                    if dependency.name not in index:
+                        index[dependency.name] = lowlink[dependency.name] = len(index)
+                        stack.append(dependency)
+                        on_stack.add(dependency.name)
+                        visiting.append((dependency, iter(self.__dependencies[dependency.name])))
+                        break
+                    elif dependency.name in on_stack:
+                        lowlink[struct.name] = min(lowlink[struct.name], index[dependency.name])
+                else:
+                    visiting.pop()
+                    if len(visiting) > 0:
+                        parent: StructDefNode = visiting[-1][0]
+                        lowlink[parent.name] = min(lowlink[parent.name], lowlink[struct.name])
+                    if lowlink[struct.name] == index[struct.name]:
+                        # struct is the first visited struct of a strongly connected component
+                        component: List[StructDefNode] = []
+                        while len(component) == 0 or component[-1] is not struct:
+                            component.append(stack.pop())
+                            on_stack.discard(component[-1].name)
+                        component.reverse()
+                        if len(component) > 1 or struct in self.__dependencies[struct.name]:
+                            cycles.append(self.__find_cycle(component))
+                        self.__structs_in_dependency_order += component
+
+        if len(cycles) > 0:
+            raise RecursiveStructError(cycles)
+
+    def __find_cycle(self, component: List[StructDefNode]) -> List[StructDefNode]:
+        """
+        Return the shortest path from the first struct of a strongly connected component back to itself.
+        This function MUST NOT be called in the 'generate' method, as it only used in the __init_dependencies method.
+        """
+        start: StructDefNode = component[0]
+        names: Set[str] = {struct.name for struct in component}
+        parents: Dict[str, StructDefNode] = {}
+        queue: List[StructDefNode] = [start]
+        for struct in queue:  # breadth-first search, queue grows while being iterated
+            for dependency in self.__dependencies[struct.name]:
+                if dependency is start:
+                    path: List[StructDefNode] = [struct]
+                    while path[-1] is not start:
+                        path.append(parents[path[-1].name])
+                    return path[::-1] + [start]
+                if dependency.name in names and dependency.name not in parents:
+                    parents[dependency.name] = struct
+                    queue.append(dependency)
+        return [start, start]  # not reached, every struct of a component is in a cycle
 
     def get_struct_by_name(self, name: str) -> Optional[StructDefNode]:
         """
@@ -217,10 +399,7 @@ class ParseedOutputGenerator(ABC):
         :param name: Name of the struct to find
         :type name: str
         """
-        struct_res = [struct for struct in self.structs if struct.name == name]
-        if len(struct_res) == 0:
-            return None
-        return struct_res[0]
+        return self.__structs_by_name.get(name)
 
     def get_bitfield_by_name(self, name: str) -> Optional[BitfieldDefNode]:
         """
@@ -229,10 +408,7 @@ class ParseedOutputGenerator(ABC):
         :param name: Name of the bitfield to find
         :type name: str
         """
-        bitfield_res = [bitfield for bitfield in self.bitfields if bitfield.name == name]
-        if len(bitfield_res) == 0:
-            return None
-        return bitfield_res[0]
+        return self.__bitfields_by_name.get(name)
 
     def is_member_type_struct(self, type_: str) -> bool:
         """
@@ -241,4 +417,84 @@ class ParseedOutputGenerator(ABC):
         :param name: member
         :type name: str
         """
-        return type_ in [struct.name for struct in self.structs]
\ No newline at end of file
+        return type_ in self.__structs_by_name
+
+    def get_struct_dependencies(self, name: str) -> List[StructDefNode]:
+        """
+        Returns the structs contained by a struct, which are the types of its members that are not in a ternary operator or a match.
+
+        :param name: Name of the struct
+        :type name: str
+        """
+        return list(self.__dependencies.get(name, []))
+
+    def get_structs_in_dependency_order(self) -> List[StructDefNode]:
+        """
+        Returns the structs in an order where a struct comes after the structs it contains (see get_struct_dependencies),
+        and in the order they were declared otherwise.
+        """
+        return list(self.__structs_in_dependency_order)
+
+    def get_struct_size(self, name: str) -> Optional[int]:
+        """
+        Returns the size in bytes of a struct if it is known before parsing, None otherwise.
+
+        :param name: Name of the struct
+        :type name: str
+        """
+        if name not in self.__structs_sizes:
+            struct: Optional[StructDefNode] = self.get_struct_by_name(name)
+            if struct is None:
+                return None
+            return self.__compute_struct_size(struct)
+        return self.__structs_sizes[name]
+
+    def get_member_size(self, member: Union[StructMemberDeclareNode, MatchNode]) -> Optional[int]:
+        """
+        Returns the size in bytes of a struct's member if it is known before parsing, None otherwise.
+        The size of a match is never known, as no case could match.
+
+        :param member: Member of a struct
+        :type member: Union[StructMemberDeclareNode, MatchNode]
+        """
+        if isinstance(member, MatchNode):
+            return None
+        return self.get_infos_size(member.infos)
+
+    def get_infos_size(self, infos: StructMemberInfoNode) -> Optional[int]:
+        """
+        Returns the size in bytes of a member's type if it is known before parsing, None otherwise.
+        The size of a ternary data-type is known only if both data-types have the same size.
+        Strings, bytes and bitfields never have a known size.
+
+        :param infos: Type of the member
+        :type infos: StructMemberInfoNode
+        """
+        count: int = 1
+        if infos.is_list:
+            if not isinstance(infos.list_length, IntNumberNode):
+                return None
+            count = infos.list_length.value
+
+        size: Optional[int] = None
+        if isinstance(infos.type, TernaryDataTypeNode):
+            size = self.get_infos_size(infos.type.if_true)
+            if size != self.get_infos_size(infos.type.if_false):
+                return None
+        elif self.is_member_type_struct(infos.type):
+            size = self.get_struct_size(infos.type)
+        elif infos.is_basic_type() and not infos.is_string() and not infos.is_bytes():
+            size = infos.size
+        return count * size if size is not None else None
+
+    def get_member_offset(self, struct_name: str, member_name: str) -> Optional[int]:
+        """
+        Returns the offset in bytes of a member from the start of its struct if it is known before parsing, None otherwise.
+        Offsets are known for all members up to the first one whose size is not known before parsing.
+
+        :param struct_name: Name of the struct
+        :type struct_name: str
+        :param member_name: Name of the member
+        :type member_name: str
+        """
+        return self.__members_offsets.get(struct_name, {}).get(member_name)
@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
-from typing import List
+from typing import List, Optional
+from bisect import bisect_right
 from enum import Enum
 
 
@@ -29,32 +30,105 @@ DATA_TYPES = [
 ]
 
 
+class SourceFile:
+    """
+    Text of a file, shared by all the positions in this file.
+    The lines of the positions are only needed when an error is printed, so the index of the first character
+    of each line is only computed when the line of a position is asked for the first time.
+    """
+    def __init__(self, filename: str, text: str):
+        """
+        :param filename: Name of the file.
+        :type filename: str
+        :param text: Text of the file.
+        :type text: str
+        """
+        self.filename: str = filename
+        self.text: str = text
+        self._lines_starts: Optional[List[int]] = None
+
+    def get_lines_starts(self) -> List[int]:
+        """
+        Return the index of the first character of each line.
+        """
+        if self._lines_starts is None:
+            self._lines_starts = [0]
+            idx: int = self.text.find("\n")
+            while idx != -1:
+                self._lines_starts.append(idx + 1)
+                idx = self.text.find("\n", idx + 1)
+        return self._lines_starts
+
+    def get_line(self, idx: int) -> int:
+        """
+        Return the line (starting at 0) of a character.
+
+        :param idx: Index of the character.
+        :type idx: int
+        """
+        return bisect_right(self.get_lines_starts(), idx) - 1
+
+    def get_line_text(self, ln: int) -> str:
+        """
+        Return the text of a line, without its new line.
+
+        :param ln: Line (starting at 0).
+        :type ln: int
+        """
+        lines_starts: List[int] = self.get_lines_starts()
+        return self.text[lines_starts[ln]:lines_starts[ln + 1] - 1] if ln + 1 < len(lines_starts) else self.text[lines_starts[ln]:]
+
+
 class Position:
-    def __init__(self, idx: int, ln: int, col: int, filename: str, file_text: str):
-        self.idx = idx
-        self.ln = ln
-        self.col = col
-        self.filename = filename
-        self.file_text = file_text
+    """
+    Position of a character in a file, stored as its index in the text of the file.
+    Its line and column are computed from the file's lines when they are needed.
+    """
+    __slots__ = ("idx", "source")
+
+    def __init__(self, idx: int, source: SourceFile):
+        """
+        :param idx: Index of the character.
+        :type idx: int
+        :param source: File of the character.
+        :type source: SourceFile
+        """
+        self.idx: int = idx
+        self.source: SourceFile = source
+
+    @property
+    def ln(self) -> int:
+        return self.source.get_line(self.idx)
+
+    @property
+    def col(self) -> int:
+        return self.idx - self.source.get_lines_starts()[self.ln]
+
+    @property
+    def filename(self) -> str:
+        return self.source.filename
+
+    @property
+    def file_text(self) -> str:
+        return self.source.text
 
     def advance(self, current_char: str = None):
-        if self.idx == len(self.file_text):
+        """
+        Move this cursor to the next character, the line and column are updated from the index.
+
+        :return: This instance.
+        :rtype: Position
+        """
+        if self.idx == len(self.source.text):
             return
         self.idx += 1
-        self.col += 1
-
-        if current_char == "\n":
-            self.ln += 1
-            self.col = 0
-
         return self
 
     def get_line_text(self) -> str:
-        lines: List[str] = self.file_text.split("\n")
-        return lines[self.ln]
+        return self.source.get_line_text(self.ln)
 
     def get_copy(self):
-        return Position(self.idx, self.ln, self.col, self.filename, self.file_text)
+        return Position(self.idx, self.source)
 
     def go_to_end_of_line(self):
         """
@@ -63,8 +137,8 @@ class Position:
         :return: This instance.
         :rtype: Position
         """
-        while self.file_text[self.col] != "\n":
-            self.advance()
+        end: int = self.source.text.find("\n", self.idx)
+        self.idx = end if end != -1 else len(self.source.text)
         return self
 
     def go_to_beginning_of_line(self):
@@ -74,8 +148,7 @@ class Position:
         :return: This instance.
         :rtype: Position
         """
-        self.idx -= self.col
-        self.col = 0
+        self.idx = self.source.get_lines_starts()[self.ln]
         return self
 
     def __repr__(self) -> str: